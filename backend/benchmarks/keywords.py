@@ -0,0 +1,269 @@
+"""
+Benchmarks for the keyword analysis behind ``/getkeywords``.
+
+Every case builds a deterministic synthetic corpus in a fresh database,
+then measures the endpoint with the result cache cleared before each
+request. Indexed algorithms (sgrank, textrank) also time the key term
+index rebuild. Each case runs in its own process so its peak RSS can be
+measured. No network access is needed, but sgrank and textrank need the
+``nlp`` extra and a spaCy model, and the fast mode the ``fast`` extra;
+cases whose dependencies are missing are reported as skipped.
+
+Results are written as JSON. Given a baseline from an earlier run, the
+benchmark exits with status 1 if any metric regressed by more than the
+threshold.
+
+    $ python benchmarks/keywords.py --sizes 1000,10000 --algorithms f,s \\
+        --output bench.json --baseline benchmarks/baseline.json
+"""
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import click
+
+# (metric, whether a larger value is better)
+METRICS = (
+    ("posts_per_second", True),
+    ("index_posts_per_second", True),
+    ("p50_ms", False),
+    ("p99_ms", False),
+    ("peak_rss_kb", False),
+)
+
+
+def make_vocabulary(rng, size):
+    """Return ``size`` distinct pronounceable pseudo-words."""
+    onsets = "b c d f g h j k l m n p r s t v w z br ch cl dr gr pl sh st tr".split()
+    vowels = "a e i o u ai ea ou".split()
+    words = []
+    seen = set()
+
+    while len(words) < size:
+        word = "".join(
+            rng.choice(onsets) + rng.choice(vowels) for _ in range(rng.randint(1, 3))
+        )
+
+        if word not in seen:
+            seen.add(word)
+            words.append(word)
+
+    return words
+
+
+def generate_posts(count, seed=0, mean_words=60, sigma=0.8, vocabulary=5000):
+    """Yield ``count`` deterministic ``(title, body)`` pairs. Body lengths
+    follow a log-normal distribution around ``mean_words`` and words are
+    drawn with Zipf frequencies, like natural text.
+    """
+    rng = random.Random(seed)
+    words = make_vocabulary(rng, vocabulary)
+    cum_weights = []
+    total = 0.0
+
+    for rank in range(len(words)):
+        total += 1.0 / (rank + 1)
+        cum_weights.append(total)
+
+    for _ in range(count):
+        length = max(1, int(rng.lognormvariate(0, sigma) * mean_words))
+        body = " ".join(rng.choices(words, cum_weights=cum_weights, k=length))
+        title = " ".join(rng.choices(words, cum_weights=cum_weights, k=4))
+        yield title, body
+
+
+def percentile(values, fraction):
+    """Return the nearest-rank percentile of ``values``."""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered))) - 1))
+    return ordered[index]
+
+
+def run_case(case, requests, corpus):
+    """Run one benchmark case. Called in a fresh worker process."""
+    from coolspace import create_app
+    from coolspace.cache import get_cache
+    from coolspace.db import get_db
+    from coolspace.db import init_db
+    from coolspace.keywords import INDEXED_ALGORITHMS
+
+    result = dict(case)
+    params = case["params"]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        app = create_app(
+            {
+                "TESTING": True,
+                "DATABASE": os.path.join(tmp, "bench.sqlite"),
+                "KEYWORDS_ALGORITHM": case["algorithm"],
+                "KEYWORDS_N_KEY": params.get("n_key_float", 0.75),
+                "KEYWORDS_NGRAMS": params.get("n_grams", "1,2,3,4"),
+                "KEYWORDS_INDEX_ON_WRITE": False,
+            }
+        )
+
+        with app.app_context():
+            init_db()
+            db = get_db()
+            db.execute(
+                "INSERT INTO user (username, password) VALUES ('bench', 'x')"
+            )
+            db.executemany(
+                "INSERT INTO post (title, body, author_id) VALUES (?, ?, 1)",
+                generate_posts(case["posts"], **corpus),
+            )
+            db.commit()
+
+        if case["algorithm"] in INDEXED_ALGORITHMS:
+            start = time.perf_counter()
+            outcome = app.test_cli_runner().invoke(args=["index-keyterms"])
+            elapsed = time.perf_counter() - start
+
+            if outcome.exit_code != 0:
+                result["skipped"] = outcome.output.strip()
+                return result
+
+            result["index_seconds"] = elapsed
+            result["index_posts_per_second"] = case["posts"] / elapsed
+
+        client = app.test_client()
+        query = dict(params, algorithm=case["algorithm"])
+        latencies = []
+
+        for _ in range(requests):
+            with app.app_context():
+                get_cache().clear()
+
+            start = time.perf_counter()
+            response = client.get("/getkeywords", query_string=query)
+            latencies.append(time.perf_counter() - start)
+
+            if response.status_code == 503:
+                result["skipped"] = response.get_data(as_text=True)
+                return result
+
+            assert response.status_code == 200, response.status
+
+    p50 = percentile(latencies, 0.5)
+    result["p50_ms"] = p50 * 1000
+    result["p99_ms"] = percentile(latencies, 0.99) * 1000
+    result["posts_per_second"] = case["posts"] / p50
+    result["peak_rss_kb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return result
+
+
+def case_key(case):
+    return (case["posts"], case["algorithm"], json.dumps(case["params"], sort_keys=True))
+
+
+def compare(results, baseline, threshold):
+    """Return a message for every metric that regressed by more than
+    ``threshold`` (a fraction) against the baseline."""
+    previous = {case_key(case): case for case in baseline["cases"]}
+    failures = []
+
+    for case in results["cases"]:
+        old = previous.get(case_key(case))
+
+        if old is None or "skipped" in case or "skipped" in old:
+            continue
+
+        for metric, larger_is_better in METRICS:
+            if metric not in case or metric not in old:
+                continue
+
+            new_value = case[metric]
+            old_value = old[metric]
+
+            if larger_is_better:
+                regressed = new_value < old_value * (1 - threshold)
+            else:
+                regressed = new_value > old_value * (1 + threshold)
+
+            if regressed:
+                failures.append(
+                    "{0} posts, algorithm {1}, {2}: {3} {4:.1f} -> {5:.1f}".format(
+                        case["posts"], case["algorithm"], case["params"], metric,
+                        old_value, new_value,
+                    )
+                )
+
+    return failures
+
+
+@click.command()
+@click.option("--sizes", default="1000,10000,100000", show_default=True,
+    help="Comma separated corpus sizes in posts.")
+@click.option("--algorithms", default="f,s", show_default=True,
+    help="Comma separated keyword algorithms to run.")
+@click.option("--params", "param_sets", multiple=True,
+    help='Extraction parameters as JSON, e.g. \'{"n_grams": "1,2"}\'. Repeatable.')
+@click.option("--requests", default=20, show_default=True,
+    help="Timed /getkeywords requests per case.")
+@click.option("--seed", default=0, show_default=True, help="Corpus random seed.")
+@click.option("--mean-words", default=60, show_default=True,
+    help="Typical post length in words.")
+@click.option("--sigma", default=0.8, show_default=True,
+    help="Spread of the log-normal post length distribution.")
+@click.option("--output", type=click.Path(dir_okay=False), help="Write results here.")
+@click.option("--baseline", type=click.Path(exists=True, dir_okay=False),
+    help="Results of an earlier run to compare against.")
+@click.option("--threshold", default=0.2, show_default=True,
+    help="Largest tolerated regression, as a fraction of the baseline.")
+def main(sizes, algorithms, param_sets, requests, seed, mean_words, sigma, output,
+        baseline, threshold):
+    """Benchmark /getkeywords on synthetic corpora."""
+    corpus = {"seed": seed, "mean_words": mean_words, "sigma": sigma}
+    results = {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "corpus": corpus,
+        "cases": [],
+    }
+
+    for size in [int(size) for size in sizes.split(",")]:
+        for algorithm in algorithms.split(","):
+            for params in [json.loads(p) for p in param_sets] or [{}]:
+                case = {"posts": size, "algorithm": algorithm, "params": params}
+
+                # a fresh process per case so peak RSS is the case's own
+                with ProcessPoolExecutor(max_workers=1) as executor:
+                    result = executor.submit(run_case, case, requests, corpus).result()
+
+                results["cases"].append(result)
+
+                if "skipped" in result:
+                    click.echo("{0:>7} posts  {1}  skipped: {2}".format(
+                        size, algorithm, result["skipped"]))
+                else:
+                    click.echo(
+                        "{0:>7} posts  {1}  {2:>10.0f} posts/s  p50 {3:.1f} ms"
+                        "  p99 {4:.1f} ms  peak {5} kB".format(
+                            size, algorithm, result["posts_per_second"],
+                            result["p50_ms"], result["p99_ms"], result["peak_rss_kb"],
+                        )
+                    )
+
+    if output:
+        with open(output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if baseline:
+        with open(baseline) as f:
+            failures = compare(results, json.load(f), threshold)
+
+        for failure in failures:
+            click.echo("REGRESSION " + failure, err=True)
+
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -11,5 +11,9 @@ setup(
     include_package_data=True,
     zip_safe=False,
     install_requires=["flask"],
-    extras_require={"test": ["pytest", "coverage"]},
+    extras_require={
+        "test": ["pytest", "coverage"],
+        "nlp": ["spacy>=2.1,<3", "textacy>=0.7,<0.9"],
+        "fast": ["numpy", "scipy"],
+    },
 )
@@ -4,6 +4,7 @@ import tempfile
 import pytest
 
 from flaskr import create_app
+from flaskr.db import close_connections
 from flaskr.db import get_db
 from flaskr.db import init_db
 
@@ -28,6 +29,9 @@ def app():
     yield app
 
     # close and remove the temporary database
+    with app.app_context():
+        close_connections()
+
     os.close(db_fd)
     os.unlink(db_path)
 
@@ -0,0 +1,134 @@
+import random
+from collections import Counter
+from collections import defaultdict
+
+import pytest
+
+from flaskr.aggregate import KeytermAggregator
+
+
+def reference_tally(posts):
+    """The original unbounded tally from clustering_analysis."""
+    cummula = defaultdict(lambda: 0)
+    journals = defaultdict(lambda: [])
+
+    for msgid, ranks in posts:
+        for word in ranks:
+            cummula[word[0]] += 1
+            journals[word[0]].append((msgid, word[1]))
+            if len(journals[word[0]]) > 10:
+                newlist = []
+                min_tuple = journals[word[0]][0]
+                for tuple in journals[word[0]]:
+                    if tuple[1] < min_tuple[1]:
+                        min_tuple = tuple
+                for tuple in journals[word[0]]:
+                    if tuple[0] != min_tuple[0]:
+                        newlist.append(tuple)
+                journals[word[0]] = newlist
+
+    ranked = sorted(cummula.items(), key=lambda val: val[1], reverse=True)
+    return ranked, journals
+
+
+def random_posts(seed, count=300, vocabulary=40):
+    rng = random.Random(seed)
+    words = ["w{0}".format(i) for i in range(vocabulary)]
+    posts = []
+
+    for msgid in range(count):
+        terms = rng.sample(words, rng.randint(0, 8))
+        # coarse scores so ties are common
+        posts.append((str(msgid), [(t, rng.randint(0, 5) / 5.0) for t in terms]))
+
+    return posts
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_exact_matches_reference(seed):
+    posts = random_posts(seed)
+    ranked, journals = reference_tally(posts)
+    aggregator = KeytermAggregator()
+
+    for msgid, ranks in posts:
+        aggregator.add(msgid, ranks)
+
+    assert aggregator.top(len(ranked)) == ranked
+
+    for term, count in ranked:
+        assert aggregator.journals_for(term) == journals[term]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_merge_matches_serial(seed):
+    posts = random_posts(seed)
+    serial = KeytermAggregator()
+    merged = KeytermAggregator()
+
+    for msgid, ranks in posts:
+        serial.add(msgid, ranks)
+
+    for start in range(0, len(posts), 70):
+        partial = KeytermAggregator()
+
+        for msgid, ranks in posts[start : start + 70]:
+            partial.add(msgid, ranks)
+
+        merged.merge(partial)
+
+    assert merged.top(50) == serial.top(50)
+
+    for term, count in serial.top(50):
+        assert merged.journals_for(term) == serial.journals_for(term)
+
+
+def skewed_posts(seed, count=2000):
+    """A few frequent terms among a long tail of rare ones."""
+    rng = random.Random(seed)
+    posts = []
+
+    for msgid in range(count):
+        terms = {"hot{0}".format(rng.randint(0, 4)), "tail{0}".format(rng.randint(0, 5000))}
+        posts.append((str(msgid), [(t, rng.random()) for t in terms]))
+
+    return posts
+
+
+def test_bounded_keeps_heavy_hitters():
+    posts = skewed_posts(0)
+    truth = Counter(term for msgid, ranks in posts for term, score in ranks)
+    aggregator = KeytermAggregator(capacity=50, journals=3)
+
+    for msgid, ranks in posts:
+        aggregator.add(msgid, ranks)
+        assert len(aggregator) <= 50
+
+    assert {term for term, count in aggregator.top(5)} == {
+        "hot{0}".format(i) for i in range(5)
+    }
+
+    for term, count in aggregator.top(50):
+        assert count - aggregator.error(term) <= truth[term] <= count
+        assert len(aggregator.journals_for(term)) <= 3
+
+
+def test_bounded_merge():
+    posts = skewed_posts(1)
+    truth = Counter(term for msgid, ranks in posts for term, score in ranks)
+    merged = KeytermAggregator(capacity=50)
+
+    for start in range(0, len(posts), 500):
+        partial = KeytermAggregator(capacity=50)
+
+        for msgid, ranks in posts[start : start + 500]:
+            partial.add(msgid, ranks)
+
+        merged.merge(partial)
+        assert len(merged) <= 50
+
+    assert {term for term, count in merged.top(5)} == {
+        "hot{0}".format(i) for i in range(5)
+    }
+
+    for term, count in merged.top(50):
+        assert count - merged.error(term) <= truth[term] <= count
@@ -0,0 +1,71 @@
+from flaskr.db import get_db
+
+
+def _add_posts(app):
+    with app.app_context():
+        db = get_db()
+        db.executemany(
+            "INSERT INTO post (title, body, author_id, created) VALUES (?, ?, ?, ?)",
+            [
+                ("second", "two", 2, "2018-02-01 00:00:00"),
+                ("third", "three", 1, "2018-03-01 00:00:00"),
+            ],
+        )
+        db.commit()
+
+
+def test_list_posts(client, app):
+    app.config["API_CHUNK_SIZE"] = 2
+    _add_posts(app)
+    data = client.get("/api/posts").get_json()
+    assert [post["title"] for post in data["posts"]] == ["third", "second", "test title"]
+    assert data["posts"][-1] == {
+        "id": 1,
+        "title": "test title",
+        "excerpt": "test\nbody",
+        "author": "test",
+        "created": "2018-01-01T00:00:00",
+    }
+
+
+def test_list_posts_filters(client, app):
+    _add_posts(app)
+    response = client.get("/api/posts?fields=id,body&author=test")
+    assert response.get_json() == {
+        "posts": [{"id": 3, "body": "three"}, {"id": 1, "body": "test\nbody"}]
+    }
+
+    response = client.get(
+        "/api/posts?fields=title&created_after=2018-01-15&created_before=2018-03-01"
+    )
+    assert response.get_json() == {"posts": [{"title": "second"}]}
+
+
+def test_bad_arguments(client):
+    assert client.get("/api/posts?fields=id,password").status_code == 400
+    assert client.get("/api/posts?created_after=yesterday").status_code == 400
+
+
+def test_get_post(client):
+    assert client.get("/api/posts/1?fields=title,author").get_json() == {
+        "title": "test title",
+        "author": "test",
+    }
+    assert client.get("/api/posts/2").status_code == 404
+
+
+def test_conditional_get(client, auth):
+    response = client.get("/api/posts")
+    etag = response.headers["ETag"]
+    modified = response.headers["Last-Modified"]
+
+    assert client.get("/api/posts", headers={"If-None-Match": etag}).status_code == 304
+    response = client.get("/api/posts", headers={"If-Modified-Since": modified})
+    assert response.status_code == 304
+
+    # a write changes the ETag
+    auth.login()
+    client.post("/create", data={"title": "new", "body": ""})
+    response = client.get("/api/posts", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
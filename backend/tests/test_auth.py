@@ -1,3 +1,5 @@
+import time
+
 import pytest
 from flask import g
 from flask import session
@@ -67,3 +69,38 @@ def test_logout(client, auth):
     with client:
         auth.logout()
         assert "user_id" not in session
+
+
+def test_user_loaded_lazily(client, auth):
+    auth.login()
+
+    with client:
+        client.get("/hello")
+        assert "user" not in g
+
+        client.get("/")
+        assert "user" in g
+        # the password hash is never loaded
+        assert set(g.user) == {"id", "username"}
+
+
+def test_user_cache(client, auth, app, monkeypatch):
+    auth.login()
+    client.get("/")
+
+    with app.app_context():
+        db = get_db()
+        db.execute("UPDATE user SET username = 'renamed' WHERE id = 1")
+        db.commit()
+
+    # the cached user is served until it expires
+    with client:
+        client.get("/")
+        assert g.user["username"] == "test"
+
+    now = time.monotonic()
+    monkeypatch.setattr(time, "monotonic", lambda: now + app.config["USER_CACHE_TTL"])
+
+    with client:
+        client.get("/")
+        assert g.user["username"] == "renamed"
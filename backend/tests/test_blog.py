@@ -1,3 +1,5 @@
+import re
+
 import pytest
 
 from flaskr.db import get_db
@@ -81,3 +83,61 @@ def test_delete(client, auth, app):
         db = get_db()
         post = db.execute("SELECT * FROM post WHERE id = 1").fetchone()
         assert post is None
+
+
+def test_index_pages(client, app):
+    app.config["POSTS_PER_PAGE"] = 2
+
+    with app.app_context():
+        db = get_db()
+        # two posts share a timestamp, so the id breaks the tie
+        db.executemany(
+            "INSERT INTO post (title, body, author_id, created) VALUES (?, '', 1, ?)",
+            [
+                ("second", "2018-01-02 00:00:00"),
+                ("third", "2018-01-03 00:00:00"),
+                ("fourth", "2018-01-03 00:00:00"),
+            ],
+        )
+        db.commit()
+
+    titles = []
+    url = "/"
+
+    while url:
+        data = client.get(url).get_data(as_text=True)
+        titles += re.findall(r'<a href="/\d+">([^<]+)</a>', data)
+        match = re.search(r'href="(/\?before=[^"]+)"', data)
+        url = match.group(1) if match else None
+
+    assert titles == ["fourth", "third", "second", "test title"]
+
+
+def test_index_bad_cursor(client):
+    assert client.get("/?before=nonsense").status_code == 400
+
+
+def test_excerpt(client, auth, app):
+    auth.login()
+    client.post("/create", data={"title": "long", "body": "x" * 300})
+    client.post("/1/update", data={"title": "short", "body": "brief"})
+
+    with app.app_context():
+        db = get_db()
+        assert db.execute("SELECT excerpt FROM post WHERE id = 2").fetchone()[0] == (
+            "x" * 280 + "..."
+        )
+        assert db.execute("SELECT excerpt FROM post WHERE id = 1").fetchone()[0] == (
+            "brief"
+        )
+
+    # the listing only has the excerpt, the detail view the whole body
+    assert b"x" * 281 not in client.get("/").data
+    assert b"x" * 300 in client.get("/2").data
+
+
+def test_detail(client):
+    response = client.get("/1")
+    assert b"test title" in response.data
+    assert b"test\nbody" in response.data
+    assert client.get("/2").status_code == 404
@@ -0,0 +1,141 @@
+import sqlite3
+import time
+
+import pytest
+
+from flaskr import create_app
+from flaskr import post
+from flaskr.cache import LRUCache
+from flaskr.cache import SQLiteCache
+from flaskr.cache import get_cache
+
+
+def test_lru_cache():
+    cache = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    # "b" is now the least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.get("c") == 3
+
+
+def test_sqlite_cache(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = SQLiteCache(path, maxsize=2)
+    cache.set("a", ["x", "y"])
+    assert cache.get("a") == ["x", "y"]
+    assert cache.get("missing") is None
+
+    # a second instance, as in another worker, sees the same entries
+    other = SQLiteCache(path, maxsize=2)
+    other.set("b", [])
+    other.set("c", [1])
+    assert len([k for k in "abc" if cache.get(k) is not None]) == 2
+    cache.clear()
+    assert other.get("c") is None
+
+
+def test_sqlite_cache_reads_rarely_write(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    cache = SQLiteCache(path)
+    cache.set("a", 1)
+
+    def used():
+        db = sqlite3.connect(path)
+        try:
+            return db.execute("SELECT used FROM cache").fetchone()[0]
+        finally:
+            db.close()
+
+    before = used()
+    assert cache.get("a") == 1
+    # a hit soon after the last recorded use doesn't write
+    assert used() == before
+
+    eager = SQLiteCache(path, touch_interval=0)
+    time.sleep(0.01)
+    assert eager.get("a") == 1
+    assert used() > before
+
+    db = sqlite3.connect(path)
+    assert db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    db.close()
+
+
+def test_cache_backend_config(tmp_path):
+    app = create_app(
+        {
+            "TESTING": True,
+            "CACHE_BACKEND": "sqlite",
+            "CACHE_PATH": str(tmp_path / "cache.sqlite"),
+        }
+    )
+
+    with app.app_context():
+        assert isinstance(get_cache(), SQLiteCache)
+
+    with pytest.raises(ValueError):
+        create_app({"TESTING": True, "CACHE_BACKEND": "nope"})
+
+
+@pytest.fixture
+def analyses(monkeypatch):
+    """Count keyword analyses instead of running them."""
+    calls = []
+
+    def top_keyterms(db, params, cutoff=10):
+        calls.append(params)
+        return ["alpha", "beta"]
+
+    monkeypatch.setattr(post, "top_keyterms", top_keyterms)
+    return calls
+
+
+def test_keywords_cached(client, analyses):
+    first = client.get("/getkeywords")
+    assert first.get_json() == {"keywords": ["alpha", "beta"]}
+    assert client.get("/getkeywords").get_json() == first.get_json()
+    assert len(analyses) == 1
+
+    # a different cutoff is a different result
+    client.get("/getkeywords?cutoff=1")
+    assert len(analyses) == 2
+
+
+def test_keywords_etag(client, auth, analyses):
+    etag = client.get("/getkeywords").headers["ETag"]
+    response = client.get("/getkeywords", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.data == b""
+    assert len(analyses) == 1
+
+    # writing a post changes the version and so the result
+    auth.login()
+    client.post("/create", data={"title": "created", "body": ""})
+    response = client.get("/getkeywords", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert len(analyses) == 2
+
+
+def test_keywords_bad_algorithm(client):
+    assert client.get("/getkeywords?algorithm=x").status_code == 400
+    assert client.get("/getkeywords?n_grams=a").status_code == 400
+
+
+def test_lru_cache_ttl(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr("flaskr.cache.time.monotonic", lambda: now[0])
+    cache = LRUCache(ttl=10)
+    cache.set("a", 1)
+    now[0] += 5
+    assert cache.get("a") == 1
+    now[0] += 5
+    assert cache.get("a") is None
+
+    cache.set("b", 2)
+    cache.delete("b")
+    assert cache.get("b") is None
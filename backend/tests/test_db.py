@@ -2,6 +2,7 @@ import sqlite3
 
 import pytest
 
+from flaskr.db import close_connections
 from flaskr.db import get_db
 
 
@@ -9,6 +10,12 @@ def test_get_close_db(app):
     with app.app_context():
         db = get_db()
         assert db is get_db()
+        assert db.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+
+    # the connection outlives the app context and is reused
+    with app.app_context():
+        assert get_db() is db
+        close_connections()
 
     with pytest.raises(sqlite3.ProgrammingError) as e:
         db.execute("SELECT 1")
@@ -16,6 +23,34 @@ def test_get_close_db(app):
     assert "closed" in str(e.value)
 
 
+def test_readonly_db(app):
+    with app.app_context():
+        reader = get_db(readonly=True)
+        assert reader is not get_db()
+        assert reader.execute("SELECT COUNT(*) FROM post").fetchone()[0] == 1
+
+        with pytest.raises(sqlite3.OperationalError):
+            reader.execute("DELETE FROM post")
+
+
+def test_uncommitted_work_rolled_back(app):
+    with app.app_context():
+        get_db().execute("DELETE FROM post")
+
+    with app.app_context():
+        assert get_db().execute("SELECT COUNT(*) FROM post").fetchone()[0] == 1
+
+
+def test_broken_connection_replaced(app):
+    with app.app_context():
+        db = get_db()
+        db.close()
+
+    with app.app_context():
+        assert get_db() is not db
+        assert get_db().execute("SELECT 1").fetchone()[0] == 1
+
+
 def test_init_db_command(runner, monkeypatch):
     class Recorder(object):
         called = False
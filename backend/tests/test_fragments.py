@@ -0,0 +1,52 @@
+from flaskr.db import get_db
+
+
+def test_index_cached(client, auth):
+    client.get("/")
+    client.get("/")
+    stats = client.get("/fragments/stats").get_json()
+    assert stats["page_misses"] == 1
+    assert stats["page_hits"] == 1
+    assert stats["article_misses"] == 1
+
+    # the author's page has an Edit link, so it is cached separately
+    auth.login()
+    assert b'href="/1/update"' in client.get("/").data
+    stats = client.get("/fragments/stats").get_json()
+    assert stats["page_misses"] == 2
+    assert stats["article_misses"] == 2
+
+
+def test_new_post_reuses_articles(client, auth):
+    auth.login()
+    client.get("/")
+    client.post("/create", data={"title": "created", "body": "new"})
+    data = client.get("/").data
+    assert b"created" in data
+    assert b"test title" in data
+    stats = client.get("/fragments/stats").get_json()
+    # only the new post's article was rendered again
+    assert stats["article_misses"] == 2
+    assert stats["article_hits"] == 1
+
+
+def test_update_invalidates(client, auth):
+    auth.login()
+    client.get("/")
+    client.post("/1/update", data={"title": "updated", "body": "changed"})
+    data = client.get("/").data
+    assert b"updated" in data
+    assert b"changed" in data
+
+
+def test_stale_article_not_served(client, app):
+    client.get("/")
+
+    # a write that didn't go through this process's cache
+    with app.app_context():
+        db = get_db()
+        db.execute("UPDATE post SET title = 'elsewhere' WHERE id = 1")
+        db.execute("UPDATE post_version SET version = version + 1")
+        db.commit()
+
+    assert b"elsewhere" in client.get("/").data
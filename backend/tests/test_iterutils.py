@@ -0,0 +1,6 @@
+from flaskr.iterutils import batches
+
+
+def test_batches():
+    assert list(batches(range(5), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(batches(iter([]), 2)) == []
@@ -0,0 +1,77 @@
+import threading
+import time
+
+import pytest
+
+from flaskr import post
+from flaskr.jobs import JobManager
+from flaskr.jobs import JobQueueFull
+
+
+def wait_for(job):
+    for _ in range(200):
+        if job.finished:
+            return job
+        time.sleep(0.01)
+
+    raise AssertionError("job didn't finish")
+
+
+def test_job_manager():
+    release = threading.Event()
+    manager = JobManager(max_workers=1, max_queued=1)
+
+    def work(job, value):
+        job.progress(1, 2)
+        release.wait(5)
+        return value
+
+    first = manager.submit("a", work, 1)
+    # identical work joins the job already in flight
+    assert manager.submit("a", work, 1) is first
+    second = manager.submit("b", work, 2)
+
+    with pytest.raises(JobQueueFull):
+        manager.submit("c", work, 3)
+
+    release.set()
+    assert wait_for(first).result == 1
+    assert wait_for(second).to_dict()["result"] == 2
+    assert manager.get(first.id) is first
+    assert manager.get("missing") is None
+    manager.shutdown()
+
+
+def test_job_failure():
+    manager = JobManager()
+
+    def work(job):
+        raise RuntimeError("broken")
+
+    job = wait_for(manager.submit("a", work))
+    assert job.to_dict()["status"] == "failed"
+    assert job.to_dict()["error"] == "broken"
+    manager.shutdown()
+
+
+def test_keywords_job(client, monkeypatch):
+    monkeypatch.setattr(post, "top_keyterms", lambda db, params, cutoff=10: ["alpha"])
+
+    response = client.post("/getkeywords/jobs?cutoff=1")
+    assert response.status_code == 202
+    job_url = response.headers["Location"]
+
+    for _ in range(200):
+        data = client.get(job_url).get_json()
+        if data["status"] == "done":
+            break
+        time.sleep(0.01)
+
+    assert data["result"] == {"keywords": ["alpha"]}
+    # the finished job filled the result cache
+    monkeypatch.setattr(post, "top_keyterms", lambda db, params, cutoff=10: [])
+    assert client.get("/getkeywords?cutoff=1").get_json() == {"keywords": ["alpha"]}
+
+
+def test_keywords_job_missing(client):
+    assert client.get("/getkeywords/jobs/nope").status_code == 404
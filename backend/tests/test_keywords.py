@@ -0,0 +1,295 @@
+import multiprocessing
+import sys
+import types
+
+import pytest
+
+from flaskr import keywords
+from flaskr import nlp
+from flaskr.db import get_db
+
+
+class FakeLanguage(object):
+    """Stands in for a spaCy pipeline; a document is its list of words."""
+
+    def __call__(self, text):
+        return text.split()
+
+    def pipe(self, texts, batch_size=None):
+        return (self(text) for text in texts)
+
+
+def fake_rank(doc, n_keyterms=None, **kwargs):
+    """Rank the distinct words of a document, earlier words first."""
+    words = list(dict.fromkeys(doc))
+    return [(word, 1.0 / (i + 1)) for i, word in enumerate(words)]
+
+
+@pytest.fixture
+def fake_textacy(monkeypatch):
+    """Install a stand-in textacy module that records model loads."""
+    textacy = types.ModuleType("textacy")
+    textacy.keyterms = types.ModuleType("textacy.keyterms")
+    textacy.loaded = []
+    textacy.ranked = []
+
+    def rank(doc, **kwargs):
+        textacy.ranked.append(" ".join(doc))
+        return fake_rank(doc, **kwargs)
+
+    textacy.keyterms.sgrank = rank
+    textacy.keyterms.textrank = rank
+
+    def load_spacy_lang(name, disable=()):
+        textacy.loaded.append((name, disable))
+        return FakeLanguage()
+
+    textacy.load_spacy_lang = load_spacy_lang
+    textacy.make_spacy_doc = lambda text, lang: lang(text)
+    monkeypatch.setitem(sys.modules, "textacy", textacy)
+    monkeypatch.setitem(sys.modules, "textacy.keyterms", textacy.keyterms)
+    monkeypatch.setattr(nlp, "_models", {})
+    return textacy
+
+
+def test_get_model_loads_once(fake_textacy):
+    model = nlp.get_model("en_core_web_sm", disable=("parser",))
+    assert nlp.get_model("en_core_web_sm", disable=("parser",)) is model
+    assert fake_textacy.loaded == [("en_core_web_sm", ("parser",))]
+
+    # a different set of disabled pipes is a different model
+    assert nlp.get_model("en_core_web_sm", disable=()) is not model
+    assert len(fake_textacy.loaded) == 2
+
+
+def test_warmup(fake_textacy):
+    from flaskr import create_app
+
+    create_app({"TESTING": True, "KEYWORDS_WARMUP": True})
+    assert fake_textacy.loaded == [("en_core_web_sm", ("parser",))]
+
+
+def test_nlp_unavailable(client, auth, app, monkeypatch):
+    # a None entry in sys.modules makes the import fail
+    monkeypatch.setitem(sys.modules, "textacy", None)
+    monkeypatch.setattr(nlp, "_models", {})
+
+    with pytest.raises(nlp.NLPUnavailableError) as e:
+        nlp.get_model()
+
+    assert "coolspace[nlp]" in str(e.value)
+
+    # a worker pool would only break, so the parent reports it first
+    app.config["KEYWORDS_WORKERS"] = 2
+    response = client.get("/getkeywords?algorithm=t")
+    assert response.status_code == 503
+    assert b"coolspace[nlp]" in response.data
+
+    # posts can still be written, they just aren't indexed
+    auth.login()
+    client.post("/create", data={"title": "created", "body": "apple"})
+
+    with app.app_context():
+        db = get_db()
+        assert db.execute("SELECT COUNT(*) FROM post").fetchone()[0] == 2
+        assert db.execute("SELECT COUNT(*) FROM post_keyterm").fetchone()[0] == 0
+
+
+def _terms(app, post_id):
+    with app.app_context():
+        rows = get_db().execute(
+            "SELECT term FROM post_keyterm WHERE post_id = ? ORDER BY term",
+            (post_id,),
+        ).fetchall()
+        return [row["term"] for row in rows]
+
+
+def test_index_maintained_on_write(client, auth, app, fake_textacy):
+    auth.login()
+    client.post("/create", data={"title": "created", "body": "banana apple"})
+    assert _terms(app, 2) == ["apple", "banana"]
+
+    client.post("/2/update", data={"title": "updated", "body": "cherry"})
+    assert _terms(app, 2) == ["cherry"]
+
+    client.post("/2/delete")
+    assert _terms(app, 2) == []
+
+
+def test_index_dropped_on_unindexed_update(client, auth, app, fake_textacy):
+    auth.login()
+    client.post("/create", data={"title": "created", "body": "banana apple"})
+    assert _terms(app, 2) == ["apple", "banana"]
+
+    # with indexing on write off, the stale terms must not be kept
+    app.config["KEYWORDS_INDEX_ON_WRITE"] = False
+    client.post("/2/update", data={"title": "renamed", "body": "banana apple"})
+    assert _terms(app, 2) == ["apple", "banana"]
+    client.post("/2/update", data={"title": "updated", "body": "cherry"})
+    assert _terms(app, 2) == []
+
+
+def test_index_keyterms_command(runner, app, fake_textacy):
+    with app.app_context():
+        db = get_db()
+        db.execute(
+            "INSERT INTO post (title, body, author_id) VALUES ('two', 'body apple', 1)"
+        )
+        # a row left over from different extraction parameters
+        db.execute(
+            "INSERT INTO post_keyterm (post_id, term, score, fingerprint)"
+            " VALUES (1, 'stale', 1.0, 'x')"
+        )
+        db.commit()
+
+    result = runner.invoke(args=["index-keyterms", "--batch-size", "1"])
+    assert "Indexed 2 posts, 2 analysed." in result.output
+    assert _terms(app, 1) == ["body", "test"]
+    assert _terms(app, 2) == ["apple", "body"]
+
+
+def test_get_keywords(client, runner, app, fake_textacy):
+    with app.app_context():
+        db = get_db()
+        db.execute(
+            "INSERT INTO post (title, body, author_id) VALUES ('two', 'body apple', 1)"
+        )
+        db.commit()
+
+    runner.invoke(args=["index-keyterms"])
+    app.config["KEYWORDS_CUTOFF"] = 2
+    assert client.get("/getkeywords").get_json() == {"keywords": ["body", "test"]}
+
+
+@pytest.mark.parametrize("cutoff", ("0", "1001", "99999999999999999999"))
+def test_get_keywords_bad_cutoff(client, cutoff):
+    response = client.get("/getkeywords", query_string={"cutoff": cutoff})
+    assert response.status_code == 400
+    assert b"cutoff must be between 1 and 1000" in response.data
+
+
+@pytest.mark.parametrize(
+    ("args", "message"),
+    (
+        ({"n_grams": "0"}, b"n_grams must be a comma separated list of positive integers"),
+        ({"n_grams": "1,-1"}, b"n_grams must be a comma separated list of positive integers"),
+        ({"n_grams": "a"}, b"n_grams must be a comma separated list of positive integers"),
+        ({"n_key_float": "nan"}, b"n_key_float must be a positive number"),
+        ({"n_key_float": "inf"}, b"n_key_float must be a positive number"),
+        ({"n_key_float": "0"}, b"n_key_float must be a positive number"),
+    ),
+)
+@pytest.mark.parametrize("path", ("/getkeywords", "/getkeywords/jobs"))
+def test_get_keywords_bad_params(client, args, message, path):
+    query = dict(args, algorithm="f")
+
+    if path.endswith("jobs"):
+        response = client.post(path, data=query)
+    else:
+        response = client.get(path, query_string=query)
+
+    assert response.status_code == 400
+    assert message in response.data
+
+
+def test_fingerprint():
+    assert keywords.fingerprint(n_grams="3,1,2") == keywords.fingerprint(
+        n_grams="1,2,3"
+    )
+    assert keywords.fingerprint(algorithm="t") != keywords.fingerprint(algorithm="s")
+
+
+def test_extract_many_matches_serial(fake_textacy):
+    texts = ["Apple banana", "banana cherry apple", "", "durian"] * 5
+    params = keywords.keyword_params(
+        {
+            "KEYWORDS_ALGORITHM": "s",
+            "KEYWORDS_N_KEY": 0.75,
+            "KEYWORDS_NGRAMS": "1,2",
+            "KEYWORDS_MODEL": "en_core_web_sm",
+        }
+    )
+    serial = [keywords.extract_keyterms(text, **params) for text in texts]
+    assert list(keywords.extract_many(iter(texts), params, batch_size=3)) == serial
+
+
+@pytest.mark.skipif(
+    multiprocessing.get_start_method() != "fork",
+    reason="workers only see the fake textacy module when forked",
+)
+def test_clustering_analysis_workers(fake_textacy):
+    messages = [
+        {"message": "{0} {1}".format(i, text)}
+        for i, text in enumerate(["apple banana", "banana cherry", "cherry apple"] * 4)
+    ]
+    serial = keywords.clustering_analysis(input=messages, cutoff=2)
+    assert serial == "apple,banana"
+    assert (
+        keywords.clustering_analysis(input=messages, cutoff=2, batch_size=2, workers=2)
+        == serial
+    )
+
+
+@pytest.mark.skipif(
+    multiprocessing.get_start_method() != "fork",
+    reason="workers only see the fake textacy module when forked",
+)
+def test_pool_reused(client, app, fake_textacy):
+    app.config["KEYWORDS_WORKERS"] = 2
+
+    assert client.get("/getkeywords?algorithm=t&cutoff=1").status_code == 200
+    pool = app.extensions["coolspace.keywords"]["pool"]
+    assert pool is not None
+    assert client.get("/getkeywords?algorithm=t&cutoff=2").status_code == 200
+    assert app.extensions["coolspace.keywords"]["pool"] is pool
+    pool.shutdown()
+
+
+def test_memo_on_write(client, auth, app, fake_textacy):
+    auth.login()
+    client.post("/create", data={"title": "one", "body": "Apple banana"})
+    # the same body again, up to case and whitespace
+    client.post("/create", data={"title": "two", "body": " apple banana\r\n"})
+    assert fake_textacy.ranked == ["apple banana"]
+    assert _terms(app, 2) == _terms(app, 3) == ["apple", "banana"]
+
+    # changing only the title doesn't analyse the body again
+    client.post("/2/update", data={"title": "renamed", "body": "Apple banana"})
+    assert fake_textacy.ranked == ["apple banana"]
+
+
+def test_memo_on_backfill(runner, app, fake_textacy):
+    with app.app_context():
+        db = get_db()
+        db.executemany(
+            "INSERT INTO post (title, body, author_id) VALUES ('copy', ?, 1)",
+            [("test\nbody",), ("other",), ("other",)],
+        )
+        db.commit()
+
+    result = runner.invoke(args=["index-keyterms", "--batch-size", "2"])
+    assert "Indexed 4 posts, 2 analysed." in result.output
+    assert sorted(fake_textacy.ranked) == ["other", "test body"]
+    assert _terms(app, 2) == _terms(app, 1) == ["body", "test"]
+    assert _terms(app, 4) == ["other"]
+
+    # a second rebuild is served entirely from the memo
+    result = runner.invoke(args=["index-keyterms"])
+    assert "Indexed 4 posts, 0 analysed." in result.output
+
+
+def test_prune_memo(app):
+    with app.app_context():
+        db = get_db()
+
+        for i in range(5):
+            keywords.memo_put(db, str(i), [["t", 1.0]])
+            db.execute(
+                "UPDATE keyterm_memo SET used = ? WHERE hash = ?", (float(i), str(i))
+            )
+
+        # reading an entry makes it recently used
+        assert keywords.memo_get(db, "0") == [("t", 1.0)]
+        keywords.prune_memo(db, 2)
+        rows = db.execute("SELECT hash FROM keyterm_memo ORDER BY hash").fetchall()
+        assert [row["hash"] for row in rows] == ["0", "4"]
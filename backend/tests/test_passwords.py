@@ -0,0 +1,92 @@
+import threading
+
+import pytest
+
+from flaskr import passwords
+from flaskr.db import get_db
+from flaskr.passwords import HasherBusy
+from flaskr.passwords import PasswordHasher
+
+
+def test_hash_and_check():
+    hasher = PasswordHasher("pbkdf2:sha256:1000")
+    pwhash = hasher.hash("secret")
+    assert pwhash.startswith("pbkdf2:sha256:1000$")
+    assert hasher.check(pwhash, "secret")
+    assert not hasher.check(pwhash, "wrong")
+    assert not hasher.needs_rehash(pwhash)
+    assert PasswordHasher("pbkdf2:sha256:2000").needs_rehash(pwhash)
+    hasher.shutdown()
+
+
+def test_needs_rehash():
+    default = PasswordHasher("pbkdf2:sha256")
+    # werkzeug stores the default iteration count in the hash
+    assert not default.needs_rehash(default.hash("secret"))
+    # stronger hashes are never downgraded
+    assert not PasswordHasher("pbkdf2:sha256:1000").needs_rehash("pbkdf2:sha512:2000$s$h")
+    # a weaker hash function is upgraded whatever its iterations
+    assert default.needs_rehash("pbkdf2:sha1:1000000$s$h")
+    assert default.needs_rehash("pbkdf2:sha1$s$h")
+    assert default.needs_rehash("pbkdf2:whirlpool:1000000$s$h")
+    # single round and plain hashes are weaker than any pbkdf2
+    assert default.needs_rehash("sha256$s$h")
+    assert default.needs_rehash("plain$$secret")
+    default.shutdown()
+
+
+@pytest.fixture
+def blocked_hasher(monkeypatch):
+    """A hasher with one worker and no queue, stuck on a first hash."""
+    release = threading.Event()
+    started = threading.Event()
+
+    def slow_hash(password, method):
+        started.set()
+        release.wait(5)
+        return "hashed"
+
+    monkeypatch.setattr(passwords, "generate_password_hash", slow_hash)
+    hasher = PasswordHasher("pbkdf2:sha256:1000", max_workers=1, max_queued=0)
+    first = threading.Thread(target=hasher.hash, args=("a",))
+    first.start()
+    started.wait(5)
+    yield hasher
+    release.set()
+    first.join()
+    hasher.shutdown()
+
+
+def test_busy(blocked_hasher):
+    with pytest.raises(HasherBusy):
+        blocked_hasher.hash("b")
+
+
+def test_login_sheds_load(client, app, blocked_hasher):
+    app.extensions["coolspace.passwords"] = blocked_hasher
+    response = client.post("/auth/login", data={"username": "test", "password": "test"})
+    assert response.status_code == 503
+
+
+def _stored_hash(app):
+    with app.app_context():
+        return get_db().execute("SELECT password FROM user WHERE id = 1").fetchone()[0]
+
+
+def test_rehash_on_login(auth, app):
+    # the test user's hash was made with 50000 iterations
+    app.extensions["coolspace.passwords"] = PasswordHasher("pbkdf2:sha256:60000")
+    auth.login()
+    pwhash = _stored_hash(app)
+    assert pwhash.startswith("pbkdf2:sha256:60000$")
+
+    # the upgraded hash still logs in, and isn't hashed again
+    assert auth.login().headers["Location"] == "http://localhost/"
+    assert _stored_hash(app) == pwhash
+
+
+def test_no_downgrade_on_login(auth, app):
+    app.extensions["coolspace.passwords"] = PasswordHasher("pbkdf2:sha256:1000")
+    before = _stored_hash(app)
+    auth.login()
+    assert _stored_hash(app) == before
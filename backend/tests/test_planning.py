@@ -0,0 +1,93 @@
+import io
+import json
+import time
+
+import pytest
+
+from flaskr import planning
+
+GOOD = {"Start time": "8:15", "Tasks": [
+    {"Task": "t0", "Length": 150}, {"Task": "t1", "Length": 15},
+    {"Task": "t2", "Length": 90}, {"Task": "t3", "Length": 240},
+]}
+# makes the planner raise
+BROKEN = {"Start time": "7:00", "Tasks": [
+    {"Task": "t0", "Length": 120}, {"Task": "t1", "Length": 60},
+    {"Task": "t2", "Length": 120}, {"Task": "t3", "Length": 30},
+    {"Task": "t4", "Length": 60}, {"Task": "t5", "Length": 300},
+    {"Task": "t6", "Length": 60},
+]}
+
+
+def test_plan():
+    assert planning.plan(GOOD)["schedule"]
+    assert "UnboundLocalError" in planning.plan(BROKEN)["error"]
+
+
+def test_time_limit():
+    with pytest.raises(planning.PlanningTimeout):
+        with planning._time_limit(0.1):
+            time.sleep(1)
+
+
+def test_plan_many_in_order():
+    task_sets = [GOOD, BROKEN, GOOD, ValueError("bad line")]
+    serial = list(planning.plan_many(task_sets, chunk_size=3))
+    assert [sorted(result) for result in serial] == [
+        ["schedule"], ["error"], ["schedule"], ["error"]
+    ]
+    assert serial[3] == {"error": "bad line"}
+
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=2) as executor:
+        parallel = planning.plan_many(
+            task_sets, executor=executor, workers=2, chunk_size=1
+        )
+        assert list(parallel) == serial
+
+
+def test_read_task_sets():
+    lines = io.StringIO(json.dumps(GOOD) + "\n\n{oops\n")
+    task_sets = list(planning.read_task_sets(lines))
+    assert task_sets[0] == GOOD
+    assert "Line 3 isn't valid JSON" in str(task_sets[1])
+
+
+def test_schedule_endpoint(client, app):
+    app.config["SCHEDULE_WORKERS"] = 1
+
+    response = client.post("/schedule", json=[GOOD, BROKEN, GOOD])
+    results = response.get_json()["results"]
+    assert results[0] == results[2] == planning.plan(GOOD)
+    assert "error" in results[1]
+
+    body = "\n".join(json.dumps(task_set) for task_set in (GOOD, BROKEN)) + "\n"
+    response = client.post(
+        "/schedule", data=body, content_type="application/x-ndjson"
+    )
+    lines = response.get_data(as_text=True).splitlines()
+    assert json.loads(lines[0]) == planning.plan(GOOD)
+    assert "error" in json.loads(lines[1])
+
+    app.extensions["coolspace.planning"]["executor"].shutdown()
+
+
+def test_schedule_endpoint_bad_input(client, app):
+    assert client.post("/schedule", json={"not": "a list"}).status_code == 400
+    # the pool isn't started for a request that is refused
+    assert app.extensions["coolspace.planning"]["executor"] is None
+
+
+def test_schedule_batch_command(runner, tmp_path):
+    source = tmp_path / "in.jsonl"
+    source.write_text(json.dumps(GOOD) + "\n" + json.dumps(BROKEN) + "\n")
+    target = tmp_path / "out.jsonl"
+
+    result = runner.invoke(
+        args=["schedule-batch", str(source), str(target), "--workers", "1"]
+    )
+    assert "Planned 1 days, 1 failed." in result.output
+    lines = target.read_text().splitlines()
+    assert json.loads(lines[0]) == planning.plan(GOOD)
+    assert "error" in json.loads(lines[1])
@@ -0,0 +1,79 @@
+import contextlib
+import io
+import json
+import logging
+import random
+
+import pytest
+import reference_schedule
+
+from flaskr import schedule
+
+LENGTHS = (5, 10, 15, 20, 30, 45, 50, 60, 75, 90, 119, 120, 121, 150, 200, 240, 300, 400)
+
+
+def outcome(get_schedule, task_set):
+    """The planned slots, or the type of error planning raised."""
+    with contextlib.redirect_stdout(io.StringIO()):
+        try:
+            return get_schedule(io.StringIO(json.dumps(task_set)))
+        except Exception as e:
+            return type(e).__name__
+
+
+def random_task_set(rng, count):
+    return {
+        "Start time": "{0}:{1:02}".format(rng.randint(6, 11), rng.choice((0, 5, 15, 30, 47))),
+        "Tasks": [
+            {"Task": "task {0}".format(i), "Length": rng.choice(LENGTHS)}
+            for i in range(count)
+        ],
+    }
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("most", (12, 200))
+def test_matches_reference(seed, most):
+    rng = random.Random(seed)
+
+    # at least one task each: the reference loops forever on an empty
+    # list, which test_no_tasks covers
+    for _ in range(150):
+        task_set = random_task_set(rng, rng.randint(1, most))
+        expected = outcome(reference_schedule.get_schedule, task_set)
+        assert outcome(schedule.get_schedule, task_set) == expected, task_set
+
+
+def test_iter_schedule(capsys, caplog):
+    task_set = random_task_set(random.Random(0), 6)
+    expected = outcome(schedule.get_schedule, task_set)
+    text = json.dumps(task_set)
+
+    for data in (task_set, text, text.encode()):
+        assert list(schedule.iter_schedule(data)) == expected
+
+    caplog.set_level(logging.DEBUG, logger=schedule.__name__)
+    slots = schedule.iter_schedule(task_set)
+    assert next(slots) == expected[0]
+    assert len(caplog.records) == 1
+    assert caplog.records[0].getMessage() == "{Task} begins at {Start} and ends at {End}".format(
+        **expected[0]
+    )
+    assert capsys.readouterr().out == ""
+
+
+def test_no_tasks():
+    task_set = {"Start time": "9:00", "Tasks": []}
+    assert outcome(schedule.get_schedule, task_set) == []
+
+
+def test_filler_index():
+    fillers = schedule._FillerIndex([90, 30, 120, 15, 30])
+    assert fillers.first_shorter(0, 60) == 1
+    assert fillers.first_shorter(2, 60) == 3
+    assert fillers.first_shorter(0, 15) is None
+    fillers.remove(1)
+    assert fillers.first_shorter(0, 60) == 3
+    fillers.remove(3)
+    assert fillers.first_shorter(0, 60) == 4
+    assert fillers.first_shorter(5, 1000) is None
@@ -0,0 +1,83 @@
+import pytest
+
+from flaskr import search
+from flaskr.db import get_db
+
+
+def _add_posts(app, posts):
+    with app.app_context():
+        db = get_db()
+        db.executemany(
+            "INSERT INTO post (title, body, author_id) VALUES (?, ?, 1)", posts
+        )
+        db.commit()
+
+
+def test_match_query():
+    assert search.match_query('solar "panels" OR') == '"solar" """panels""" "OR"'
+
+
+def test_search(client, app):
+    _add_posts(
+        app,
+        [
+            ("garden", "solar lights in the garden"),
+            ("solar", "solar panels and more solar panels"),
+            ("<b>bold</b>", "nothing to see"),
+        ],
+    )
+
+    data = client.get("/search?q=solar").get_data(as_text=True)
+    # the post mentioning solar most often ranks first
+    assert data.index("<mark>solar</mark> panels") < data.index("<mark>solar</mark> lights")
+
+    # text from posts is escaped, only the highlighting is markup
+    data = client.get("/search?q=bold").get_data(as_text=True)
+    assert "&lt;b&gt;<mark>bold</mark>&lt;/b&gt;" in data
+
+    # operators and stray quotes are searched for, not a syntax error
+    assert client.get('/search?q=" OR').status_code == 200
+
+
+def test_search_pages(client, app):
+    app.config["POSTS_PER_PAGE"] = 2
+    _add_posts(app, [("post {0}".format(i), "apple") for i in range(3)])
+
+    first = client.get("/search?q=apple").get_data(as_text=True)
+    assert first.count("<mark>apple</mark>") == 2
+    assert "page=2" in first
+
+    second = client.get("/search?q=apple&page=2").get_data(as_text=True)
+    assert second.count("<mark>apple</mark>") == 1
+    assert "page=3" not in second
+
+
+def test_search_follows_writes(client, auth, app):
+    auth.login()
+    client.post("/1/update", data={"title": "renamed", "body": "kiwi"})
+    assert b"<mark>kiwi</mark>" in client.get("/search?q=kiwi").data
+    assert b"No posts match" in client.get("/search?q=test").data
+
+    client.post("/1/delete")
+    assert b"No posts match" in client.get("/search?q=kiwi").data
+
+
+def test_rebuild_search(runner, app):
+    with app.app_context():
+        db = get_db()
+        # empty the index behind the triggers' back
+        db.execute("INSERT INTO post_fts (post_fts) VALUES ('delete-all')")
+        db.commit()
+
+    result = runner.invoke(args=["rebuild-search"])
+    assert "Rebuilt" in result.output
+
+    with app.app_context():
+        rows = search.search_posts(get_db(), "test", 10)
+        assert [row["id"] for row in rows] == [1]
+
+
+@pytest.mark.parametrize("page", ("1001", "99999999999999999999"))
+def test_search_page_too_deep(client, page):
+    response = client.get("/search", query_string={"q": "test", "page": page})
+    assert response.status_code == 404
@@ -0,0 +1,49 @@
+from flask import flash
+from flask import redirect
+
+from flaskr.db import get_db
+from flaskr.streaming import _chunks
+
+
+def test_chunks():
+    assert list(_chunks(["ab", "c", "defg", "h"], 3)) == ["abc", "defg", "h"]
+    assert list(_chunks([], 3)) == []
+
+
+def test_index_streamed(client, app):
+    app.config["STREAM_CHUNK_SIZE"] = 64
+
+    with app.app_context():
+        db = get_db()
+        db.executemany(
+            "INSERT INTO post (title, body, author_id) VALUES (?, 'b', 1)",
+            [("post {0}".format(i),) for i in range(5)],
+        )
+        db.commit()
+
+    chunks = list(client.get("/").response)
+    assert len(chunks) > 1
+    streamed = b"".join(chunks).decode()
+
+    # the same page rendered in one piece
+    app.config["STREAM_VIEWS"] = ()
+    app.extensions["coolspace.fragments"].pages.clear()
+    chunks = list(client.get("/").response)
+    assert len(chunks) == 1
+    assert chunks[0].decode() == streamed
+
+
+def test_streamed_page_cached(client):
+    first = client.get("/").get_data(as_text=True)
+    assert client.get("/").get_data(as_text=True) == first
+    assert client.get("/fragments/stats").get_json()["page_hits"] == 1
+
+
+def test_flash_shown_once(client, app):
+    @app.route("/flash")
+    def flash_message():
+        flash("Hello once")
+        return redirect("/")
+
+    assert b"Hello once" in client.get("/flash", follow_redirects=True).data
+    assert b"Hello once" not in client.get("/").data
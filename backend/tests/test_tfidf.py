@@ -0,0 +1,103 @@
+import math
+import random
+from collections import Counter
+
+import pytest
+
+from flaskr import tfidf
+from flaskr.db import get_db
+
+pytest.importorskip("numpy")
+pytest.importorskip("scipy")
+
+
+def reference_top_terms(texts, n_key_float, n_grams, cutoff):
+    """The same scoring as tfidf.top_terms, one document at a time."""
+    sizes = sorted({int(n) for n in n_grams.split(",")})
+    docs = [Counter(tfidf.ngrams(text, sizes)) for text in texts]
+    first_seen = {}
+
+    for text in texts:
+        for gram in tfidf.ngrams(text, sizes):
+            first_seen.setdefault(gram, len(first_seen))
+
+    df = Counter(term for doc in docs for term in doc)
+    tally = Counter()
+
+    for doc in docs:
+        length = sum(doc.values())
+        scores = {
+            term: count / length * (math.log((1.0 + len(docs)) / (1.0 + df[term])) + 1.0)
+            for term, count in doc.items()
+        }
+        if 0.0 < n_key_float < 1.0:
+            budget = int(round(len(doc) * n_key_float))
+        else:
+            budget = int(n_key_float)
+        best = sorted(scores, key=lambda term: (-scores[term], first_seen[term]))
+        tally.update(best[:budget])
+
+    ranked = sorted(tally, key=lambda term: (-tally[term], first_seen[term]))
+    return ranked[:cutoff]
+
+
+def test_ngrams():
+    assert list(tfidf.ngrams("The quick fox of 2020", [1, 2])) == [
+        "quick",
+        "fox",
+        "quick fox",
+    ]
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize(("n_key_float", "n_grams"), ((0.75, "1,2,3"), (2, "1")))
+def test_matches_reference(seed, n_key_float, n_grams):
+    rng = random.Random(seed)
+    words = ["w{0}".format(i) for i in "abcdefghijklmnop"] + ["the", "of"]
+    texts = [
+        " ".join(rng.choice(words) for _ in range(rng.randint(0, 12)))
+        for _ in range(60)
+    ]
+    assert tfidf.top_terms(texts, n_key_float, n_grams, 10) == reference_top_terms(
+        texts, n_key_float, n_grams, 10
+    )
+
+
+@pytest.mark.parametrize(
+    ("n_key_float", "n_grams"), ((0.75, "0"), (0.75, "-1,2"), (float("nan"), "1"), (0, "1"))
+)
+def test_bad_params(n_key_float, n_grams):
+    with pytest.raises(ValueError):
+        tfidf.top_terms(["apple banana"], n_key_float, n_grams)
+
+
+def test_empty():
+    assert tfidf.top_terms(["", "the of"], cutoff=5) == []
+
+
+def test_get_keywords_fast(client, app):
+    with app.app_context():
+        db = get_db()
+        db.executemany(
+            "INSERT INTO post (title, body, author_id) VALUES ('t', ?, 1)",
+            [("solar panels on the roof",), ("solar panels again",), ("roof repair",)],
+        )
+        db.commit()
+
+    response = client.get("/getkeywords?algorithm=f&n_key_float=1&n_grams=1&cutoff=2")
+    assert response.get_json() == {"keywords": ["solar", "test"]}
+
+
+def test_get_keywords_fast_newest_posts(client, app):
+    app.config["KEYWORDS_FAST_MAX_POSTS"] = 2
+
+    with app.app_context():
+        db = get_db()
+        db.executemany(
+            "INSERT INTO post (title, body, author_id) VALUES ('t', ?, 1)",
+            [("solar solar",), ("roof repair",), ("roof again",)],
+        )
+        db.commit()
+
+    response = client.get("/getkeywords?algorithm=f&n_key_float=1&n_grams=1&cutoff=1")
+    assert response.get_json() == {"keywords": ["roof"]}
@@ -0,0 +1,121 @@
+import json
+
+import pytest
+
+from flaskr.db import get_db
+
+
+@pytest.mark.parametrize("name", ("posts.jsonl", "posts.csv"))
+def test_export_import(runner, app, tmp_path, name):
+    with app.app_context():
+        db = get_db()
+        db.execute(
+            "INSERT INTO post (title, body, author_id, created)"
+            " VALUES ('quoted', ?, 2, '2018-02-01 10:00:00')",
+            ('a "comma", and\na line',),
+        )
+        db.commit()
+
+    path = str(tmp_path / name)
+    result = runner.invoke(args=["export-posts", path, "--batch-size", "1"])
+    assert "Exported 2 posts" in result.output
+
+    with app.app_context():
+        db = get_db()
+        query = "SELECT title, body, author_id, created FROM post"
+        before = db.execute(query).fetchall()
+        db.execute("DELETE FROM post")
+        db.commit()
+
+    result = runner.invoke(args=["import-posts", path, "--batch-size", "1"])
+    assert "Imported 2 posts" in result.output
+
+    with app.app_context():
+        after = get_db().execute(query).fetchall()
+
+    assert [tuple(row) for row in after] == [tuple(row) for row in before]
+
+
+def test_csv_keeps_line_breaks(runner, app, tmp_path):
+    body = "first line\r\nsecond, \"quoted\"\nthird\rlast"
+
+    with app.app_context():
+        db = get_db()
+        db.execute("UPDATE post SET body = ?", (body,))
+        db.commit()
+
+    path = str(tmp_path / "posts.csv")
+    runner.invoke(args=["export-posts", path])
+
+    with app.app_context():
+        db = get_db()
+        db.execute("DELETE FROM post")
+        db.commit()
+
+    result = runner.invoke(args=["import-posts", path])
+    assert "Imported 1 posts" in result.output
+
+    with app.app_context():
+        assert get_db().execute("SELECT body FROM post").fetchone()["body"] == body
+
+
+def test_import_skips_unknown_authors(runner, app, tmp_path):
+    path = tmp_path / "posts.jsonl"
+    path.write_text(
+        "\n".join(
+            json.dumps(row)
+            for row in (
+                {"title": "kept", "body": "b", "author": "other"},
+                {"title": "nobody", "body": "b", "author": "missing"},
+            )
+        )
+    )
+
+    result = runner.invoke(args=["import-posts", str(path)])
+    assert "Imported 1 posts" in result.output
+    assert "Skipped 1 posts" in result.output
+
+    with app.app_context():
+        row = get_db().execute(
+            "SELECT author_id, created FROM post WHERE id = 2"
+        ).fetchone()
+        assert row["author_id"] == 2
+        assert row["created"] is not None
+
+
+def test_import_bad_json(runner, tmp_path):
+    path = tmp_path / "posts.jsonl"
+    path.write_text("{nope\n")
+    result = runner.invoke(args=["import-posts", str(path)])
+    assert result.exit_code != 0
+    assert "Line 1 isn't valid JSON" in result.output
+
+
+def test_import_normalizes_created(runner, app, client, tmp_path):
+    path = tmp_path / "posts.jsonl"
+    path.write_text(
+        "\n".join(
+            json.dumps({"title": title, "body": "b", "author": "test", "created": created})
+            for title, created in (
+                ("iso", "2018-01-01T10:00:00"),
+                ("date", "2018-01-02"),
+                ("bad", "yesterday"),
+            )
+        )
+    )
+
+    result = runner.invoke(args=["import-posts", str(path)])
+    assert "Imported 2 posts" in result.output
+    assert "Skipped 1 posts" in result.output
+
+    with app.app_context():
+        rows = get_db().execute(
+            "SELECT title, CAST(created AS TEXT) FROM post WHERE id > 1 ORDER BY id"
+        ).fetchall()
+
+    assert [tuple(row) for row in rows] == [
+        ("iso", "2018-01-01 10:00:00"),
+        ("date", "2018-01-02 00:00:00"),
+    ]
+    assert client.get("/").status_code == 200
+    assert len(client.get("/api/posts").get_json()["posts"]) == 3
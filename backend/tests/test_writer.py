@@ -0,0 +1,80 @@
+import sqlite3
+import threading
+
+import pytest
+
+from flaskr.db import get_db
+from flaskr.writer import GroupCommitWriter
+
+
+def _insert(db, title):
+    db.execute("INSERT INTO post (title, body, author_id) VALUES (?, '', 1)", (title,))
+    return title
+
+
+def _titles(app):
+    with app.app_context():
+        rows = get_db().execute("SELECT title FROM post ORDER BY id").fetchall()
+        return [row["title"] for row in rows]
+
+
+def test_group_commit(app):
+    writer = GroupCommitWriter(app, max_batch=8, max_delay=0.05)
+    start = threading.Barrier(4)
+    futures = []
+
+    def request(title):
+        start.wait()
+        futures.append(writer.submit(_insert, title))
+
+    threads = [threading.Thread(target=request, args=(str(i),)) for i in range(4)]
+
+    for thread in threads:
+        thread.start()
+
+    for thread in threads:
+        thread.join()
+
+    assert sorted(future.result(5) for future in futures) == ["0", "1", "2", "3"]
+    writer.close()
+    assert sorted(_titles(app)[1:]) == ["0", "1", "2", "3"]
+
+
+def test_failed_write_rolled_back_alone(app):
+    writer = GroupCommitWriter(app, max_delay=0.05)
+
+    def broken(db):
+        _insert(db, "broken")
+        db.execute("INSERT INTO post (id, title, body, author_id) VALUES (1, '', '', 1)")
+
+    first = writer.submit(_insert, "first")
+    failed = writer.submit(broken)
+    last = writer.submit(_insert, "last")
+
+    assert first.result(5) == "first"
+    assert last.result(5) == "last"
+
+    with pytest.raises(sqlite3.IntegrityError):
+        failed.result(5)
+
+    writer.close()
+    assert _titles(app) == ["test title", "first", "last"]
+
+    with pytest.raises(RuntimeError):
+        writer.submit(_insert, "closed")
+
+
+def test_views_use_group_commit(client, auth, app):
+    app.config["DATABASE_GROUP_COMMIT"] = True
+
+    from flaskr import writer
+
+    writer.init_app(app)
+    auth.login()
+    client.post("/create", data={"title": "created", "body": "apple"})
+    client.post("/2/update", data={"title": "updated", "body": "apple"})
+    assert _titles(app) == ["test title", "updated"]
+
+    client.post("/2/delete")
+    assert _titles(app) == ["test title"]
+    app.extensions["coolspace.writer"].close()
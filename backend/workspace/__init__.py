@@ -11,6 +11,88 @@ def create_app(test_config=None):
         SECRET_KEY="dev",
         # store the database in the instance folder
         DATABASE=os.path.join(app.instance_path, "coolspace.sqlite"),
+        # SQLite settings for every connection: write-ahead logging lets
+        # readers and a writer work at once, NORMAL sync is safe with
+        # WAL, a 16 MB page cache (negative sizes are in KiB), 64 MB of
+        # memory mapped I/O and waiting up to 5 s for a lock
+        DATABASE_JOURNAL_MODE="wal",
+        DATABASE_SYNCHRONOUS="normal",
+        DATABASE_CACHE_SIZE=-16000,
+        DATABASE_MMAP_SIZE=64 * 1024 * 1024,
+        DATABASE_BUSY_TIMEOUT=5000,
+        # prepared statements kept by each connection
+        DATABASE_STATEMENT_CACHE=256,
+        # commit concurrent writes from views together, in batches of
+        # up to this many writes gathered for up to this many seconds
+        DATABASE_GROUP_COMMIT=False,
+        DATABASE_GROUP_COMMIT_SIZE=32,
+        DATABASE_GROUP_COMMIT_DELAY=0.002,
+        # spaCy model used by the keyword analysis
+        KEYWORDS_MODEL="en_core_web_sm",
+        # load the keyword model at startup instead of on first use
+        KEYWORDS_WARMUP=False,
+        # key term extraction parameters used for the keyword index
+        KEYWORDS_ALGORITHM="s",
+        KEYWORDS_N_KEY=0.75,
+        KEYWORDS_NGRAMS="1,2,3,4",
+        KEYWORDS_CUTOFF=10,
+        # texts parsed per nlp.pipe call and processes used when
+        # rebuilding the keyword index
+        KEYWORDS_BATCH_SIZE=64,
+        KEYWORDS_WORKERS=1,
+        # extract key terms when a post is written
+        KEYWORDS_INDEX_ON_WRITE=True,
+        # most extraction results memoized by text hash
+        KEYWORDS_MEMO_SIZE=100000,
+        # most distinct terms a live keyword analysis keeps in memory,
+        # None to count every term exactly
+        KEYWORDS_MAX_TERMS=None,
+        # most recent posts read by the fast "f" keyword analysis, so it
+        # answers in well under 100 ms; None to read every post
+        KEYWORDS_FAST_MAX_POSTS=500,
+        # result cache backend, "memory" (per process) or "sqlite"
+        # (shared by the workers on one host), and its size
+        CACHE_BACKEND="memory",
+        CACHE_PATH=os.path.join(app.instance_path, "cache.sqlite"),
+        CACHE_SIZE=256,
+        # background keyword jobs that may run at once, and how many
+        # may wait for a free worker before new ones are refused
+        JOBS_WORKERS=2,
+        JOBS_QUEUE_SIZE=16,
+        # posts shown on each page of the index
+        POSTS_PER_PAGE=20,
+        # posts read per query and inserted per transaction by the
+        # export-posts and import-posts commands
+        TRANSFER_BATCH_SIZE=1000,
+        # rows fetched and sent at a time by streamed API lists
+        API_CHUNK_SIZE=500,
+        # posts whose rendered index articles are cached, and rendered
+        # index pages cached
+        FRAGMENT_CACHE_SIZE=1024,
+        FRAGMENT_PAGE_CACHE_SIZE=256,
+        # endpoints whose pages are rendered and sent as a stream, and
+        # the size in characters of the chunks they are sent in
+        STREAM_VIEWS=("post.index",),
+        STREAM_CHUNK_SIZE=4096,
+        # processes planning /schedule batches (None for one per CPU),
+        # task sets sent to a process at a time, and most seconds spent
+        # planning one task set
+        SCHEDULE_WORKERS=None,
+        SCHEDULE_CHUNK_SIZE=16,
+        SCHEDULE_TIMEOUT=5.0,
+        # logged in users kept in memory, and for how many seconds
+        USER_CACHE_SIZE=1024,
+        USER_CACHE_TTL=60,
+        # werkzeug password hash method and, for pbkdf2, its iteration
+        # count; weaker stored hashes are upgraded on login
+        PASSWORD_HASH_METHOD="pbkdf2:sha256",
+        PASSWORD_HASH_ITERATIONS=260000,
+        # passwords hashed at once, how many may wait before requests
+        # are refused with 503, and whether to hash in processes
+        # instead of threads
+        PASSWORD_HASH_WORKERS=2,
+        PASSWORD_HASH_QUEUE_SIZE=16,
+        PASSWORD_HASH_PROCESSES=False,
     )
 
     if test_config is None:
@@ -35,11 +117,73 @@ def create_app(test_config=None):
 
     db.init_app(app)
 
+    # batch writes from views if group commit is enabled
+    from coolspace import writer
+
+    writer.init_app(app)
+
+    # share loaded NLP models across requests
+    from coolspace import nlp
+
+    nlp.init_app(app)
+
+    # set up the result cache
+    from coolspace import cache
+
+    cache.init_app(app)
+
+    # cache rendered parts of the post index
+    from coolspace import fragments
+
+    fragments.init_app(app)
+
+    # run slow keyword analyses in the background
+    from coolspace import jobs
+
+    jobs.init_app(app)
+
+    # register the keyword index commands
+    from coolspace import keywords
+
+    keywords.init_app(app)
+
+    # register the post import and export commands
+    from coolspace import transfer
+
+    transfer.init_app(app)
+
+    # plan many days at once
+    from coolspace import planning
+
+    planning.init_app(app)
+
+    # register the search index command
+    from coolspace import search
+
+    search.init_app(app)
+
+    # hash passwords on a bounded pool
+    from coolspace import passwords
+
+    passwords.init_app(app)
+
+    # load the logged in user only when a view needs it
+    from coolspace import auth
+
+    auth.init_app(app)
+
     # apply the blueprints to the app
     from coolspace import auth, post
 
     app.register_blueprint(auth.bp)
     app.register_blueprint(post.bp)
+    app.register_blueprint(search.bp)
+
+    from coolspace import api
+
+    app.register_blueprint(api.bp)
+    app.register_blueprint(fragments.bp)
+    app.register_blueprint(planning.bp)
 
     # make url_for('index') == url_for('post.index')
     # in another app, you might define a separate main index here with
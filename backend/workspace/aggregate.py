@@ -0,0 +1,180 @@
+"""
+Mergeable tallies of key terms across many posts.
+
+With no capacity the aggregator is exact and ranks terms exactly like a
+plain dict of counts sorted by count, ties in order of first sighting.
+With a capacity it becomes a Space-Saving sketch: at most ``capacity``
+terms are tracked, a new term replaces the least frequent one and
+inherits its count, and every reported count overestimates the true
+count by at most the stored error. Frequent terms are always kept.
+"""
+import heapq
+
+
+class KeytermAggregator(object):
+    """Count how many posts each key term appears in and remember the
+    best scoring posts for every tracked term.
+
+    :param capacity: most terms to track at once, ``None`` for no limit
+    :param journals: how many of the best scoring posts to keep per term
+    """
+
+    def __init__(self, capacity=None, journals=10):
+        self.capacity = capacity
+        self.journals = journals
+        # term -> [count, error, first seen]
+        self._terms = {}
+        # term -> min-heap of (score, seen, msgid)
+        self._journals = {}
+        # lazy min-heap of (count, first seen, term) to find evictions
+        self._heap = []
+        self._seen = 0
+
+    def __len__(self):
+        return len(self._terms)
+
+    def __contains__(self, term):
+        return term in self._terms
+
+    def _tick(self):
+        self._seen += 1
+        return self._seen
+
+    def _push_journal(self, term, entry):
+        heap = self._journals.setdefault(term, [])
+
+        if len(heap) < self.journals:
+            heapq.heappush(heap, entry)
+        else:
+            # drops the lowest score, the oldest one on a tie
+            heapq.heappushpop(heap, entry)
+
+    def _evict(self):
+        """Drop the least frequent term and return its count."""
+        while True:
+            count, seen, term = heapq.heappop(self._heap)
+            entry = self._terms.get(term)
+
+            # skip heap entries that went stale when the count changed
+            if entry is not None and entry[0] == count and entry[2] == seen:
+                del self._terms[term]
+                self._journals.pop(term, None)
+                return count
+
+    def _compact(self):
+        if len(self._heap) > 4 * self.capacity:
+            self._heap = [(e[0], e[2], t) for t, e in self._terms.items()]
+            heapq.heapify(self._heap)
+
+    def _count(self, term, seen):
+        """Count one more sighting of ``term``, evicting if full."""
+        entry = self._terms.get(term)
+
+        if entry is not None:
+            entry[0] += 1
+        elif self.capacity is not None and len(self._terms) >= self.capacity:
+            # the newcomer may have been among the evicted term's sightings
+            floor = self._evict()
+            entry = self._terms[term] = [floor + 1, floor, seen]
+        else:
+            entry = self._terms[term] = [1, 0, seen]
+
+        if self.capacity is not None:
+            heapq.heappush(self._heap, (entry[0], entry[2], term))
+            self._compact()
+
+    def add(self, msgid, ranks):
+        """Tally the key terms of one post.
+
+        :param msgid: id of the post
+        :param ranks: the post's ``(term, score)`` list
+        """
+        for term, score in ranks:
+            seen = self._tick()
+            self._count(term, seen)
+            self._push_journal(term, (score, seen, msgid))
+
+    def merge(self, other):
+        """Fold another aggregator's tally into this one, as if its
+        posts had been added after this one's.
+
+        :param other: a :class:`KeytermAggregator` with the same settings
+        :return: this aggregator
+        """
+        offset = self._seen
+        # a term a full side doesn't track may still have been seen up
+        # to that side's smallest count, which becomes part of the error
+        self_floor = self._floor()
+        other_floor = other._floor()
+        terms = {}
+
+        for term, (count, error, seen) in self._terms.items():
+            theirs = other._terms.get(term)
+
+            if theirs is not None:
+                terms[term] = [count + theirs[0], error + theirs[1], seen]
+            else:
+                terms[term] = [count + other_floor, error + other_floor, seen]
+
+        for term, (count, error, seen) in other._terms.items():
+            if term not in terms:
+                terms[term] = [count + self_floor, error + self_floor, seen + offset]
+
+        if self.capacity is not None and len(terms) > self.capacity:
+            keep = heapq.nsmallest(
+                self.capacity, terms.items(), key=lambda item: (-item[1][0], item[1][2])
+            )
+            terms = dict(keep)
+
+        journals = {}
+
+        for term in terms:
+            heap = list(self._journals.get(term, ()))
+            heap.extend(
+                (score, seen + offset, msgid)
+                for score, seen, msgid in other._journals.get(term, ())
+            )
+            journals[term] = heapq.nlargest(self.journals, heap)
+            heapq.heapify(journals[term])
+
+        self._terms = terms
+        self._journals = journals
+        self._seen = offset + other._seen
+
+        if self.capacity is not None:
+            self._heap = [(e[0], e[2], t) for t, e in terms.items()]
+            heapq.heapify(self._heap)
+
+        return self
+
+    def _floor(self):
+        """The smallest tracked count once the sketch is full, else 0."""
+        if self.capacity is None or len(self._terms) < self.capacity:
+            return 0
+
+        return min(entry[0] for entry in self._terms.values())
+
+    def count(self, term):
+        """Return the (over)estimated number of posts with ``term``."""
+        entry = self._terms.get(term)
+        return entry[0] if entry is not None else 0
+
+    def error(self, term):
+        """Return how much ``count(term)`` may overestimate by."""
+        entry = self._terms.get(term)
+        return entry[1] if entry is not None else 0
+
+    def top(self, cutoff=10):
+        """Return the ``cutoff`` most common terms with their counts,
+        most common first and ties in order of first sighting.
+        """
+        best = heapq.nsmallest(
+            cutoff, self._terms.items(), key=lambda item: (-item[1][0], item[1][2])
+        )
+        return [(term, entry[0]) for term, entry in best]
+
+    def journals_for(self, term):
+        """Return the best scoring ``(msgid, score)`` pairs for ``term``
+        in the order they were added."""
+        heap = self._journals.get(term, ())
+        return [(msgid, score) for score, seen, msgid in sorted(heap, key=lambda e: e[1])]
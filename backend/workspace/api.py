@@ -0,0 +1,202 @@
+"""
+A JSON API over the posts, for clients that would otherwise scrape the
+HTML pages. Lists are streamed from the database cursor a chunk at a
+time, so a large result is never held in memory, and every response
+carries an ``ETag`` and ``Last-Modified`` so clients can poll cheaply.
+"""
+import hashlib
+import json
+from datetime import timezone
+
+from flask import Blueprint
+from flask import current_app
+from flask import jsonify
+from flask import request
+from flask import stream_with_context
+from werkzeug.exceptions import abort
+
+from coolspace.cache import make_key
+from coolspace.db import get_db
+from coolspace.db import get_post_modified
+from coolspace.db import get_post_version
+from coolspace.db import normalize_time
+
+bp = Blueprint("api", __name__, url_prefix="/api")
+
+# field name -> column selected for it
+FIELDS = {
+    "id": "p.id",
+    "title": "p.title",
+    "body": "p.body",
+    "excerpt": "p.excerpt",
+    "author": "u.username",
+    "author_id": "p.author_id",
+    "created": "p.created",
+}
+
+# fields returned when a request doesn't pick any
+LIST_FIELDS = ("id", "title", "excerpt", "author", "created")
+DETAIL_FIELDS = ("id", "title", "body", "author", "created")
+
+
+def _requested_fields(default):
+    """Read the ``fields`` argument, a comma separated list of field
+    names.
+
+    :raise 400: if a field doesn't exist
+    """
+    value = request.args.get("fields")
+
+    if not value:
+        return list(default)
+
+    names = [name.strip() for name in value.split(",")]
+    unknown = [name for name in names if name not in FIELDS]
+
+    if unknown:
+        abort(400, "Unknown fields: {0}.".format(", ".join(unknown)))
+
+    return names
+
+
+def _time_arg(name):
+    """Read a time argument in the format SQLite stores times in.
+
+    :raise 400: if the time can't be parsed
+    """
+    value = request.args.get(name)
+
+    if value is None:
+        return None
+
+    try:
+        return normalize_time(value)
+    except ValueError:
+        abort(400, "{0} must be a date, or a date and time like 2018-01-31 12:00:00.".format(name))
+
+
+def _select(names):
+    return "SELECT {0} FROM post p JOIN user u ON p.author_id = u.id".format(
+        ", ".join(FIELDS[name] for name in names)
+    )
+
+
+def _to_json(row, names):
+    data = dict(zip(names, row))
+
+    if "created" in data:
+        data["created"] = data["created"].isoformat()
+
+    return data
+
+
+def _validators(db):
+    """Return the ETag and last modified time of a response to this
+    request. Both change whenever a post is written."""
+    key = make_key("api", request.full_path, get_post_version(db))
+    etag = hashlib.sha1(key.encode("utf8")).hexdigest()
+    modified = get_post_modified(db).replace(tzinfo=timezone.utc)
+    return etag, modified
+
+
+def _not_modified(etag, modified):
+    """Whether the client's copy, going by its conditional headers, is
+    current. An ETag match takes precedence over dates."""
+    if request.if_none_match:
+        return etag in request.if_none_match
+
+    since = request.if_modified_since
+
+    if since is not None:
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+
+        return modified <= since
+
+    return False
+
+
+def _conditional(response, etag, modified):
+    response.set_etag(etag)
+    response.last_modified = modified
+    return response
+
+
+@bp.route("/posts")
+def list_posts():
+    """List posts, most recent first, streamed as they're read.
+
+    Arguments: ``fields`` to pick the fields returned, ``author`` to
+    only list one user's posts, ``created_after`` and ``created_before``
+    to limit the creation time.
+    """
+    names = _requested_fields(LIST_FIELDS)
+    author = request.args.get("author")
+    after = _time_arg("created_after")
+    before = _time_arg("created_before")
+    db = get_db(readonly=True)
+    etag, modified = _validators(db)
+
+    if _not_modified(etag, modified):
+        return _conditional(current_app.response_class(status=304), etag, modified)
+
+    conditions = []
+    args = []
+
+    if author is not None:
+        conditions.append("u.username = ?")
+        args.append(author)
+
+    if after is not None:
+        conditions.append("p.created >= ?")
+        args.append(after)
+
+    if before is not None:
+        conditions.append("p.created < ?")
+        args.append(before)
+
+    query = _select(names)
+
+    if conditions:
+        query += " WHERE " + " AND ".join(conditions)
+
+    cursor = db.execute(query + " ORDER BY p.created DESC, p.id DESC", args)
+    chunk_size = current_app.config["API_CHUNK_SIZE"]
+
+    def generate():
+        yield '{"posts": ['
+        separator = ""
+
+        while True:
+            rows = cursor.fetchmany(chunk_size)
+
+            if not rows:
+                break
+
+            yield separator + ", ".join(json.dumps(_to_json(row, names)) for row in rows)
+            separator = ", "
+
+        yield "]}\n"
+
+    response = current_app.response_class(
+        stream_with_context(generate()), mimetype="application/json"
+    )
+    return _conditional(response, etag, modified)
+
+
+@bp.route("/posts/<int:id>")
+def get_post(id):
+    """Return one post. Takes ``fields`` like the list."""
+    names = _requested_fields(DETAIL_FIELDS)
+    db = get_db(readonly=True)
+    etag, modified = _validators(db)
+
+    if _not_modified(etag, modified):
+        return _conditional(current_app.response_class(status=304), etag, modified)
+
+    row = db.execute(_select(names) + " WHERE p.id = ?", (id,)).fetchone()
+
+    if row is None:
+        abort(404, "Post id {0} doesn't exist.".format(id))
+
+    return _conditional(jsonify(_to_json(row, names)), etag, modified)
@@ -1,17 +1,23 @@
 import functools
 
 from flask import Blueprint
+from flask import Flask
+from flask import current_app
 from flask import flash
 from flask import g
+from flask import has_request_context
 from flask import redirect
 from flask import render_template
 from flask import request
 from flask import session
 from flask import url_for
-from werkzeug.security import check_password_hash
-from werkzeug.security import generate_password_hash
+from werkzeug.exceptions import abort
 
+from coolspace.cache import LRUCache
 from coolspace.db import get_db
+from coolspace.passwords import HasherBusy
+from coolspace.passwords import get_hasher
+from coolspace.writer import run_write
 
 bp = Blueprint("auth", __name__, url_prefix="/auth")
 
@@ -29,18 +35,47 @@ def login_required(view):
     return wrapped_view
 
 
-@bp.before_app_request
+class AppGlobals(Flask.app_ctx_globals_class):
+    """The app's ``g``. ``g.user`` is loaded the first time it is read,
+    so requests that never look at the user don't look it up."""
+
+    def __getattr__(self, name):
+        if name != "user":
+            return super(AppGlobals, self).__getattr__(name)
+
+        self.user = load_logged_in_user()
+        return self.user
+
+
 def load_logged_in_user():
-    """If a user id is stored in the session, load the user object from
-    the database into ``g.user``."""
+    """Return the user whose id is stored in the session, or ``None``.
+    Users are cached for ``USER_CACHE_TTL`` seconds, so a change to a
+    user is seen once its cached copy expires.
+    """
+    if not has_request_context():
+        return None
+
     user_id = session.get("user_id")
 
     if user_id is None:
-        g.user = None
-    else:
-        g.user = (
-            get_db().execute("SELECT * FROM user WHERE id = ?", (user_id,)).fetchone()
-        )
+        return None
+
+    cache = current_app.extensions["coolspace.users"]
+    user = cache.get(user_id)
+
+    if user is None:
+        # only what views need, never the password hash
+        row = get_db(readonly=True).execute(
+            "SELECT id, username FROM user WHERE id = ?", (user_id,)
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        user = dict(row)
+        cache.set(user_id, user)
+
+    return user
 
 
 @bp.route("/register", methods=("GET", "POST"))
@@ -67,11 +102,16 @@ def register():
             error = "User {0} is already registered.".format(username)
 
         if error is None:
+            try:
+                pwhash = get_hasher().hash(password)
+            except HasherBusy as e:
+                abort(503, str(e))
+
             # the name is available, store it in the database and go to
             # the login page
             db.execute(
                 "INSERT INTO user (username, password) VALUES (?, ?)",
-                (username, generate_password_hash(password)),
+                (username, pwhash),
             )
             db.commit()
             return redirect(url_for("auth.login"))
@@ -81,6 +121,22 @@ def register():
     return render_template("auth/register.html")
 
 
+def _set_password(db, user_id, pwhash):
+    db.execute("UPDATE user SET password = ? WHERE id = ?", (pwhash, user_id))
+
+
+def _upgrade_password(user_id, password):
+    """Re-hash a password with the current parameters after the user
+    logged in with it. Skipped while the hasher is busy; the next login
+    tries again."""
+    try:
+        pwhash = get_hasher().hash(password)
+    except HasherBusy:
+        return
+
+    run_write(_set_password, user_id, pwhash)
+
+
 @bp.route("/login", methods=("GET", "POST"))
 def login():
     """Log in a registered user by adding the user id to the session."""
@@ -93,12 +149,20 @@ def login():
             "SELECT * FROM user WHERE username = ?", (username,)
         ).fetchone()
 
-        if user is None:
-            error = "Incorrect username."
-        elif not check_password_hash(user["password"], password):
-            error = "Incorrect password."
+        hasher = get_hasher()
+
+        try:
+            if user is None:
+                error = "Incorrect username."
+            elif not hasher.check(user["password"], password):
+                error = "Incorrect password."
+        except HasherBusy as e:
+            abort(503, str(e))
 
         if error is None:
+            if hasher.needs_rehash(user["password"]):
+                _upgrade_password(user["id"], password)
+
             # store the user id in a new session and return to the index
             session.clear()
             session["user_id"] = user["id"]
@@ -114,3 +178,13 @@ def logout():
     """Clear the current session, including the stored user id."""
     session.clear()
     return redirect(url_for("index"))
+
+
+def init_app(app):
+    """Load the logged in user lazily through a cache. This is called by
+    the application factory.
+    """
+    app.app_ctx_globals_class = AppGlobals
+    app.extensions["coolspace.users"] = LRUCache(
+        app.config["USER_CACHE_SIZE"], ttl=app.config["USER_CACHE_TTL"]
+    )
@@ -0,0 +1,185 @@
+"""
+A small result cache for expensive views. Keys should include a version
+of the data they were computed from, so a write only has to bump that
+version and stale entries simply age out.
+
+Two backends are available, picked with ``CACHE_BACKEND``:
+
+``"memory"``
+    An in-process LRU. Fast, but every worker process has its own.
+``"sqlite"``
+    A SQLite file at ``CACHE_PATH`` shared by every worker on the host.
+"""
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+from flask import current_app
+
+
+class LRUCache(object):
+    """A thread-safe in-process cache holding at most ``maxsize``
+    entries, dropping the least recently used one first. With a ``ttl``
+    entries also expire that many seconds after they were set."""
+
+    def __init__(self, maxsize=256, ttl=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        # key -> (value, expiry time or None)
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the value stored for ``key``, or ``None``."""
+        with self._lock:
+            try:
+                value, expires = self._data[key]
+            except KeyError:
+                return None
+
+            if expires is not None and expires <= time.monotonic():
+                del self._data[key]
+                return None
+
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        """Store ``value`` for ``key``."""
+        expires = None if self.ttl is None else time.monotonic() + self.ttl
+
+        with self._lock:
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        """Drop the entry for ``key``, if there is one."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+class SQLiteCache(object):
+    """A cache in a local SQLite file, shared by worker processes.
+    Values are stored as JSON.
+
+    Reads don't take the file's write lock: the file is in WAL mode, and
+    a hit only records that it was used if it was last recorded more
+    than ``touch_interval`` seconds ago, so entries age out by roughly
+    their last use.
+    """
+
+    def __init__(self, path, maxsize=256, touch_interval=60):
+        self.path = path
+        self.maxsize = maxsize
+        # in days, like the julianday() times in the table
+        self._touch_days = touch_interval / 86400.0
+
+        db = self._connect()
+
+        try:
+            # persistent; readers and the writer no longer block each other
+            db.execute("PRAGMA journal_mode = WAL")
+        finally:
+            db.close()
+
+        with self._connect() as db:
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                " key TEXT PRIMARY KEY,"
+                " value TEXT NOT NULL,"
+                " used REAL NOT NULL DEFAULT (julianday('now')))"
+            )
+
+    def _connect(self):
+        db = sqlite3.connect(self.path, timeout=5)
+        # a lost cache write only costs a recomputation, not worth a sync
+        db.execute("PRAGMA synchronous = NORMAL")
+        return db
+
+    def get(self, key):
+        """Return the value stored for ``key``, or ``None``."""
+        db = self._connect()
+
+        try:
+            row = db.execute(
+                "SELECT value, used < julianday('now') - ? FROM cache WHERE key = ?",
+                (self._touch_days, key),
+            ).fetchone()
+
+            if row is None:
+                return None
+
+            if not row[1]:
+                return json.loads(row[0])
+
+            with db:
+                db.execute(
+                    "UPDATE cache SET used = julianday('now') WHERE key = ?", (key,)
+                )
+
+            return json.loads(row[0])
+        finally:
+            db.close()
+
+    def set(self, key, value):
+        """Store ``value`` for ``key``, dropping the least recently used
+        entries beyond ``maxsize``."""
+        db = self._connect()
+
+        try:
+            with db:
+                db.execute(
+                    "INSERT OR REPLACE INTO cache (key, value) VALUES (?, ?)",
+                    (key, json.dumps(value)),
+                )
+                db.execute(
+                    "DELETE FROM cache WHERE key IN (SELECT key FROM cache"
+                    " ORDER BY used DESC LIMIT -1 OFFSET ?)",
+                    (self.maxsize,),
+                )
+        finally:
+            db.close()
+
+    def clear(self):
+        db = self._connect()
+
+        try:
+            with db:
+                db.execute("DELETE FROM cache")
+        finally:
+            db.close()
+
+
+def make_key(*parts):
+    """Build a cache key string from hashable parts."""
+    return "|".join(repr(part) for part in parts)
+
+
+def get_cache():
+    """Return the result cache configured for the current app."""
+    return current_app.extensions["coolspace.cache"]
+
+
+def init_app(app):
+    """Create the result cache configured by ``CACHE_BACKEND``. This is
+    called by the application factory.
+    """
+    backend = app.config["CACHE_BACKEND"]
+
+    if backend == "memory":
+        cache = LRUCache(app.config["CACHE_SIZE"])
+    elif backend == "sqlite":
+        cache = SQLiteCache(app.config["CACHE_PATH"], app.config["CACHE_SIZE"])
+    else:
+        raise ValueError("Unknown CACHE_BACKEND {0!r}.".format(backend))
+
+    app.extensions["coolspace.cache"] = cache
@@ -1,33 +1,219 @@
+import os
 import sqlite3
+import threading
+import weakref
+from datetime import datetime
+from urllib.request import pathname2url
 
 import click
 from flask import current_app
 from flask import g
 from flask.cli import with_appcontext
 
+# times are stored in the first format, the only one the timestamp
+# converter reads back; the others are accepted from users
+TIME_FORMATS = (
+    "%Y-%m-%d %H:%M:%S",
+    "%Y-%m-%d %H:%M:%S.%f",
+    "%Y-%m-%dT%H:%M:%S",
+    "%Y-%m-%dT%H:%M:%S.%f",
+    "%Y-%m-%d",
+)
 
-def get_db():
-    """Connect to the application's configured database. The connection
-    is unique for each request and will be reused if this is called
-    again.
+
+class _ThreadConnections(object):
+    """The connections one thread holds, dropped with the thread."""
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.writer = None
+        self.reader = None
+
+    def close(self, name):
+        conn = getattr(self, name)
+
+        if conn is not None:
+            conn.close()
+            setattr(self, name, None)
+
+
+class ConnectionPool(object):
+    """Persistent connections to one database, a read-write and a
+    read-only one per thread, so requests don't pay for connecting and
+    for the PRAGMAs every time. Connections are checked before being
+    handed out and replaced if they stopped working or were inherited
+    across a fork.
+
+    :param path: the database file
+    :param pragmas: ``(name, value)`` pairs run on every new connection
+    :param cached_statements: prepared statements kept per connection
     """
-    if "db" not in g:
-        g.db = sqlite3.connect(
-            current_app.config["DATABASE"], detect_types=sqlite3.PARSE_DECLTYPES
+
+    def __init__(self, path, pragmas=(), cached_statements=128):
+        self.path = path
+        self.pragmas = list(pragmas)
+        self.cached_statements = cached_statements
+        self._local = threading.local()
+        # every thread's connections, to close them all on shutdown
+        self._threads = weakref.WeakSet()
+
+    def _connect(self, readonly):
+        if readonly:
+            target = "file:{0}?mode=ro".format(pathname2url(self.path))
+        else:
+            target = self.path
+
+        conn = sqlite3.connect(
+            target,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            cached_statements=self.cached_statements,
+            uri=readonly,
+            # only ever used by its own thread, but closed by any
+            check_same_thread=False,
         )
-        g.db.row_factory = sqlite3.Row
+        conn.row_factory = sqlite3.Row
+
+        for name, value in self.pragmas:
+            # the journal mode is a property of the file, set by writers
+            if not (readonly and name == "journal_mode"):
+                conn.execute("PRAGMA {0} = {1}".format(name, value))
+
+        return conn
+
+    @staticmethod
+    def _healthy(conn):
+        try:
+            conn.execute("SELECT 1").fetchone()
+        except sqlite3.Error:
+            return False
+
+        return True
+
+    def connection(self, readonly=False):
+        """Return this thread's connection, opening it if needed."""
+        if self.path == ":memory:":
+            # a second in-memory connection would be another database
+            readonly = False
+
+        held = getattr(self._local, "held", None)
+
+        if held is None or held.pid != os.getpid():
+            # a forked child must not touch its parent's connections
+            held = self._local.held = _ThreadConnections()
+            self._threads.add(held)
+
+        name = "reader" if readonly else "writer"
+        conn = getattr(held, name)
+
+        if conn is not None and not self._healthy(conn):
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+            conn = None
+
+        if conn is None:
+            conn = self._connect(readonly)
+            setattr(held, name, conn)
+
+        return conn
+
+    @staticmethod
+    def release(conn):
+        """Hand a connection back after a request. Work the request
+        didn't commit is rolled back."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.ProgrammingError:
+            # closed during the request, replaced on the next checkout
+            pass
 
-    return g.db
+    def close_thread(self):
+        """Close this thread's connections, for a thread that is done."""
+        held = getattr(self._local, "held", None)
+
+        if held is not None:
+            held.close("reader")
+            held.close("writer")
+
+    def close(self):
+        """Close every thread's connections."""
+        threads = list(self._threads)
+
+        # readers first, so the last to close is a writer, which can
+        # checkpoint and remove the WAL
+        for name in ("reader", "writer"):
+            for held in threads:
+                held.close(name)
+
+
+def get_db(readonly=False):
+    """Get a connection to the application's configured database. The
+    same connection is returned if this is called again during a
+    request, and it stays open for the thread's next request.
+
+    :param readonly: get a connection that can't write, for views that
+        only read. With WAL it doesn't wait for writers.
+    """
+    name = "db_read" if readonly else "db"
+
+    if name not in g:
+        pool = current_app.extensions["coolspace.db"]
+        setattr(g, name, pool.connection(readonly=readonly))
+
+    return getattr(g, name)
 
 
 def close_db(e=None):
-    """If this request connected to the database, close the
-    connection.
+    """If this request used the database, hand its connections back."""
+    for name in ("db", "db_read"):
+        db = g.pop(name, None)
+
+        if db is not None:
+            ConnectionPool.release(db)
+
+
+def close_connections():
+    """Close all the open connections to the database."""
+    current_app.extensions["coolspace.db"].close()
+
+
+def get_post_version(db):
+    """Return the version of the post table. It changes whenever a post
+    is written, so it can be part of the key of anything derived from
+    the posts.
+    """
+    return db.execute("SELECT version FROM post_version").fetchone()[0]
+
+
+def get_post_modified(db):
+    """Return when the post table was last written, in UTC."""
+    return db.execute("SELECT modified FROM post_version").fetchone()[0]
+
+
+def bump_post_version(db):
+    """Mark the post table as changed. The caller commits."""
+    db.execute(
+        "UPDATE post_version SET version = version + 1, modified = CURRENT_TIMESTAMP"
+    )
+
+
+def normalize_time(value):
+    """Return a time in the format times are stored in.
+
+    :param value: a time in one of :data:`TIME_FORMATS`
+    :raise ValueError: if the time can't be parsed
     """
-    db = g.pop("db", None)
+    if isinstance(value, str):
+        for format in TIME_FORMATS:
+            try:
+                return datetime.strptime(value, format).strftime(TIME_FORMATS[0])
+            except ValueError:
+                pass
 
-    if db is not None:
-        db.close()
+    raise ValueError("{0!r} isn't a date, or a date and time.".format(value))
 
 
 def init_db():
@@ -50,5 +236,16 @@ def init_app(app):
     """Register database functions with the Flask app. This is called by
     the application factory.
     """
+    app.extensions["coolspace.db"] = ConnectionPool(
+        app.config["DATABASE"],
+        pragmas=[
+            ("journal_mode", app.config["DATABASE_JOURNAL_MODE"]),
+            ("synchronous", app.config["DATABASE_SYNCHRONOUS"]),
+            ("cache_size", app.config["DATABASE_CACHE_SIZE"]),
+            ("mmap_size", app.config["DATABASE_MMAP_SIZE"]),
+            ("busy_timeout", app.config["DATABASE_BUSY_TIMEOUT"]),
+        ],
+        cached_statements=app.config["DATABASE_STATEMENT_CACHE"],
+    )
     app.teardown_appcontext(close_db)
     app.cli.add_command(init_db_command)
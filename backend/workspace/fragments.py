@@ -0,0 +1,134 @@
+"""
+A cache of rendered HTML fragments for the post index, so pages of
+posts that haven't changed aren't rendered again.
+
+Two levels are cached. Each post's rendered article is kept per post
+and per viewer class: its author, who sees an Edit link, or anyone
+else. It is checked against a digest of the post's row, so an article
+is never served for content it wasn't rendered from. Whole pages are
+kept by cursor, viewer and post table version; any write changes the
+version, and the page is then rebuilt from the cached articles.
+
+Writes that change a post also drop its articles with
+:func:`invalidate_post`. Hit and miss counts are served at
+``/fragments/stats``.
+"""
+import hashlib
+import threading
+
+from flask import Blueprint
+from flask import current_app
+from flask import jsonify
+
+from coolspace.cache import LRUCache
+from coolspace.cache import make_key
+
+bp = Blueprint("fragments", __name__, url_prefix="/fragments")
+
+
+class FragmentCache(object):
+    """Rendered articles and pages, with hit and miss counters.
+
+    :param article_size: most posts whose articles are kept
+    :param page_size: most pages kept
+    """
+
+    def __init__(self, article_size=1024, page_size=256):
+        # post id -> (row digest, {owner: html})
+        self.articles = LRUCache(article_size)
+        self.pages = LRUCache(page_size)
+        self._lock = threading.Lock()
+        self._counts = dict.fromkeys(
+            ("article_hits", "article_misses", "page_hits", "page_misses"), 0
+        )
+
+    def _count(self, name):
+        with self._lock:
+            self._counts[name] += 1
+
+    def page(self, key, render):
+        """Return the page cached for ``key``, or ``render()`` and cache
+        it."""
+        html = self.pages.get(key)
+
+        if html is not None:
+            self._count("page_hits")
+            return html
+
+        self._count("page_misses")
+        html = render()
+        self.pages.set(key, html)
+        return html
+
+    def page_stream(self, key, generate):
+        """Like :meth:`page` for a page rendered as a stream: yield the
+        cached page, or the pieces ``generate()`` yields, caching them
+        once the page is complete."""
+        html = self.pages.get(key)
+
+        if html is not None:
+            self._count("page_hits")
+            yield html
+            return
+
+        self._count("page_misses")
+        pieces = []
+
+        for piece in generate():
+            pieces.append(piece)
+            yield piece
+
+        self.pages.set(key, "".join(pieces))
+
+    def article(self, post, owner, render):
+        """Return the article cached for a post row and viewer class, or
+        ``render()`` and cache it."""
+        digest = hashlib.sha1(make_key(*post).encode("utf8")).hexdigest()
+        entry = self.articles.get(post["id"])
+
+        if entry is not None and entry[0] == digest and owner in entry[1]:
+            self._count("article_hits")
+            return entry[1][owner]
+
+        self._count("article_misses")
+        html = render()
+
+        if entry is None or entry[0] != digest:
+            entry = (digest, {})
+
+        entry[1][owner] = html
+        self.articles.set(post["id"], entry)
+        return html
+
+    def invalidate_post(self, post_id):
+        """Drop the cached articles of a post."""
+        self.articles.delete(post_id)
+
+    def stats(self):
+        with self._lock:
+            return dict(self._counts)
+
+
+def get_fragments():
+    """Return the fragment cache of the current app."""
+    return current_app.extensions["coolspace.fragments"]
+
+
+def invalidate_post(post_id):
+    """Drop the cached articles of a post that was changed or deleted."""
+    get_fragments().invalidate_post(post_id)
+
+
+@bp.route("/stats")
+def stats():
+    """Return the fragment cache's hit and miss counts."""
+    return jsonify(get_fragments().stats())
+
+
+def init_app(app):
+    """Create the app's fragment cache. This is called by the
+    application factory.
+    """
+    app.extensions["coolspace.fragments"] = FragmentCache(
+        app.config["FRAGMENT_CACHE_SIZE"], app.config["FRAGMENT_PAGE_CACHE_SIZE"]
+    )
@@ -0,0 +1,19 @@
+"""
+Helpers for working through large inputs a piece at a time.
+"""
+import itertools
+
+
+def batches(items, size):
+    """Group an iterable into lists of ``size`` items, the last one
+    possibly shorter. The iterable is consumed lazily.
+    """
+    items = iter(items)
+
+    while True:
+        batch = list(itertools.islice(items, size))
+
+        if not batch:
+            return
+
+        yield batch
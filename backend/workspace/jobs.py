@@ -0,0 +1,139 @@
+"""
+Background jobs for work too slow to do inside a request. Jobs run on a
+small thread pool owned by the app; a request only submits a job and
+later polls it, so slow analyses don't hold a WSGI worker.
+"""
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while the queue is full."""
+
+
+class Job(object):
+    """A unit of background work and its progress."""
+
+    def __init__(self, key):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = "queued"
+        self.processed = 0
+        self.total = None
+        self.result = None
+        self.error = None
+        self.created = time.time()
+
+    @property
+    def finished(self):
+        return self.status in ("done", "failed")
+
+    def progress(self, processed, total):
+        """Record how far the job has got."""
+        self.processed = processed
+        self.total = total
+
+    def to_dict(self):
+        data = {
+            "id": self.id,
+            "status": self.status,
+            "progress": {"processed": self.processed, "total": self.total},
+        }
+
+        if self.status == "done":
+            data["result"] = self.result
+        elif self.status == "failed":
+            data["error"] = self.error
+
+        return data
+
+
+class JobManager(object):
+    """Run jobs on a bounded thread pool.
+
+    :param max_workers: jobs that may run at the same time
+    :param max_queued: jobs that may wait for a worker before new ones
+        are refused
+    :param keep: finished jobs remembered for polling
+    """
+
+    def __init__(self, max_workers=2, max_queued=16, keep=256):
+        self.max_workers = max_workers
+        self.max_queued = max_queued
+        self.keep = keep
+        self._executor = ThreadPoolExecutor(max_workers=max_workers)
+        self._lock = threading.Lock()
+        self._jobs = OrderedDict()
+        # unfinished jobs by key, so identical requests share a job
+        self._active = {}
+
+    def submit(self, key, func, *args):
+        """Run ``func(job, *args)`` in the background, unless a job with
+        the same ``key`` is already queued or running.
+
+        :return: the new or already running :class:`Job`
+        :raise JobQueueFull: if too many jobs are waiting
+        """
+        with self._lock:
+            job = self._active.get(key)
+
+            if job is not None:
+                return job
+
+            if len(self._active) >= self.max_workers + self.max_queued:
+                raise JobQueueFull("Too many keyword jobs are waiting.")
+
+            job = Job(key)
+            self._jobs[job.id] = job
+            self._active[key] = job
+            self._prune()
+
+        self._executor.submit(self._run, job, func, args)
+        return job
+
+    def get(self, job_id):
+        """Return the job with ``job_id``, or ``None``."""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def _run(self, job, func, args):
+        job.status = "running"
+
+        try:
+            job.result = func(job, *args)
+            job.status = "done"
+        except Exception as e:
+            job.error = getattr(e, "description", None) or str(e)
+            job.status = "failed"
+        finally:
+            with self._lock:
+                self._active.pop(job.key, None)
+
+    def _prune(self):
+        """Forget the oldest finished jobs beyond ``keep``."""
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished]
+
+        for job_id in finished[: max(0, len(finished) - self.keep)]:
+            del self._jobs[job_id]
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+def get_jobs():
+    """Return the job manager of the current app."""
+    return current_app.extensions["coolspace.jobs"]
+
+
+def init_app(app):
+    """Create the app's job manager. This is called by the application
+    factory.
+    """
+    app.extensions["coolspace.jobs"] = JobManager(
+        max_workers=app.config["JOBS_WORKERS"], max_queued=app.config["JOBS_QUEUE_SIZE"]
+    )
@@ -0,0 +1,550 @@
+"""
+The keyword analysis behind ``/getkeywords``. The NLP stack (spaCy and
+textacy) is an optional dependency installed with the ``nlp`` extra and
+is only imported the first time an analysis runs.
+
+Key terms are extracted once per post when the post is written and
+stored in the ``post_keyterm`` table, tagged with a fingerprint of the
+extraction parameters. ``/getkeywords`` then only has to aggregate that
+table instead of analysing every post on every request. Extraction
+results are also memoized by a hash of the text in ``keyterm_memo``,
+so reposted or unchanged bodies are never analysed twice.
+"""
+import functools
+import hashlib
+import json
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from coolspace import iterutils
+from coolspace import nlp
+from coolspace import tfidf
+from coolspace.aggregate import KeytermAggregator
+from coolspace.db import bump_post_version
+from coolspace.db import get_db
+
+
+# textrank and sgrank rank each post on its own, so their results can
+# be stored per post; the TF-IDF extractor ranks against the whole corpus
+INDEXED_ALGORITHMS = ("s", "t")
+ALGORITHMS = INDEXED_ALGORITHMS + ("f",)
+
+
+def keyword_params(config):
+    """Collect the key term extraction parameters from the app config.
+
+    :param config: the Flask app config
+    :return: keyword arguments for :func:`extract_keyterms`
+    """
+    return {
+        "algorithm": config["KEYWORDS_ALGORITHM"],
+        "n_key_float": config["KEYWORDS_N_KEY"],
+        "n_grams": config["KEYWORDS_NGRAMS"],
+        "model": config["KEYWORDS_MODEL"],
+    }
+
+
+def fingerprint(algorithm="s", n_key_float=0.75, n_grams="1,2,3,4",
+        model="en_core_web_sm"):
+    """Identify a set of extraction parameters. Index rows built with
+    different parameters are never mixed together.
+    """
+    ngrams = ",".join(sorted(set(n_grams.split(",")), key=int))
+    return "{0}:{1!r}:{2}:{3}".format(algorithm, float(n_key_float), ngrams, model)
+
+
+def _rank_doc(textacy, doc, algorithm="s", n_key_float=0.75, n_grams="1,2,3,4"):
+    """Rank the key terms of a parsed document with textrank or sgrank."""
+    curdoc_ranks = []
+    if algorithm == "t":
+        if n_key_float > 0.0 and n_key_float < 1.0:
+            curdoc_ranks = textacy.keyterms.textrank(doc,
+                normalize="lemma", n_keyterms=n_key_float)
+        else:
+            curdoc_ranks = textacy.keyterms.textrank(doc,
+                normalize="lemma", n_keyterms=int(n_key_float))
+    elif algorithm == "s":
+        ngram_str = set(n_grams.split(','))
+        ngram = []
+        for gram in ngram_str:
+            ngram.append(int(gram))
+        curdoc_ranks = textacy.keyterms.sgrank(doc,
+            window_width=1500, ngrams=ngram, normalize="lower",
+            n_keyterms=n_key_float)
+
+    return curdoc_ranks
+
+
+def extract_keyterms(text, algorithm="s", n_key_float=0.75, n_grams="1,2,3,4",
+        model="en_core_web_sm"):
+    """Rank the key terms of a single text.
+
+    :param text: the text to analyse
+    :param algorithm: ``"t"`` for textrank or ``"s"`` for sgrank
+    :param model: name of the spaCy model to analyse the text with
+    :return: list of ``(term, score)`` tuples, best first
+    :raise NLPUnavailableError: if spaCy or textacy isn't installed
+    """
+    # the NLP stack is imported on first use, not when the app starts
+    textacy = nlp.load_textacy()
+    # the model is loaded once per process and shared between requests
+    en = nlp.get_model(model, disable=("parser",))
+    curdoc = textacy.make_spacy_doc(text.lower(), lang=en)
+    return _rank_doc(textacy, curdoc, algorithm, n_key_float, n_grams)
+
+
+def _extract_batch(texts, params):
+    """Rank the key terms of a batch of texts, parsing them with a
+    single ``nlp.pipe`` call. Runs in the pool workers as well.
+    """
+    textacy = nlp.load_textacy()
+    en = nlp.get_model(params["model"], disable=("parser",))
+    docs = en.pipe([text.lower() for text in texts], batch_size=len(texts))
+    return [
+        _rank_doc(textacy, doc, params["algorithm"], params["n_key_float"],
+            params["n_grams"])
+        for doc in docs
+    ]
+
+
+def _load_worker_model(model):
+    """Load the model once when a pool worker starts."""
+    nlp.get_model(model, disable=("parser",))
+
+
+def make_pool(model, workers):
+    """Start a process pool whose workers load ``model`` when they start.
+
+    :raise NLPUnavailableError: if spaCy or textacy isn't installed
+    """
+    # checked here because a worker that can't import the NLP stack only
+    # dies, which breaks the pool instead of reporting what is missing
+    nlp.load_textacy()
+    return ProcessPoolExecutor(max_workers=workers,
+        initializer=_load_worker_model, initargs=(model,))
+
+
+def get_pool():
+    """Return the app's long-lived extraction pool, started on first
+    use, or ``None`` if ``KEYWORDS_WORKERS`` is 1. Its workers keep
+    their model loaded between requests.
+
+    :raise NLPUnavailableError: if spaCy or textacy isn't installed
+    """
+    workers = current_app.config["KEYWORDS_WORKERS"]
+
+    if workers <= 1:
+        return None
+
+    state = current_app.extensions["coolspace.keywords"]
+
+    with state["lock"]:
+        if state["pool"] is None:
+            state["pool"] = make_pool(current_app.config["KEYWORDS_MODEL"], workers)
+
+        return state["pool"]
+
+
+def _map_batches(func, batches, params, workers=1, pool=None):
+    """Call ``func(batch, params)`` for every batch and yield the results
+    in input order. Given a ``pool``, or more than one worker, the
+    batches are spread over a process pool that loads one model per
+    worker, keeping at most two batches per worker in flight so the
+    input is read lazily. Without a ``pool`` one is started for this
+    call only; a given ``pool`` must have ``workers`` processes.
+    """
+    if pool is None and workers <= 1:
+        for batch in batches:
+            yield func(batch, params)
+        return
+
+    if pool is None:
+        with make_pool(params["model"], workers) as pool:
+            for result in _map_batches(func, batches, params, workers, pool):
+                yield result
+        return
+
+    pending = deque()
+
+    for batch in batches:
+        pending.append(pool.submit(func, batch, params))
+
+        if len(pending) >= workers * 2:
+            yield pending.popleft().result()
+
+    while pending:
+        yield pending.popleft().result()
+
+
+def extract_many(texts, params, batch_size=64, workers=1):
+    """Rank the key terms of many texts. Texts are parsed in batches
+    with ``nlp.pipe``, in a process pool when ``workers`` is above 1.
+    Results are yielded in input order, so the outcome is the same as
+    calling :func:`extract_keyterms` on each text in turn.
+
+    :param texts: iterable of texts, consumed lazily
+    :param params: extraction parameters from :func:`keyword_params`
+    :param batch_size: number of texts parsed per ``nlp.pipe`` call
+    :param workers: number of worker processes, 1 to run in-process
+    :return: iterator of ``(term, score)`` lists, one per text
+    :raise NLPUnavailableError: if spaCy or textacy isn't installed
+    """
+    batches = iterutils.batches(texts, batch_size)
+
+    for batch_ranks in _map_batches(_extract_batch, batches, params, workers):
+        for ranks in batch_ranks:
+            yield ranks
+
+
+def _aggregate_batch(batch, params, capacity=None):
+    """Tally a batch of ``(msgid, text)`` pairs into a fresh aggregator."""
+    aggregator = KeytermAggregator(capacity=capacity)
+    msgids = [msgid for msgid, text in batch]
+    texts = [text for msgid, text in batch]
+
+    for msgid, ranks in zip(msgids, _extract_batch(texts, params)):
+        aggregator.add(msgid, ranks)
+
+    return aggregator
+
+
+def clustering_analysis(input=None, algorithm="s", n_key_float=0.75, n_grams="1,2,3,4",
+        cutoff=10, threshold=0.5, model="en_core_web_sm", batch_size=64, workers=1,
+        max_terms=None, progress=None, pool=None):
+    """Rank the key terms of every message and return the ``cutoff``
+    terms shared by the most messages as a comma separated string.
+
+    :param input: list of ``{"message": "<id> <text>"}`` dicts
+    :param algorithm: ``"t"`` for textrank, ``"s"`` for sgrank or
+        ``"f"`` for the fast TF-IDF extractor that needs no parser
+    :param model: name of the spaCy model to analyse the text with
+    :param batch_size: number of messages parsed per ``nlp.pipe`` call
+    :param workers: number of worker processes to extract with
+    :param pool: long-lived process pool of ``workers`` processes to
+        extract with instead of starting one, see :func:`get_pool`
+    :param max_terms: most distinct terms to keep in memory, ``None``
+        to count every term exactly
+    :param progress: called with ``(processed, total)`` as messages
+        are tallied
+    :raise NLPUnavailableError: if the algorithm's dependencies aren't
+        installed
+    """
+    if algorithm not in ALGORITHMS:
+        return("Specify an algorithm! (t)extrank, (s)grank or (f)ast tf-idf")
+
+    msgids = []
+    curlines = []
+    for curline in input:
+        item = curline["message"]
+        msgid = item.split(' ')[0]
+        msgids.append(msgid)
+        curlines.append(item.replace(msgid, '').strip())
+
+    if algorithm == "f":
+        # scores the whole corpus at once, without spaCy
+        terms = tfidf.top_terms(curlines, n_key_float, n_grams, cutoff)
+
+        if progress is not None:
+            progress(len(curlines), len(curlines))
+
+        return ",".join(terms)
+
+    params = {"algorithm": algorithm, "n_key_float": n_key_float,
+        "n_grams": n_grams, "model": model}
+    # the tally of common keywords and the best journals for each
+    aggregator = KeytermAggregator(capacity=max_terms)
+
+    total = len(msgids)
+    processed = 0
+
+    if workers <= 1 and pool is None:
+        for msgid, ranks in zip(msgids, extract_many(curlines, params, batch_size)):
+            aggregator.add(msgid, ranks)
+            processed += 1
+
+            if progress is not None:
+                progress(processed, total)
+    else:
+        # every worker tallies its own batches; merging the partial
+        # tallies in input order ranks ties the same as a serial run
+        partials = _map_batches(
+            functools.partial(_aggregate_batch, capacity=max_terms),
+            iterutils.batches(zip(msgids, curlines), batch_size), params, workers, pool)
+
+        for partial in partials:
+            aggregator.merge(partial)
+            processed = min(processed + batch_size, total)
+
+            if progress is not None:
+                progress(processed, total)
+
+    return ",".join(term for term, count in aggregator.top(cutoff))
+
+
+def _store_keyterms(db, post_id, terms, params):
+    """Replace the index rows of a post with ``terms``."""
+    db.execute("DELETE FROM post_keyterm WHERE post_id = ?", (post_id,))
+    db.executemany(
+        "INSERT INTO post_keyterm (post_id, term, score, fingerprint)"
+        " VALUES (?, ?, ?, ?)",
+        [(post_id, term, score, fingerprint(**params)) for term, score in terms],
+    )
+
+
+def memo_key(text, params):
+    """Hash a text together with the extraction parameters. Texts that
+    only differ in case, line endings or surrounding whitespace share a
+    key, since the extractor doesn't see those differences.
+    """
+    normalized = text.replace("\r\n", "\n").strip().lower()
+    data = "{0}\0{1}".format(fingerprint(**params), normalized)
+    return hashlib.sha1(data.encode("utf8")).hexdigest()
+
+
+def memo_lookup(db, key):
+    """Return the memoized key terms for ``key``, or ``None``, without
+    writing anything."""
+    row = db.execute("SELECT terms FROM keyterm_memo WHERE hash = ?", (key,)).fetchone()
+
+    if row is None:
+        return None
+
+    return [tuple(term) for term in json.loads(row["terms"])]
+
+
+def memo_touch(db, key):
+    """Mark a memo entry as recently used."""
+    db.execute("UPDATE keyterm_memo SET used = julianday('now') WHERE hash = ?", (key,))
+
+
+def memo_get(db, key):
+    """Return the memoized key terms for ``key``, or ``None``."""
+    terms = memo_lookup(db, key)
+
+    if terms is not None:
+        memo_touch(db, key)
+
+    return terms
+
+
+def memo_put(db, key, terms, max_rows=None):
+    """Memoize the key terms extracted for ``key``. Once the memo holds
+    more than ``max_rows`` entries the least recently used are dropped.
+    """
+    cursor = db.execute(
+        "INSERT OR REPLACE INTO keyterm_memo (hash, terms) VALUES (?, ?)",
+        (key, json.dumps(terms)),
+    )
+
+    # pruning scans the memo, so only do it every so many inserts
+    if max_rows is not None and cursor.lastrowid % 128 == 0:
+        prune_memo(db, max_rows)
+
+
+def prune_memo(db, max_rows):
+    """Keep only the ``max_rows`` most recently used memo entries."""
+    db.execute(
+        "DELETE FROM keyterm_memo WHERE hash IN (SELECT hash FROM keyterm_memo"
+        " ORDER BY used DESC LIMIT -1 OFFSET ?)",
+        (max_rows,),
+    )
+
+
+def index_post(db, post_id, body, params, memo_size=None):
+    """Replace the indexed key terms of a post. The caller commits.
+    A body that was analysed before with the same parameters, for this
+    or any other post, is not analysed again.
+
+    :param db: database connection
+    :param post_id: id of the post that was written
+    :param body: the post's new body
+    :param params: extraction parameters from :func:`keyword_params`
+    :param memo_size: most entries to keep in the memo
+    :raise NLPUnavailableError: if spaCy or textacy isn't installed
+    """
+    key = memo_key(body, params)
+    terms = memo_get(db, key)
+
+    if terms is None:
+        terms = extract_keyterms(body, **params)
+        memo_put(db, key, terms, memo_size)
+
+    _store_keyterms(db, post_id, terms, params)
+
+
+def keyterms_for_write(db, body):
+    """Work out the key terms to index for a post body that a write view
+    is about to store. This only reads, so the extraction can run before
+    the write transaction instead of holding it. Workers that don't have
+    the ``nlp`` extra installed skip indexing and leave it to ``flask
+    index-keyterms``.
+
+    :param db: database connection, may be read-only
+    :param body: the post's new body
+    :return: key terms for :func:`index_post_on_write`, or ``None`` if
+        nothing should be indexed
+    """
+    params = keyword_params(current_app.config)
+
+    if (not current_app.config["KEYWORDS_INDEX_ON_WRITE"]
+            or params["algorithm"] not in INDEXED_ALGORITHMS):
+        return None
+
+    key = memo_key(body, params)
+    terms = memo_lookup(db, key)
+    memoized = terms is not None
+
+    if not memoized:
+        try:
+            terms = extract_keyterms(body, **params)
+        except nlp.NLPUnavailableError as e:
+            current_app.logger.warning("Post was not indexed: %s", e)
+            return None
+
+    return params, key, terms, memoized
+
+
+def index_post_on_write(db, post_id, keyterms):
+    """Store key terms from :func:`keyterms_for_write` as the index of a
+    post. The caller commits.
+    """
+    if keyterms is None:
+        return
+
+    params, key, terms, memoized = keyterms
+
+    if memoized:
+        memo_touch(db, key)
+    else:
+        memo_put(db, key, terms, current_app.config["KEYWORDS_MEMO_SIZE"])
+
+    _store_keyterms(db, post_id, terms, params)
+
+
+def unindex_post(db, post_id):
+    """Drop the indexed key terms of a deleted post. The caller commits."""
+    db.execute("DELETE FROM post_keyterm WHERE post_id = ?", (post_id,))
+
+
+def top_keyterms(db, params, cutoff=10):
+    """Return the ``cutoff`` terms found in the most posts, using only
+    index rows built with ``params``.
+    """
+    rows = db.execute(
+        "SELECT term, COUNT(*) AS count FROM post_keyterm"
+        " WHERE fingerprint = ?"
+        " GROUP BY term ORDER BY count DESC, MIN(post_id) LIMIT ?",
+        (fingerprint(**params), cutoff),
+    ).fetchall()
+    return [row["term"] for row in rows]
+
+
+def _iter_posts(db, batch_size):
+    """Yield the id and body of every post in id order, reading the
+    table a batch at a time so writes can be committed in between.
+    """
+    last_id = 0
+
+    while True:
+        posts = db.execute(
+            "SELECT id, body FROM post WHERE id > ? ORDER BY id LIMIT ?",
+            (last_id, batch_size),
+        ).fetchall()
+
+        if not posts:
+            return
+
+        for post in posts:
+            yield post
+
+        last_id = posts[-1]["id"]
+
+
+@click.command("index-keyterms")
+@click.option("--batch-size", type=int, default=None,
+    help="Posts parsed and committed per batch. [default: KEYWORDS_BATCH_SIZE]")
+@click.option("--workers", type=int, default=None,
+    help="Worker processes to extract with. [default: KEYWORDS_WORKERS]")
+@with_appcontext
+def index_keyterms_command(batch_size, workers):
+    """Rebuild the key term index of every post."""
+    db = get_db()
+    params = keyword_params(current_app.config)
+
+    if params["algorithm"] not in INDEXED_ALGORITHMS:
+        raise click.ClickException(
+            "KEYWORDS_ALGORITHM {0!r} can't be indexed per post.".format(
+                params["algorithm"]))
+
+    batch_size = batch_size or current_app.config["KEYWORDS_BATCH_SIZE"]
+    workers = workers or current_app.config["KEYWORDS_WORKERS"]
+    memo_size = current_app.config["KEYWORDS_MEMO_SIZE"]
+    counts = {"indexed": 0, "analysed": 0}
+    # memo keys of the bodies handed to the extractor, in result order
+    pending = deque()
+    # memo key -> ids of the posts waiting for that body's result
+    waiting = {}
+
+    def store(post_id, terms):
+        _store_keyterms(db, post_id, terms, params)
+        counts["indexed"] += 1
+
+        if counts["indexed"] % batch_size == 0:
+            db.commit()
+
+    def bodies():
+        """Yield only the bodies that have never been analysed."""
+        for post in _iter_posts(db, batch_size):
+            key = memo_key(post["body"], params)
+
+            if key in waiting:
+                # a copy of this body is already being analysed
+                waiting[key].append(post["id"])
+                continue
+
+            terms = memo_get(db, key)
+
+            if terms is not None:
+                store(post["id"], terms)
+                continue
+
+            waiting[key] = [post["id"]]
+            pending.append(key)
+            yield post["body"]
+
+    try:
+        for terms in extract_many(bodies(), params, batch_size, workers):
+            key = pending.popleft()
+            memo_put(db, key, terms)
+            counts["analysed"] += 1
+
+            for post_id in waiting.pop(key):
+                store(post_id, terms)
+    except nlp.NLPUnavailableError as e:
+        raise click.ClickException(str(e))
+
+    prune_memo(db, memo_size)
+    # rows built with other parameters or for deleted posts are stale
+    db.execute(
+        "DELETE FROM post_keyterm"
+        " WHERE fingerprint != ? OR post_id NOT IN (SELECT id FROM post)",
+        (fingerprint(**params),),
+    )
+    # results derived from the old index are no longer valid
+    bump_post_version(db)
+    db.commit()
+    click.echo(
+        "Indexed {0} posts, {1} analysed.".format(counts["indexed"], counts["analysed"])
+    )
+
+
+def init_app(app):
+    """Register the key term index commands with the Flask app; the
+    extraction pool for requests starts on first use."""
+    app.extensions["coolspace.keywords"] = {"lock": threading.Lock(), "pool": None}
+    app.cli.add_command(index_keyterms_command)
@@ -0,0 +1,68 @@
+"""
+Process-wide access to the optional NLP stack. spaCy and textacy are
+heavy to import, so nothing here touches them until a caller actually
+needs a model; CRUD-only workers never load them at all.
+"""
+import threading
+
+# loaded spaCy pipelines, keyed by (model name, disabled pipes)
+_models = {}
+_models_lock = threading.Lock()
+
+
+class NLPUnavailableError(RuntimeError):
+    """Raised when the keyword analysis is used but the optional
+    dependencies it needs (the ``nlp`` or ``fast`` extra) aren't
+    installed."""
+
+
+def load_textacy():
+    """Import textacy and its key term extractors on first use.
+
+    :return: the ``textacy`` module
+    :raise NLPUnavailableError: if spaCy or textacy isn't installed
+    """
+    try:
+        import textacy
+        import textacy.keyterms
+    except ImportError as e:
+        raise NLPUnavailableError(
+            "Keyword analysis requires spaCy and textacy. Install them with"
+            " 'pip install coolspace[nlp]'. ({0})".format(e)
+        )
+
+    return textacy
+
+
+def get_model(name="en_core_web_sm", disable=("parser",)):
+    """Return the spaCy pipeline for ``name`` with ``disable`` pipes
+    turned off. Each pipeline is loaded at most once per process and
+    shared by every request that asks for the same configuration.
+
+    :param name: name of the installed spaCy model package
+    :param disable: names of pipeline components to disable
+    :return: the loaded ``spacy.language.Language``
+    :raise NLPUnavailableError: if spaCy or textacy isn't installed
+    """
+    key = (name, tuple(sorted(disable)))
+    model = _models.get(key)
+
+    if model is None:
+        with _models_lock:
+            # another thread may have finished loading while we waited
+            model = _models.get(key)
+
+            if model is None:
+                model = load_textacy().load_spacy_lang(name, disable=key[1])
+                _models[key] = model
+
+    return model
+
+
+def init_app(app):
+    """Register the NLP model configuration with the Flask app. If
+    ``KEYWORDS_WARMUP`` is set the configured model is loaded now so
+    the first request doesn't pay for it.
+    """
+    if app.config["KEYWORDS_WARMUP"]:
+        get_model(app.config["KEYWORDS_MODEL"])
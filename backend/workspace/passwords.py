@@ -0,0 +1,142 @@
+"""
+Password hashing off the request threads' CPU budget. Hashing is slow on
+purpose, so a burst of logins could otherwise keep every worker busy.
+Hashes run on a small bounded pool instead; once it and its queue are
+full, new requests are refused with 503 rather than waiting.
+
+The hash method is configured with ``PASSWORD_HASH_METHOD`` and
+``PASSWORD_HASH_ITERATIONS``. Stored hashes weaker than that are
+upgraded the next time their user logs in.
+"""
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import ThreadPoolExecutor
+
+from flask import current_app
+from werkzeug.security import DEFAULT_PBKDF2_ITERATIONS
+from werkzeug.security import check_password_hash
+from werkzeug.security import generate_password_hash
+
+
+# pbkdf2 hash functions from weakest to strongest
+PBKDF2_DIGESTS = ("md5", "sha1", "sha224", "sha256", "sha384", "sha512")
+
+
+class HasherBusy(Exception):
+    """Raised when a hash is requested while the pool's queue is full."""
+
+
+def _pbkdf2_params(method):
+    """Return the hash function and iteration count of a werkzeug pbkdf2
+    hash method, or ``None`` if the method isn't pbkdf2."""
+    parts = method.split(":")
+
+    if parts[0] != "pbkdf2" or len(parts) not in (2, 3):
+        return None
+
+    if len(parts) == 2:
+        return parts[1], DEFAULT_PBKDF2_ITERATIONS
+
+    try:
+        return parts[1], int(parts[2])
+    except ValueError:
+        return None
+
+
+def _digest_strength(name):
+    """Rank a pbkdf2 hash function, ``-1`` for one that isn't known."""
+    return PBKDF2_DIGESTS.index(name) if name in PBKDF2_DIGESTS else -1
+
+
+class PasswordHasher(object):
+    """Hash and check passwords on a bounded pool.
+
+    :param method: werkzeug hash method, e.g. ``"pbkdf2:sha256:260000"``
+    :param max_workers: hashes computed at the same time
+    :param max_queued: hashes that may wait for a worker before new ones
+        are refused
+    :param processes: use processes instead of threads
+    """
+
+    def __init__(self, method, max_workers=2, max_queued=16, processes=False):
+        self.method = method
+        executor_class = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        self._executor = executor_class(max_workers=max_workers)
+        self._slots = threading.BoundedSemaphore(max_workers + max_queued)
+
+    def _run(self, func, *args):
+        if not self._slots.acquire(blocking=False):
+            raise HasherBusy("Too many password checks are waiting, try again shortly.")
+
+        try:
+            future = self._executor.submit(func, *args)
+        except Exception:
+            self._slots.release()
+            raise
+
+        future.add_done_callback(lambda future: self._slots.release())
+        return future.result()
+
+    def hash(self, password):
+        """Return a salted hash of ``password`` made with ``method``.
+
+        :raise HasherBusy: if the queue is full
+        """
+        return self._run(generate_password_hash, password, self.method)
+
+    def check(self, pwhash, password):
+        """Return whether ``password`` matches the stored ``pwhash``.
+
+        :raise HasherBusy: if the queue is full
+        """
+        return self._run(check_password_hash, pwhash, password)
+
+    def needs_rehash(self, pwhash):
+        """Return whether a stored hash is weaker than ``method`` makes
+        them: a pbkdf2 hash with a weaker hash function or fewer
+        iterations, or a single round or plain one. Stronger hashes are
+        kept as they are.
+        """
+        stored = pwhash.split("$", 1)[0]
+        wanted = _pbkdf2_params(self.method)
+
+        if wanted is None:
+            # not pbkdf2, so there is no strength to compare
+            return stored != self.method
+
+        params = _pbkdf2_params(stored)
+
+        if params is None:
+            return True
+
+        digest, iterations = params
+
+        if digest != wanted[0] and _digest_strength(digest) <= _digest_strength(wanted[0]):
+            return True
+
+        return iterations < wanted[1]
+
+    def shutdown(self, wait=True):
+        self._executor.shutdown(wait=wait)
+
+
+def get_hasher():
+    """Return the password hasher of the current app."""
+    return current_app.extensions["coolspace.passwords"]
+
+
+def init_app(app):
+    """Create the app's password hasher. This is called by the
+    application factory.
+    """
+    method = app.config["PASSWORD_HASH_METHOD"]
+
+    if app.config["PASSWORD_HASH_ITERATIONS"]:
+        method = "{0}:{1}".format(method, app.config["PASSWORD_HASH_ITERATIONS"])
+
+    app.extensions["coolspace.passwords"] = PasswordHasher(
+        method,
+        max_workers=app.config["PASSWORD_HASH_WORKERS"],
+        max_queued=app.config["PASSWORD_HASH_QUEUE_SIZE"],
+        processes=app.config["PASSWORD_HASH_PROCESSES"],
+    )
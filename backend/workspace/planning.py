@@ -0,0 +1,225 @@
+"""
+Planning many users' days at once with
+:func:`coolspace.schedule.iter_schedule`. Task sets are spread over a
+process pool in chunks and the results come back in input order, each
+either ``{"schedule": [...]}`` or ``{"error": "..."}``, so one bad task
+set doesn't fail the rest of the batch.
+
+Each task set is given at most ``SCHEDULE_TIMEOUT`` seconds before it
+is abandoned with an error, so no input can hold a worker for long.
+"""
+import contextlib
+import json
+import os
+import signal
+import threading
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+import click
+from flask import Blueprint
+from flask import current_app
+from flask import jsonify
+from flask import request
+from flask import stream_with_context
+from flask.cli import with_appcontext
+from werkzeug.exceptions import abort
+
+from coolspace import iterutils
+from coolspace.schedule import iter_schedule
+
+bp = Blueprint("planning", __name__)
+
+# request content types that mean one JSON task set per line
+JSONL_MIMETYPES = ("application/x-ndjson", "application/jsonl", "application/x-jsonlines")
+
+
+class PlanningTimeout(Exception):
+    """Raised when planning a task set takes too long."""
+
+
+@contextlib.contextmanager
+def _time_limit(seconds):
+    """Raise :exc:`PlanningTimeout` in the block after ``seconds``. The
+    limit needs ``SIGALRM``, so it only applies in a process's main
+    thread, which is where pool workers run their tasks."""
+    if (not seconds or not hasattr(signal, "setitimer")
+            or threading.current_thread() is not threading.main_thread()):
+        yield
+        return
+
+    def expired(signum, frame):
+        raise PlanningTimeout("Planning took longer than {0} seconds.".format(seconds))
+
+    previous = signal.signal(signal.SIGALRM, expired)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def plan(task_set, timeout=None):
+    """Plan one user's day.
+
+    :param task_set: the ``iter_schedule`` input, a dict with a "Start
+        time" and a list of "Tasks"
+    :param timeout: most seconds to spend on it, or ``None``
+    :return: ``{"schedule": [...]}``, or ``{"error": message}`` if the
+        task set couldn't be planned
+    """
+    if isinstance(task_set, Exception):
+        return {"error": str(task_set)}
+
+    try:
+        with _time_limit(timeout):
+            return {"schedule": list(iter_schedule(task_set))}
+    except Exception as e:
+        return {"error": "{0}: {1}".format(type(e).__name__, e)}
+
+
+def _plan_chunk(task_sets, timeout):
+    return [plan(task_set, timeout) for task_set in task_sets]
+
+
+def plan_many(task_sets, executor=None, workers=1, chunk_size=16, timeout=None):
+    """Plan many days and yield the results in input order.
+
+    :param task_sets: iterable of task sets, consumed lazily; an
+        exception in place of a task set is reported as its error
+    :param executor: process pool to plan on, or ``None`` to plan in
+        this process
+    :param workers: number of processes in ``executor``
+    :param chunk_size: task sets sent to a worker at a time
+    :param timeout: most seconds to spend on each task set
+    """
+    chunks = iterutils.batches(task_sets, chunk_size)
+
+    if executor is None:
+        for chunk in chunks:
+            for result in _plan_chunk(chunk, timeout):
+                yield result
+        return
+
+    # at most two chunks per worker in flight, so the input is read
+    # lazily and results stream out as they're done
+    limit = workers * 2
+    pending = deque()
+
+    for chunk in chunks:
+        pending.append(executor.submit(_plan_chunk, chunk, timeout))
+
+        if len(pending) >= limit:
+            for result in pending.popleft().result():
+                yield result
+
+    while pending:
+        for result in pending.popleft().result():
+            yield result
+
+
+def read_task_sets(lines):
+    """Yield the task set on each non-empty line of JSON lines, or a
+    ``ValueError`` in place of a line that isn't valid JSON."""
+    for number, line in enumerate(lines, 1):
+        if isinstance(line, bytes):
+            line = line.decode("utf8")
+
+        if not line.strip():
+            continue
+
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            yield ValueError("Line {0} isn't valid JSON: {1}".format(number, e))
+
+
+def get_executor():
+    """Return the app's planning process pool, starting it on first use,
+    and its number of workers."""
+    state = current_app.extensions["coolspace.planning"]
+
+    with state["lock"]:
+        if state["executor"] is None:
+            state["workers"] = current_app.config["SCHEDULE_WORKERS"] or os.cpu_count()
+            state["executor"] = ProcessPoolExecutor(max_workers=state["workers"])
+
+        return state["executor"], state["workers"]
+
+
+@bp.route("/schedule", methods=("POST",))
+def schedule():
+    """Plan the days in a JSON list of task sets, or in a stream of JSON
+    lines with one task set per line. A list is answered with
+    ``{"results": [...]}``; JSON lines are answered with a stream of
+    JSON lines, one result per task set, in the same order.
+    """
+    jsonl = request.mimetype in JSONL_MIMETYPES
+
+    if jsonl:
+        task_sets = read_task_sets(request.stream)
+    else:
+        task_sets = request.get_json(silent=True)
+
+        if not isinstance(task_sets, list):
+            abort(400, "Send a JSON list of task sets, or JSON lines.")
+
+    # the pool starts only once there is something to plan
+    executor, workers = get_executor()
+    results = plan_many(
+        task_sets, executor=executor, workers=workers,
+        chunk_size=current_app.config["SCHEDULE_CHUNK_SIZE"],
+        timeout=current_app.config["SCHEDULE_TIMEOUT"],
+    )
+
+    if jsonl:
+        lines = (json.dumps(result) + "\n" for result in results)
+        return current_app.response_class(
+            stream_with_context(lines), mimetype="application/x-ndjson"
+        )
+
+    return jsonify({"results": list(results)})
+
+
+@click.command("schedule-batch")
+@click.argument("input", type=click.File("r"), default="-")
+@click.argument("output", type=click.File("w"), default="-")
+@click.option("--workers", type=int, default=None,
+    help="Worker processes to plan with. [default: SCHEDULE_WORKERS or CPUs]")
+@click.option("--chunk-size", type=int, default=None,
+    help="Task sets sent to a worker at a time. [default: SCHEDULE_CHUNK_SIZE]")
+@with_appcontext
+def schedule_batch_command(input, output, workers, chunk_size):
+    """Plan the task sets in INPUT, JSON lines with one task set per
+    line, and write one result per line to OUTPUT in the same order."""
+    workers = workers or current_app.config["SCHEDULE_WORKERS"] or os.cpu_count()
+    options = {
+        "chunk_size": chunk_size or current_app.config["SCHEDULE_CHUNK_SIZE"],
+        "timeout": current_app.config["SCHEDULE_TIMEOUT"],
+    }
+    counts = {"planned": 0, "failed": 0}
+
+    def write(results):
+        for result in results:
+            counts["failed" if "error" in result else "planned"] += 1
+            output.write(json.dumps(result) + "\n")
+
+    if workers <= 1:
+        write(plan_many(read_task_sets(input), **options))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            write(plan_many(read_task_sets(input), executor=executor, workers=workers,
+                **options))
+
+    click.echo("Planned {planned} days, {failed} failed.".format(**counts), err=True)
+
+
+def init_app(app):
+    """Register the batch planning command with the Flask app; the
+    process pool for requests starts on first use."""
+    app.extensions["coolspace.planning"] = {
+        "lock": threading.Lock(), "executor": None, "workers": None,
+    }
+    app.cli.add_command(schedule_batch_command)
@@ -1,43 +1,153 @@
+import base64
+import hashlib
+import math
+
 from flask import Blueprint
+from flask import current_app
 from flask import flash
 from flask import g
+from flask import jsonify
 from flask import redirect
 from flask import render_template
 from flask import request
 from flask import url_for
+from markupsafe import Markup
 from werkzeug.exceptions import abort
 
 from coolspace.auth import login_required
+from coolspace.cache import get_cache
+from coolspace.cache import make_key
+from coolspace.db import bump_post_version
 from coolspace.db import get_db
+from coolspace.db import get_post_version
+from coolspace.fragments import get_fragments
+from coolspace.fragments import invalidate_post
+from coolspace.jobs import JobQueueFull
+from coolspace.jobs import get_jobs
+from coolspace.keywords import ALGORITHMS
+from coolspace.keywords import INDEXED_ALGORITHMS
+from coolspace.keywords import clustering_analysis
+from coolspace.keywords import fingerprint
+from coolspace.keywords import get_pool
+from coolspace.keywords import index_post_on_write
+from coolspace.keywords import keyterms_for_write
+from coolspace.keywords import keyword_params
+from coolspace.keywords import top_keyterms
+from coolspace.keywords import unindex_post
+from coolspace.nlp import NLPUnavailableError
+from coolspace.streaming import generate_template
+from coolspace.streaming import render
+from coolspace.streaming import streaming
+from coolspace.writer import run_write
 
-# The following import statements are necessary for the clustering algorithm to work.
-from pathlib import Path
-import spacy
-from spacy.util import minibatch, compounding
-import json
-import sys
-import textacy
-import textacy.keyterms
-from collections import defaultdict
-import random
-import os
-import itertools
-# End of import statements for clustering analysis.
+bp = Blueprint("post", __name__)
 
+# most keywords a keyword request may ask for
+MAX_CUTOFF = 1000
 
-bp = Blueprint("post", __name__)
+
+def _encode_cursor(post):
+    """Make the cursor of the page after ``post`` from its sort key."""
+    key = "{0}|{1}".format(post["created"].isoformat(" "), post["id"])
+    return base64.urlsafe_b64encode(key.encode("utf8")).decode("ascii")
+
+
+def _decode_cursor(cursor):
+    """Read back the ``(created, id)`` sort key in a cursor.
+
+    :raise 400: if the cursor is malformed
+    """
+    try:
+        key = base64.urlsafe_b64decode(cursor.encode("ascii")).decode("utf8")
+        created, id = key.split("|")
+        return created, int(id)
+    except (ValueError, UnicodeError):
+        abort(400, "Invalid cursor.")
 
 
 @bp.route("/")
 def index():
-    """Show all the posts, most recent first."""
-    db = get_db()
-    posts = db.execute(
-        "SELECT p.id, title, body, created, author_id, username"
-        " FROM post p JOIN user u ON p.author_id = u.id"
-        " ORDER BY created DESC"
-    ).fetchall()
-    return render_template("post/index.html", posts=posts)
+    """Show a page of posts, most recent first. The ``before`` argument
+    is the cursor returned with the previous page.
+    """
+    db = get_db(readonly=True)
+    posts = _IndexPage(db, request.args.get("before"))
+    viewer = g.user["id"] if g.user else None
+    fragments = get_fragments()
+    key = make_key("index", posts.cursor, viewer, get_post_version(db))
+    context = {
+        "articles": (_render_article(fragments, post, viewer) for post in posts),
+        "posts": posts,
+    }
+
+    if streaming():
+        # articles are read and rendered as the page is sent
+        pieces = fragments.page_stream(
+            key, lambda: generate_template("post/_page.html", **context)
+        )
+        page = (Markup(piece) for piece in pieces)
+    else:
+        page = [
+            Markup(
+                fragments.page(key, lambda: render_template("post/_page.html", **context))
+            )
+        ]
+
+    return render("post/index.html", page=page)
+
+
+def _render_article(fragments, post, viewer):
+    """Render a post's article in the index, or take it from the cache."""
+    owner = post["author_id"] == viewer
+
+    def render():
+        return render_template("post/_article.html", post=post, owner=owner)
+
+    return Markup(fragments.article(post, owner, render))
+
+
+class _IndexPage(object):
+    """The posts on a page of the index, read from the database as they
+    are iterated over. Afterwards ``next_cursor`` is the cursor of the
+    next page, or ``None`` on the last page.
+
+    :param cursor: the cursor returned with the previous page, or
+        ``None`` for the first page
+    :raise 400: if the cursor is malformed
+    """
+
+    def __init__(self, db, cursor):
+        self.db = db
+        self.cursor = cursor
+        self.after = None if cursor is None else _decode_cursor(cursor)
+        self.next_cursor = None
+
+    def __iter__(self):
+        per_page = current_app.config["POSTS_PER_PAGE"]
+        query = (
+            "SELECT p.id, title, excerpt, created, author_id, username"
+            " FROM post p JOIN user u ON p.author_id = u.id"
+        )
+        args = ()
+
+        if self.after is not None:
+            # seek past the previous page on the (created, id) index
+            query += " WHERE (created, p.id) < (?, ?)"
+            args = self.after
+
+        # one extra row tells whether there is a next page
+        rows = self.db.execute(
+            query + " ORDER BY created DESC, p.id DESC LIMIT ?", args + (per_page + 1,)
+        )
+        last = None
+
+        for count, post in enumerate(rows):
+            if count == per_page:
+                self.next_cursor = _encode_cursor(last)
+                break
+
+            last = post
+            yield post
 
 
 def get_post(id, check_author=True):
@@ -52,8 +162,9 @@ def get_post(id, check_author=True):
     :raise 404: if a post with the given id doesn't exist
     :raise 403: if the current user isn't the author
     """
+    # GET views only read, so they can use the read-only connection
     post = (
-        get_db()
+        get_db(readonly=request.method == "GET")
         .execute(
             "SELECT p.id, title, body, created, author_id, username"
             " FROM post p JOIN user u ON p.author_id = u.id"
@@ -72,6 +183,42 @@ def get_post(id, check_author=True):
     return post
 
 
+@bp.route("/<int:id>")
+def detail(id):
+    """Show a post in full."""
+    return render_template("post/detail.html", post=get_post(id, check_author=False))
+
+
+def _insert_post(db, title, body, author_id, keyterms):
+    cursor = db.execute(
+        "INSERT INTO post (title, body, author_id) VALUES (?, ?, ?)",
+        (title, body, author_id),
+    )
+    index_post_on_write(db, cursor.lastrowid, keyterms)
+    bump_post_version(db)
+    return cursor.lastrowid
+
+
+def _update_post(db, id, title, body, keyterms):
+    old = db.execute("SELECT body FROM post WHERE id = ?", (id,)).fetchone()
+    db.execute("UPDATE post SET title = ?, body = ? WHERE id = ?", (title, body, id))
+
+    if keyterms is not None:
+        index_post_on_write(db, id, keyterms)
+    elif old is not None and old["body"] != body:
+        # the old body's key terms no longer apply; flask index-keyterms
+        # indexes the new body
+        unindex_post(db, id)
+
+    bump_post_version(db)
+
+
+def _delete_post(db, id):
+    db.execute("DELETE FROM post WHERE id = ?", (id,))
+    unindex_post(db, id)
+    bump_post_version(db)
+
+
 @bp.route("/create", methods=("GET", "POST"))
 @login_required
 def create():
@@ -87,12 +234,8 @@ def create():
         if error is not None:
             flash(error)
         else:
-            db = get_db()
-            db.execute(
-                "INSERT INTO post (title, body, author_id) VALUES (?, ?, ?)",
-                (title, body, g.user["id"]),
-            )
-            db.commit()
+            keyterms = keyterms_for_write(get_db(readonly=True), body)
+            run_write(_insert_post, title, body, g.user["id"], keyterms)
             return redirect(url_for("post.index"))
 
     return render_template("post/create.html")
@@ -115,11 +258,13 @@ def update(id):
         if error is not None:
             flash(error)
         else:
-            db = get_db()
-            db.execute(
-                "UPDATE post SET title = ?, body = ? WHERE id = ?", (title, body, id)
-            )
-            db.commit()
+            keyterms = None
+
+            if body != post["body"]:
+                keyterms = keyterms_for_write(get_db(readonly=True), body)
+
+            run_write(_update_post, id, title, body, keyterms)
+            invalidate_post(id)
             return redirect(url_for("post.index"))
 
     return render_template("post/update.html", post=post)
@@ -134,90 +279,166 @@ def delete(id):
     author of the post.
     """
     get_post(id)
-    db = get_db()
-    db.execute("DELETE FROM post WHERE id = ?", (id,))
-    db.commit()
+    run_write(_delete_post, id)
+    invalidate_post(id)
     return redirect(url_for("post.index"))
 
 
+def _keyword_request_params():
+    """Read the keyword analysis parameters of a keyword request,
+    defaulting to the configured ones.
+
+    :return: ``(params, cutoff, threshold)``
+    """
+    params = keyword_params(current_app.config)
+    params["algorithm"] = request.values.get("algorithm", params["algorithm"])
+    params["n_key_float"] = request.values.get(
+        "n_key_float", params["n_key_float"], type=float
+    )
+    params["n_grams"] = request.values.get("n_grams", params["n_grams"])
+    cutoff = request.values.get("cutoff", current_app.config["KEYWORDS_CUTOFF"], type=int)
+    threshold = request.values.get("threshold", 0.5, type=float)
+
+    if params["algorithm"] not in ALGORITHMS:
+        abort(400, "Specify an algorithm! (t)extrank, (s)grank or (f)ast tf-idf")
+
+    if not 1 <= cutoff <= MAX_CUTOFF:
+        abort(400, "cutoff must be between 1 and {0}.".format(MAX_CUTOFF))
+
+    if not (math.isfinite(params["n_key_float"]) and params["n_key_float"] > 0):
+        abort(400, "n_key_float must be a positive number.")
+
+    try:
+        sizes = [int(n) for n in params["n_grams"].split(",")]
+    except ValueError:
+        sizes = None
+
+    if not sizes or min(sizes) < 1:
+        abort(400, "n_grams must be a comma separated list of positive integers.")
+
+    return params, cutoff, threshold
+
+
+def _keyword_cache_key(db, params, cutoff, threshold):
+    """Key a keyword result by its parameters and the post version."""
+    return make_key("keywords", fingerprint(**params), cutoff, threshold,
+        get_post_version(db))
+
+
+def _analyse_keywords(db, params, cutoff, threshold, progress=None):
+    """Compute the keyword list. Results for the configured parameters
+    come from the key term index; any other parameters need a full
+    analysis of every post, or of the newest ``KEYWORDS_FAST_MAX_POSTS``
+    for the fast algorithm.
+    """
+    if (params["algorithm"] in INDEXED_ALGORITHMS
+            and fingerprint(**params) == fingerprint(**keyword_params(current_app.config))):
+        return top_keyterms(db, params, cutoff=cutoff)
+
+    limit = None
+
+    if params["algorithm"] not in INDEXED_ALGORITHMS:
+        limit = current_app.config["KEYWORDS_FAST_MAX_POSTS"]
+
+    if limit is None:
+        rows = db.execute("SELECT id, body FROM post").fetchall()
+    else:
+        # the newest posts, oldest first like the full analysis
+        rows = db.execute(
+            "SELECT id, body FROM post ORDER BY id DESC LIMIT ?", (limit,)
+        ).fetchall()[::-1]
+
+    mess = [
+        {"message": "{} {}".format(str(item["id"]), item["body"])}
+        for item in rows
+    ]
+
+    try:
+        clustering_results = clustering_analysis(
+            input=mess, cutoff=cutoff, threshold=threshold,
+            batch_size=current_app.config["KEYWORDS_BATCH_SIZE"],
+            workers=current_app.config["KEYWORDS_WORKERS"],
+            pool=get_pool() if params["algorithm"] in INDEXED_ALGORITHMS else None,
+            max_terms=current_app.config["KEYWORDS_MAX_TERMS"],
+            progress=progress, **params)
+    except NLPUnavailableError as e:
+        abort(503, str(e))
+
+    return clustering_results.split(",") if clustering_results else []
+
+
 @bp.route('/getkeywords', methods=('GET',))
 def get_keywords():
-    mess_sql = get_db().execute("SELECT * FROM post").fetchall()
-    mess = []
-    for item in mess_sql:
-        mess.append({"message": "{} {}".format(str(item[0]), item[4])})
-
-    clustering_results = clustering_analysis(input=mess)
-
-    result1 = clustering_results.split(",")
-    final_json = {"keywords":result1}
-
-    return jsonify(final_json)
-
-
-"""
-    Below are helper functions for the clustering analysis to work.
-"""
-
-def clustering_analysis(input=None, algorithm="s", n_key_float=0.75, n_grams="1,2,3,4",
-        cutoff=10, threshold=0.5):
-    if algorithm != "t" and algorithm != "s":
-        return("Specify an algorithm! (t)extrank or (s)grank")
-
-	alldata = []
-
-	for curline in input:
-		alldata.append(curline["message"])
-
-    # the cummulative tally of common keywords
-    word_keyterm_cummula = defaultdict(lambda: 0)
-    # the mapping of journals to the common keywords
-    word_keyterm_journals = defaultdict(lambda: [])
-
-    en = textacy.load_spacy_lang("en_core_web_sm", disable=("parser",))
-    for item in alldata:
-        msgid = item.split(' ')[0]
-        curline = item.replace(msgid, '').strip()
-        curdoc = textacy.make_spacy_doc(curline.lower(), lang=en)
-        curdoc_ranks = []
-        if algorithm == "t":
-            if n_key_float > 0.0 and n_key_float < 1.0:
-                curdoc_ranks = textacy.keyterms.textrank(curdoc,
-                    normalize="lemma", n_keyterms=n_key_float)
-            else:
-                curdoc_ranks = textacy.keyterms.textrank(curdoc,
-                    normalize="lemma", n_keyterms=n_key)
-        elif algorithm == "s":
-            ngram_str = set(n_grams.split(','))
-            ngram = []
-            for gram in ngram_str:
-                ngram.append(int(gram))
-            curdoc_ranks = textacy.keyterms.sgrank(curdoc,
-                window_width=1500, ngrams=ngram, normalize="lower",
-                n_keyterms=n_key_float)
-
-        for word in curdoc_ranks:
-            word_keyterm_cummula[word[0]] += 1
-            word_keyterm_journals[word[0]].append((msgid, word[1]))
-            if len(word_keyterm_journals[word[0]]) > 10:
-                newlist = []
-                min_tuple = word_keyterm_journals[word[0]][0]
-                for tuple in word_keyterm_journals[word[0]]:
-                    if tuple[1] < min_tuple[1]:
-                        min_tuple = tuple
-                for tuple in word_keyterm_journals[word[0]]:
-                    if tuple[0] != min_tuple[0]:
-                        newlist.append(tuple)
-                word_keyterm_journals[word[0]] = newlist
-
-    word_keyterm_cummula_sorted = sorted(word_keyterm_cummula.items(),
-        key=lambda val: val[1], reverse=True)
-
-    quint = 0
-    quint_printout = ""
-    for entry in word_keyterm_cummula_sorted[:cutoff]:
-        quint_printout += entry[0] + ","
-        quint += 1
-    quint_printout = quint_printout[:-1]
-    #print(quint_printout)
-    return quint_printout
+    """Return the key terms shared by the most posts.
+
+    Results are cached per set of parameters and version of the post
+    table, and carry an ETag so pollers that already have the current
+    result get an empty 304 response.
+    """
+    params, cutoff, threshold = _keyword_request_params()
+    db = get_db(readonly=True)
+    key = _keyword_cache_key(db, params, cutoff, threshold)
+    etag = hashlib.sha1(key.encode("utf8")).hexdigest()
+
+    if etag in request.if_none_match:
+        response = current_app.response_class(status=304)
+        response.set_etag(etag)
+        return response
+
+    cache = get_cache()
+    keywords = cache.get(key)
+
+    if keywords is None:
+        keywords = _analyse_keywords(db, params, cutoff, threshold)
+        cache.set(key, keywords)
+
+    response = jsonify({"keywords": keywords})
+    response.set_etag(etag)
+    return response
+
+
+def _run_keyword_job(job, app, key, params, cutoff, threshold):
+    """Compute a keyword result in the background and cache it."""
+    with app.app_context():
+        cache = get_cache()
+        keywords = cache.get(key)
+
+        if keywords is None:
+            keywords = _analyse_keywords(get_db(readonly=True), params, cutoff, threshold,
+                progress=job.progress)
+            cache.set(key, keywords)
+
+    return {"keywords": keywords}
+
+
+@bp.route('/getkeywords/jobs', methods=('POST',))
+def submit_keywords_job():
+    """Start computing keywords in the background and return the job to
+    poll. Takes the same parameters as ``/getkeywords``; a request for a
+    result that is already being computed joins the running job.
+    """
+    params, cutoff, threshold = _keyword_request_params()
+    key = _keyword_cache_key(get_db(readonly=True), params, cutoff, threshold)
+
+    try:
+        job = get_jobs().submit(key, _run_keyword_job,
+            current_app._get_current_object(), key, params, cutoff, threshold)
+    except JobQueueFull as e:
+        abort(503, str(e))
+
+    response = jsonify(job.to_dict())
+    response.status_code = 202
+    response.headers["Location"] = url_for("post.get_keywords_job", job_id=job.id)
+    return response
+
+
+@bp.route('/getkeywords/jobs/<job_id>', methods=('GET',))
+def get_keywords_job(job_id):
+    """Return the status and progress of a keyword job, and its result
+    once it is done."""
+    job = get_jobs().get(job_id)
+
+    if job is None:
+        abort(404, "Job {0} doesn't exist.".format(job_id))
+
+    return jsonify(job.to_dict())
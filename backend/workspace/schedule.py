@@ -1,5 +1,5 @@
-import copy
 import json
+import logging
 
 """
 	The schedule planner takes in a JSON that contains the user's work 'Start
@@ -30,17 +30,114 @@ import json
 	jsonified.
 """
 
+logger = logging.getLogger(__name__)
+
+# No break is taken before or after these
+MEALS = ("Lunch", "Dinner")
+
+
+class _Slot:
+	"""A planned bloc of a task, or a meal break, in minutes from the start."""
+
+	__slots__ = ("name", "length", "start")
+
+	def __init__(self, name, length, start):
+		self.name = name
+		self.length = length
+		self.start = start
+
+
+def _add_blocs(slots, name, length, divisor, start):
+	"""
+		Split length into divisor equal blocs planned from start with a 15
+		minute break after each, and return the time after the last break.
+	"""
+	length = int(length / divisor)
+	for k in range(divisor):
+		slots.append(_Slot(name, length, start))
+		start += length + 15
+	return start
+
+
+def _clock(hour, minute):
+	if minute < 10:
+		return "{0}:0{1}".format(hour, minute)
+	return "{0}:{1}".format(hour, minute)
+
+
+class _FillerIndex:
+	"""
+		Unassigned tasks in order of importance, kept as a segment tree of
+		the shortest task length in every range, so the most important task
+		that fits in a gap is found in logarithmic time instead of by
+		scanning the rest of the task list.
+	"""
+
+	def __init__(self, lengths):
+		size = 1
+		while size < len(lengths):
+			size *= 2
+		self.size = size
+		self.tree = [float("inf")] * (2 * size)
+		self.tree[size:size + len(lengths)] = lengths
+		for k in range(size - 1, 0, -1):
+			self.tree[k] = min(self.tree[2 * k], self.tree[2 * k + 1])
+
+	def remove(self, index):
+		"""Mark the task at index as assigned."""
+		k = index + self.size
+		self.tree[k] = float("inf")
+		k //= 2
+		while k:
+			self.tree[k] = min(self.tree[2 * k], self.tree[2 * k + 1])
+			k //= 2
+
+	def first_shorter(self, start, limit):
+		"""
+			Return the index of the first unassigned task at or after start
+			that is shorter than limit, or None if no task fits.
+		"""
+		return self._find(1, 0, self.size, start, limit)
+
+	def _find(self, node, lo, hi, start, limit):
+		if hi <= start or not self.tree[node] < limit:
+			return None
+		if hi - lo == 1:
+			return lo
+		mid = (lo + hi) // 2
+		found = self._find(2 * node, lo, mid, start, limit)
+		if found is None:
+			found = self._find(2 * node + 1, mid, hi, start, limit)
+		return found
+
 def get_schedule(schedule_json):
-	#json_data=[]
+	"""
+		Plan a day from a file object containing the user's input in JSON.
+		See iter_schedule.
+	"""
+	return list(iter_schedule(json.load(schedule_json)))
+
+def iter_schedule(schedule_data):
+	"""
+		Plan a day and yield its slots one at a time, in the format
+		get_schedule returns them. Every slot is logged at debug level.
 
-	#f = request.get_json()
-	f = json.load(schedule_json)
+		:param schedule_data: the user's input, parsed already or as a JSON
+		str or bytes
+	"""
+	if isinstance(schedule_data, (str, bytes, bytearray)):
+		schedule_data = json.loads(schedule_data)
+	f = schedule_data
 	start = f["Start time"].split(":") # [Hour, minute]
 	tasks = f["Tasks"]
 
 	for i in range(2):
 		start[i] = int(start[i])
 
+	if not tasks:
+		# Nothing to plan, and no slots to polish.
+		return
+
 	"""Greedy Algorithm based lazy scheduler: Simply assign tasks in order of
 	importance, with these rules:
 	1. First meal break is always 3 hrs after start time. Margin of
@@ -54,19 +151,11 @@ def get_schedule(schedule_json):
 	5. 15 minute mandatory breaks between any blocs.
 	"""
 
-	modified_tasklist = []
-	for item in tasks:
-		new_taskitem = copy.deepcopy(item)
-		if item["Length"] >= 120:
-			divisors = []
-			divisor = 1
-			while item["Length"] / divisor >= 60:
-				divisors.append(divisor)
-				divisor += 1
-			new_taskitem["divisors"] = divisors
-		else:
-			new_taskitem["divisors"] = [1]
-		modified_tasklist.append(new_taskitem)
+	# Tasks are read from the input as they are and referred to by index,
+	# gaps are filled with the most important unassigned task that fits,
+	# and only the slots they're planned into are new records.
+	assigned = [False] * len(tasks)
+	fillers = _FillerIndex([item["Length"] for item in tasks])
 
 	slots = []
 	last_time = 0
@@ -75,9 +164,9 @@ def get_schedule(schedule_json):
 	lunchtime = 0
 	dinnertime = 0
 
-	for i in range(len(modified_tasklist)):
-		item = modified_tasklist[i]
-		if "Assigned" in item.keys():
+	for i in range(len(tasks)):
+		item = tasks[i]
+		if assigned[i]:
 			continue
 		if not Lunch_assigned:
 			# Morning schedule scenario
@@ -86,27 +175,17 @@ def get_schedule(schedule_json):
 				# slot restriction.
 				if item["Length"] < 120:
 					# Task length is less than 2 hours = go ahead assign it.
-					bloc = copy.deepcopy(item)
-					bloc["Start"] = last_time
-					slots.append(bloc)
-					last_time += (bloc["Length"] + 15) # 15 min break.
-					item["Assigned"] = "Yes"
+					slots.append(_Slot(item["Task"], item["Length"], last_time))
+					last_time += (item["Length"] + 15) # 15 min break.
+					assigned[i] = True
 				else: # item["Length"] < 180:
 					# Task length is between 2 to 3 hours = split, then assign.
 
 					# This is an edge case: Ideally the task would be
 					# split into two blocs with a 15 minute break
 					# in between them.
-					di_bloc = copy.deepcopy(item)
-					di_bloc["Length"] = int(item["Length"] / 2)
-					di_bloc["Start"] = last_time
-					slots.append(di_bloc)
-					last_time += (di_bloc["Length"] + 15)
-					di_bloc2 = copy.deepcopy(di_bloc)
-					di_bloc2["Start"] = last_time
-					slots.append(di_bloc2)
-					last_time += (di_bloc2["Length"] + 15)
-					item["Assigned"] = "Yes"
+					last_time = _add_blocs(slots, item["Task"], item["Length"], 2, last_time)
+					assigned[i] = True
 			else:
 				# Task length goes over the remaining time slots in the
 				# morning hours.
@@ -119,16 +198,11 @@ def get_schedule(schedule_json):
 					if remainder > 60 and remainder < 120:
 						# Remainder of time is greater than 60 but less than 120 =
 						# split, then deal with the rest later.
-						di_bloc = copy.deepcopy(item)
-						remainder_block = copy.deepcopy(item)
-						di_bloc["Length"] = 60
-						remainder_block["Length"] = item["Length"] - 60
-						di_bloc["Start"] = last_time
-						slots.append(di_bloc)
-						last_time += (di_bloc["Length"])
-
-						lunch = {"Task": "Lunch", "Length": 60, "Start": last_time}
-						slots.append(lunch)
+						remainder_length = item["Length"] - 60
+						slots.append(_Slot(item["Task"], 60, last_time))
+						last_time += 60
+
+						slots.append(_Slot("Lunch", 60, last_time))
 						lunchtime = last_time
 						last_time += 60 # 60 minute lunch break
 						Lunch_assigned = True
@@ -141,17 +215,11 @@ def get_schedule(schedule_json):
 						# length of task, divisor may be 2 or 3.
 
 						divisor = 1
-						while remainder_block["Length"] / divisor > 120:
+						while remainder_length / divisor > 120:
 							divisor += 1
 
-						miniblocs = []
-						for k in range(divisor):
-							miniblocs.append(copy.deepcopy(remainder_block))
-							miniblocs[k]["Length"] = int(remainder_block["Length"] / divisor)
-							miniblocs[k]["Start"] = last_time
-							slots.append(miniblocs[k])
-							last_time += (miniblocs[k]["Length"] + 15)
-						item["Assigned"] = "Yes"
+						last_time = _add_blocs(slots, item["Task"], remainder_length, divisor, last_time)
+						assigned[i] = True
 
 					elif remainder >= 120:
 						# Remainder of the time is greater than 2 hours =
@@ -169,18 +237,18 @@ def get_schedule(schedule_json):
 						while remainder not in range(-30, 60) and not target_not_found:
 							assign_this = None
 
-							for j in range(i + 1, len(modified_tasklist)):
-								if modified_tasklist[j]["Length"] < remainder and "Assigned" not in modified_tasklist[j]:
-									assign_this = modified_tasklist[j]
-									assign_this["Assigned"] = "Yes"
-									break
+							j = None
+							if i + 1 < len(tasks):
+								j = fillers.first_shorter(i + 1, remainder)
+							if j is not None:
+								assign_this = tasks[j]
+								assigned[j] = True
+								fillers.remove(j)
 
 							if assign_this is not None:
-								bloc = copy.deepcopy(assign_this)
-								bloc["Start"] = last_time
-								slots.append(bloc)
-								last_time += (bloc["Length"] + 15)
-								remainder -= (bloc["Length"] + 15)
+								slots.append(_Slot(assign_this["Task"], assign_this["Length"], last_time))
+								last_time += (assign_this["Length"] + 15)
+								remainder -= (assign_this["Length"] + 15)
 							else:
 								target_not_found = True
 
@@ -190,10 +258,7 @@ def get_schedule(schedule_json):
 							# task into smaller pieces so that they fit into
 							# the gap as much as they can.
 
-							di_bloc = copy.deepcopy(item)
-							remainder_block = copy.deepcopy(item)
-							di_bloc["Length"] = remainder
-							remainder_block["Length"] = item["Length"] - remainder
+							remainder_length = item["Length"] - remainder
 
 							# This is done by reverse-dividing the remaining
 							# time in a similar fashion as done to blocks of
@@ -202,39 +267,25 @@ def get_schedule(schedule_json):
 							while remainder / divisor > 120:
 								divisor += 1
 
-							miniblocs = []
-							for k in range(divisor):
-								miniblocs.append(copy.deepcopy(di_bloc))
-								miniblocs[k]["Length"] = int(remainder / divisor)
-								miniblocs[k]["Start"] = last_time
-								slots.append(miniblocs[k])
-								last_time += (miniblocs[k]["Length"] + 15)
+							last_time = _add_blocs(slots, item["Task"], remainder, divisor, last_time)
 
 							last_time -= 15
-							lunch = {"Task": "Lunch", "Length": 60, "Start": last_time}
-							slots.append(lunch)
+							slots.append(_Slot("Lunch", 60, last_time))
 							lunchtime = last_time
 							last_time += 60 # 60 minute lunch break
 							Lunch_assigned = True
 
 							divisor = 1
-							while remainder_block["Length"] / divisor > 120:
+							while remainder_length / divisor > 120:
 								divisor += 1
 
-							miniblocs = []
-							for k in range(divisor):
-								miniblocs.append(copy.deepcopy(remainder_block))
-								miniblocs[k]["Length"] = int(remainder_block["Length"] / divisor)
-								miniblocs[k]["Start"] = last_time
-								slots.append(miniblocs[k])
-								last_time += (miniblocs[k]["Length"] + 15)
-							item["Assigned"] = "Yes"
+							last_time = _add_blocs(slots, item["Task"], remainder_length, divisor, last_time)
+							assigned[i] = True
 						else:
 							# Gap has been filled with tasks. Now assign lunch
 							# and then assign the current task we're looking at.
 							last_time -= 15 # no need for break between task and lunch
-							lunch = {"Task": "Lunch", "Length": 60, "Start": last_time}
-							slots.append(lunch)
+							slots.append(_Slot("Lunch", 60, last_time))
 							lunchtime = last_time
 							last_time += 60 # 60 minute lunch break
 							Lunch_assigned = True
@@ -249,14 +300,8 @@ def get_schedule(schedule_json):
 							while item["Length"] / divisor > 120:
 								divisor += 1
 
-							miniblocs = []
-							for k in range(divisor):
-								miniblocs.append(copy.deepcopy(item))
-								miniblocs[k]["Length"] = int(item["Length"] / divisor)
-								miniblocs[k]["Start"] = last_time
-								slots.append(miniblocs[k])
-								last_time += (miniblocs[k]["Length"] + 15)
-							item["Assigned"] = "Yes"
+							last_time = _add_blocs(slots, item["Task"], item["Length"], divisor, last_time)
+							assigned[i] = True
 
 					else:
 						# Remainder of time is less than 60 = look for
@@ -264,23 +309,22 @@ def get_schedule(schedule_json):
 						# assign the current task immediately after lunch.
 						assign_this = None
 
-						for j in range(i + 1, len(modified_tasklist)):
-							if modified_tasklist[j]["Length"] < remainder and "Assigned" not in modified_tasklist[j]:
-								assign_this = modified_tasklist[j]
-								assign_this["Assigned"] = "Yes"
-								break
+						j = None
+						if i + 1 < len(tasks):
+							j = fillers.first_shorter(i + 1, remainder)
+						if j is not None:
+							assign_this = tasks[j]
+							assigned[j] = True
+							fillers.remove(j)
 
 						if assign_this is not None:
-							bloc = copy.deepcopy(assign_this)
-							bloc["Start"] = last_time
-							slots.append(bloc)
-							last_time += (bloc["Length"] + 15)
+							slots.append(_Slot(assign_this["Task"], assign_this["Length"], last_time))
+							last_time += (assign_this["Length"] + 15)
 
 						# If none of the tasks can be assigned, then we
 						# simply go through with a lunch break assignment.
 						last_time -= 15 # no need for break between task and lunch
-						lunch = {"Task": "Lunch", "Length": 60, "Start": last_time}
-						slots.append(lunch)
+						slots.append(_Slot("Lunch", 60, last_time))
 						lunchtime = last_time
 						last_time += 60 # 60 minute lunch break
 						Lunch_assigned = True
@@ -296,14 +340,8 @@ def get_schedule(schedule_json):
 						while item["Length"] / divisor > 120:
 							divisor += 1
 
-						miniblocs = []
-						for k in range(divisor):
-							miniblocs.append(copy.deepcopy(item))
-							miniblocs[k]["Length"] = int(item["Length"] / divisor)
-							miniblocs[k]["Start"] = last_time
-							slots.append(miniblocs[k])
-							last_time += (miniblocs[k]["Length"] + 15)
-						item["Assigned"] = "Yes"
+						last_time = _add_blocs(slots, item["Task"], item["Length"], divisor, last_time)
+						assigned[i] = True
 
 				else:
 					# Task length is less than 2 hours = look for
@@ -311,23 +349,22 @@ def get_schedule(schedule_json):
 					# assign the current task immediately after lunch.
 					assign_this = None
 
-					for j in range(i + 1, len(modified_tasklist)):
-						if modified_tasklist[j]["Length"] < remainder and "Assigned" not in modified_tasklist[j]:
-							assign_this = modified_tasklist[j]
-							assign_this["Assigned"] = "Yes"
-							break
+					j = None
+					if i + 1 < len(tasks):
+						j = fillers.first_shorter(i + 1, remainder)
+					if j is not None:
+						assign_this = tasks[j]
+						assigned[j] = True
+						fillers.remove(j)
 
 					if assign_this is not None:
-						bloc = copy.deepcopy(assign_this)
-						bloc["Start"] = last_time
-						slots.append(bloc)
-						last_time += (bloc["Length"] + 15)
+						slots.append(_Slot(assign_this["Task"], assign_this["Length"], last_time))
+						last_time += (assign_this["Length"] + 15)
 
 					# If none of the tasks can be assigned, then we
 					# simply go through with a lunch break assignment.
 					last_time -= 15 # no need for break between task and lunch
-					lunch = {"Task": "Lunch", "Length": 60, "Start": last_time}
-					slots.append(lunch)
+					slots.append(_Slot("Lunch", 60, last_time))
 					lunchtime = last_time
 					last_time += 60 # 60 minute lunch break
 					Lunch_assigned = True
@@ -335,19 +372,16 @@ def get_schedule(schedule_json):
 					# Now we have to assign the current task we
 					# are looking at. Since it is less than 2 hours,
 					# we can simply go ahead and assign it immediately.
-					bloc = copy.deepcopy(item)
-					bloc["Start"] = last_time
-					slots.append(bloc)
-					last_time += (bloc["Length"] + 15) # 15 min break.
-					item["Assigned"] = "Yes"
+					slots.append(_Slot(item["Task"], item["Length"], last_time))
+					last_time += (item["Length"] + 15) # 15 min break.
+					assigned[i] = True
 
 			if not Lunch_assigned and last_time in range(165, 226):
 				# Sum of all tasks assigned so far since beginning is
 				# roughly around 3 hours and task assigned just now
 				# didn't overshoot the 3 hour slot time.
 				last_time -= 15 # no need for break between task and lunch
-				lunch = {"Task": "Lunch", "Length": 60, "Start": last_time}
-				slots.append(lunch)
+				slots.append(_Slot("Lunch", 60, last_time))
 				lunchtime = last_time
 				last_time += 60 # 60 minute lunch break
 				Lunch_assigned = True
@@ -360,11 +394,9 @@ def get_schedule(schedule_json):
 				# slot restriction.
 				if item["Length"] < 120:
 					# Task length is less than 2 hours = go ahead assign it.
-					bloc = copy.deepcopy(item)
-					bloc["Start"] = last_time
-					slots.append(bloc)
-					last_time += (bloc["Length"] + 15) # 15 min break.
-					item["Assigned"] = "Yes"
+					slots.append(_Slot(item["Task"], item["Length"], last_time))
+					last_time += (item["Length"] + 15) # 15 min break.
+					assigned[i] = True
 				else: # item["Length"] < 360:
 					# Task length is between 2 to 6 hours = split, then assign.
 
@@ -376,14 +408,8 @@ def get_schedule(schedule_json):
 					while item["Length"] / divisor > 120:
 						divisor += 1
 
-					miniblocs = []
-					for j in range(divisor):
-						miniblocs.append(copy.deepcopy(item))
-						miniblocs[j]["Length"] = int(item["Length"] / divisor)
-						miniblocs[j]["Start"] = last_time
-						slots.append(miniblocs[j])
-						last_time += (miniblocs[j]["Length"] + 15)
-					item["Assigned"] = "Yes"
+					last_time = _add_blocs(slots, item["Task"], item["Length"], divisor, last_time)
+					assigned[i] = True
 			else:
 				# Task length goes over the remaining time slots in the
 				# afternoon hours.
@@ -397,16 +423,11 @@ def get_schedule(schedule_json):
 						# Remainder of time is greater than 60 but
 						# less than 120 = split,
 						# then deal with the rest later.
-						di_bloc = copy.deepcopy(item)
-						remainder_block = copy.deepcopy(item)
-						di_bloc["Length"] = 60
-						remainder_block["Length"] = item["Length"] - 60
-						di_bloc["Start"] = last_time
-						slots.append(di_bloc)
-						last_time += (di_bloc["Length"])
-
-						dinner = {"Task": "Dinner", "Length": 60, "Start": last_time}
-						slots.append(dinner)
+						remainder_length = item["Length"] - 60
+						slots.append(_Slot(item["Task"], 60, last_time))
+						last_time += 60
+
+						slots.append(_Slot("Dinner", 60, last_time))
 						dinnertime = last_time
 						last_time += 60 # 60 minute lunch break
 						Dinner_assigned = True
@@ -419,17 +440,11 @@ def get_schedule(schedule_json):
 						# length of task, divisor may be 2 or 3.
 
 						divisor = 1
-						while remainder_block["Length"] / divisor > 120:
+						while remainder_length / divisor > 120:
 							divisor += 1
 
-						miniblocs = []
-						for k in range(divisor):
-							miniblocs.append(copy.deepcopy(remainder_block))
-							miniblocs[k]["Length"] = int(remainder_block["Length"] / divisor)
-							miniblocs[k]["Start"] = last_time
-							slots.append(miniblocs[k])
-							last_time += (miniblocs[k]["Length"] + 15)
-						item["Assigned"] = "Yes"
+						last_time = _add_blocs(slots, item["Task"], remainder_length, divisor, last_time)
+						assigned[i] = True
 					elif remainder >= 120:
 						# Remainder of the time is greater than 2 hours =
 						# 1. Find enough smaller tasks that can fit into
@@ -446,18 +461,18 @@ def get_schedule(schedule_json):
 						while remainder not in range(-30, 60) and not target_not_found:
 							assign_this = None
 
-							for j in range(i + 1, len(modified_tasklist)):
-								if modified_tasklist[j]["Length"] < remainder and "Assigned" not in modified_tasklist[j]:
-									assign_this = modified_tasklist[j]
-									assign_this["Assigned"] = "Yes"
-									break
+							j = None
+							if i + 1 < len(tasks):
+								j = fillers.first_shorter(i + 1, remainder)
+							if j is not None:
+								assign_this = tasks[j]
+								assigned[j] = True
+								fillers.remove(j)
 
 							if assign_this is not None:
-								bloc = copy.deepcopy(assign_this)
-								bloc["Start"] = last_time
-								slots.append(bloc)
-								last_time += (bloc["Length"] + 15)
-								remainder -= (bloc["Length"] + 15)
+								slots.append(_Slot(assign_this["Task"], assign_this["Length"], last_time))
+								last_time += (assign_this["Length"] + 15)
+								remainder -= (assign_this["Length"] + 15)
 							else:
 								target_not_found = True
 
@@ -467,10 +482,7 @@ def get_schedule(schedule_json):
 							# task into smaller pieces so that they fit into
 							# the gap as much as they can.
 
-							di_bloc = copy.deepcopy(item)
-							remainder_block = copy.deepcopy(item)
-							di_bloc["Length"] = remainder
-							remainder_block["Length"] = item["Length"] - remainder
+							remainder_length = item["Length"] - remainder
 
 							# This is done by reverse-dividing the remaining
 							# time in a similar fashion as done to blocks of
@@ -479,40 +491,26 @@ def get_schedule(schedule_json):
 							while remainder / divisor > 120:
 								divisor += 1
 
-							miniblocs = []
-							for k in range(divisor):
-								miniblocs.append(copy.deepcopy(di_bloc))
-								miniblocs[k]["Length"] = int(remainder / divisor)
-								miniblocs[k]["Start"] = last_time
-								slots.append(miniblocs[k])
-								last_time += (miniblocs[k]["Length"] + 15)
+							last_time = _add_blocs(slots, item["Task"], remainder, divisor, last_time)
 
 							last_time -= 15
-							dinner = {"Task": "Dinner", "Length": 60, "Start": last_time}
-							slots.append(dinner)
+							slots.append(_Slot("Dinner", 60, last_time))
 							dinnertime = last_time
 							last_time += 60 # 60 minute lunch break
 							Dinner_assigned = True
 
 							divisor = 1
-							while remainder_block["Length"] / divisor > 120:
+							while remainder_length / divisor > 120:
 								divisor += 1
 
-							miniblocs = []
-							for k in range(divisor):
-								miniblocs.append(copy.deepcopy(remainder_block))
-								miniblocs[k]["Length"] = int(remainder_block["Length"] / divisor)
-								miniblocs[k]["Start"] = last_time
-								slots.append(miniblocs[k])
-								last_time += (miniblocs[k]["Length"] + 15)
-							item["Assigned"] = "Yes"
+							last_time = _add_blocs(slots, item["Task"], remainder_length, divisor, last_time)
+							assigned[i] = True
 
 						else:
 							# Gap has been filled with tasks. Now assign dinner
 							# and then assign the current task we're looking at.
 							last_time -= 15 # no need for break between task and dinner
-							dinner = {"Task": "Dinner", "Length": 60, "Start": last_time}
-							slots.append(dinner)
+							slots.append(_Slot("Dinner", 60, last_time))
 							dinnertime = last_time
 							last_time += 60 # 60 minute dinner break
 							Dinner_assigned = True
@@ -527,14 +525,8 @@ def get_schedule(schedule_json):
 							while item["Length"] / divisor > 120:
 								divisor += 1
 
-							miniblocs = []
-							for k in range(divisor):
-								miniblocs.append(copy.deepcopy(item))
-								miniblocs[k]["Length"] = int(item["Length"] / divisor)
-								miniblocs[k]["Start"] = last_time
-								slots.append(miniblocs[k])
-								last_time += (miniblocs[k]["Length"] + 15)
-							item["Assigned"] = "Yes"
+							last_time = _add_blocs(slots, item["Task"], item["Length"], divisor, last_time)
+							assigned[i] = True
 
 					else:
 						# Remainder of time is less than 60 = look for
@@ -542,23 +534,22 @@ def get_schedule(schedule_json):
 						# assign the current task immediately after dinner.
 						assign_this = None
 
-						for j in range(i + 1, len(modified_tasklist)):
-							if modified_tasklist[j]["Length"] < remainder and "Assigned" not in modified_tasklist[j]:
-								assign_this = modified_tasklist[j]
-								assign_this["Assigned"] = "Yes"
-								break
+						j = None
+						if i + 1 < len(tasks):
+							j = fillers.first_shorter(i + 1, remainder)
+						if j is not None:
+							assign_this = tasks[j]
+							assigned[j] = True
+							fillers.remove(j)
 
 						if assign_this is not None:
-							bloc = copy.deepcopy(assign_this)
-							bloc["Start"] = last_time
-							slots.append(bloc)
-							last_time += (bloc["Length"] + 15)
+							slots.append(_Slot(assign_this["Task"], assign_this["Length"], last_time))
+							last_time += (assign_this["Length"] + 15)
 
 						# If none of the tasks can be assigned, then we
 						# simply go through with a dinner break assignment.
 						last_time -= 15 # no need for break between task and dinner
-						dinner = {"Task": "Dinner", "Length": 60, "Start": last_time}
-						slots.append(dinner)
+						slots.append(_Slot("Dinner", 60, last_time))
 						dinnertime = last_time
 						last_time += 60 # 60 minute dinner break
 						Dinner_assigned = True
@@ -573,14 +564,8 @@ def get_schedule(schedule_json):
 						while item["Length"] / divisor > 120:
 							divisor += 1
 
-						miniblocs = []
-						for k in range(divisor):
-							miniblocs.append(copy.deepcopy(item))
-							miniblocs[k]["Length"] = int(item["Length"] / divisor)
-							miniblocs[k]["Start"] = last_time
-							slots.append(miniblocs[k])
-							last_time += (miniblocs[k]["Length"] + 15)
-						item["Assigned"] = "Yes"
+						last_time = _add_blocs(slots, item["Task"], item["Length"], divisor, last_time)
+						assigned[i] = True
 
 				else:
 					# Task length is less than 2 hours = look for
@@ -588,23 +573,22 @@ def get_schedule(schedule_json):
 					# assign the current task immediately after dinner.
 					assign_this = None
 
-					for j in range(i + 1, len(modified_tasklist)):
-						if modified_tasklist[j]["Length"] < remainder and "Assigned" not in modified_tasklist[j]:
-							assign_this = modified_tasklist[j]
-							assign_this["Assigned"] = "Yes"
-							break
+					j = None
+					if i + 1 < len(tasks):
+						j = fillers.first_shorter(i + 1, remainder)
+					if j is not None:
+						assign_this = tasks[j]
+						assigned[j] = True
+						fillers.remove(j)
 
 					if assign_this is not None:
-						bloc = copy.deepcopy(assign_this)
-						bloc["Start"] = last_time
-						slots.append(bloc)
-						last_time += (bloc["Length"] + 15)
+						slots.append(_Slot(assign_this["Task"], assign_this["Length"], last_time))
+						last_time += (assign_this["Length"] + 15)
 
 					# If none of the tasks can be assigned, then we
 					# simply go through with a dinner break assignment.
 					last_time -= 15 # no need for break between task and dinner
-					dinner = {"Task": "Dinner", "Length": 60, "Start": last_time}
-					slots.append(dinner)
+					slots.append(_Slot("Dinner", 60, last_time))
 					dinnertime = last_time
 					last_time += 60 # 60 minute dinner break
 					Dinner_assigned = True
@@ -612,19 +596,16 @@ def get_schedule(schedule_json):
 					# Now we have to assign the current task we
 					# are looking at. Since it is less than 2 hours,
 					# we can simply go ahead and assign it immediately.
-					bloc = copy.deepcopy(item)
-					bloc["Start"] = last_time
-					slots.append(bloc)
-					last_time += (bloc["Length"] + 15) # 15 min break.
-					item["Assigned"] = "Yes"
+					slots.append(_Slot(item["Task"], item["Length"], last_time))
+					last_time += (item["Length"] + 15) # 15 min break.
+					assigned[i] = True
 
 			if not Dinner_assigned and last_time in range(lunchtime + 60 + 345, lunchtime + 60 + 406):
 				# Sum of all tasks assigned so far since end of lunch is
 				# roughly around 6 hours and task assigned just now
 				# didn't overshoot the 6 hour slot time.
 				last_time -= 15 # no need for break between task and dinner
-				dinner = {"Task": "Dinner", "Length": 60, "Start": last_time}
-				slots.append(dinner)
+				slots.append(_Slot("Dinner", 60, last_time))
 				dinnertime = last_time
 				last_time += 60 # 60 minute lunch break
 				Dinner_assigned = True
@@ -636,11 +617,9 @@ def get_schedule(schedule_json):
 			# in between
 			if item["Length"] < 120:
 				# Task length is less than 2 hours = go ahead assign it.
-				bloc = copy.deepcopy(item)
-				bloc["Start"] = last_time
-				slots.append(bloc)
-				last_time += (bloc["Length"] + 15) # 15 min break.
-				item["Assigned"] = "Yes"
+				slots.append(_Slot(item["Task"], item["Length"], last_time))
+				last_time += (item["Length"] + 15) # 15 min break.
+				assigned[i] = True
 			else: # item["Length"] >= 120:
 				# Task length is 2 hours or more = split, then assign.
 				# Find the smallest divisor that results in each bloc
@@ -651,14 +630,8 @@ def get_schedule(schedule_json):
 				while item["Length"] / divisor > 120:
 					divisor += 1
 
-				miniblocs = []
-				for j in range(divisor):
-					miniblocs.append(copy.deepcopy(item))
-					miniblocs[j]["Length"] = int(item["Length"] / divisor)
-					miniblocs[j]["Start"] = last_time
-					slots.append(miniblocs[j])
-					last_time += (miniblocs[j]["Length"] + 15)
-				item["Assigned"] = "Yes"
+				last_time = _add_blocs(slots, item["Task"], item["Length"], divisor, last_time)
+				assigned[i] = True
 
 	"""
 		The polishing stage
@@ -676,97 +649,75 @@ def get_schedule(schedule_json):
 	# The arbitrary threshold I use here is 6 hours, with an error margin
 	# of 60 minutes give or take.
 	#print(dinnertime - (lunchtime + 60))
-	breakloop = False
-	while (dinnertime - (lunchtime + 60)) not in range(300, 421) and not breakloop:
-		# Shift dinner time later until it reaches the above threshold.
-		for i in range(len(slots)):
-			if i == len(slots) - 1:
-				breakloop = True
-				break
-			if slots[i]["Task"] == "Dinner" and i != len(slots) - 1:
-				temp = slots[i]
-				slots[i] = slots[i + 1]
-				slots[i + 1] = temp
-
-				temp2 = slots[i]["Start"]
-				slots[i]["Start"] = slots[i + 1]["Start"] + 15
-				slots[i + 1]["Start"] = slots[i]["Start"] + slots[i]["Length"]
-				dinnertime = slots[i + 1]["Start"]
+	if (dinnertime - (lunchtime + 60)) not in range(300, 421):
+		# Shift dinner later, past one slot at a time, until it reaches
+		# the above threshold or the end of the day.
+		d = next((i for i in range(len(slots)) if slots[i].name == "Dinner"), None)
+		if d is not None:
+			dinner = slots[d]
+			while d < len(slots) - 1:
+				item = slots[d + 1]
+				item.start = dinner.start + 15
+				dinner.start = item.start + item.length
+				slots[d] = item
+				d += 1
+				dinnertime = dinner.start
 				#print(dinnertime - (lunchtime + 60))
 				if (dinnertime - (lunchtime + 60)) in range(300, 421):
-					breakloop = True
 					break
+			slots[d] = dinner
 
 	# Next, we modify any start/end times that point to awkward times.
-	for i in range(len(slots)):
-		item = slots[i]
-		rem = (item["Start"] + item["Length"]) % 5
+	# Every adjustment shifts all later slots, so carry the sum of the
+	# adjustments so far forward instead of shifting them one by one.
+	offset = 0
+	for item in slots:
+		item.start += offset
+		rem = (item.start + item.length) % 5
 		if rem != 0:
 			if rem < 2:
-				item["Length"] -= rem
-				for j in range(i + 1, len(slots)):
-					slots[j]["Start"] -= rem
+				item.length -= rem
+				offset -= rem
 			else:
-				item["Length"] += 5 - rem
-				for j in range(i + 1, len(slots)):
-					slots[j]["Start"] += 5 - rem
+				item.length += 5 - rem
+				offset += 5 - rem
 
 	# Last but not least, check if the dinner meal has been skipped.
 	if not Dinner_assigned:
-		dinnertime = slots[-1]["Start"] - 15 + slots[-1]["Length"]
-		slots.append({"Task": "Dinner", "Length": 60, "Start": dinnertime})
-		breakloop = False
-		while (dinnertime - (lunchtime + 60)) not in range(300, 421) and not breakloop:
-			# Shift dinner time later until it reaches the above threshold.
-			for i in range(len(slots)-1,-1,-1):
-				if i == 0:
-					breakloop = True
+		dinnertime = slots[-1].start - 15 + slots[-1].length
+		dinner = _Slot("Dinner", 60, dinnertime)
+		slots.append(dinner)
+		if (dinnertime - (lunchtime + 60)) not in range(300, 421):
+			# Shift dinner earlier, before one slot at a time, until it
+			# reaches the above threshold or the start of the day.
+			d = len(slots) - 1
+			while d > 0:
+				item = slots[d - 1]
+				dinner.start = item.start - 15
+				item.start = dinner.start + 60
+				slots[d] = item
+				d -= 1
+				dinnertime = dinner.start
+				#print(dinnertime - (lunchtime + 60))
+				if (dinnertime - (lunchtime + 60)) in range(300, 420):
 					break
-				if slots[i]["Task"] == "Dinner" and i != 0:
-					temp = slots[i - 1]
-					slots[i - 1] = slots[i]
-					slots[i] = temp
-
-					temp2 = slots[i - 1]["Start"]
-					slots[i - 1]["Start"] = slots[i]["Start"] - 15
-					slots[i]["Start"] = slots[i - 1]["Start"] + 60
-					dinnertime = slots[i - 1]["Start"]
-					#print(dinnertime - (lunchtime + 60))
-					if (dinnertime - (lunchtime + 60)) in range(300, 420):
-						breakloop = True
-						break
-
-	# Now we process slots before returning it as a proper json.
-	json_data = []
+			slots[d] = dinner
+
+	# Now we turn the slots into the JSON format as they are asked for.
+	hour, minute = start
 	for i in range(len(slots)):
 		item = slots[i]
-		item_hour = item["Length"] // 60
-		item_min = item["Length"] % 60
-		new_item = {}
-		new_item["Task"] = item["Task"]
-		if start[1] < 10:
-			new_item["Start"] = str(start[0]) + ":0" + str(start[1])
-		else:
-			new_item["Start"] = str(start[0]) + ":" + str(start[1])
-		item_end_hour = start[0] + item_hour
-		item_end_min = start[1] + item_min
-		if item_end_min >= 60:
-			temp = item_end_min
-			item_end_min = item_end_min % 60
-			item_end_hour += (temp // 60)
-		if item_end_min < 10:
-			new_item["End"] = str(item_end_hour) + ":0" + str(item_end_min)
-		else:
-			new_item["End"] = str(item_end_hour) + ":" + str(item_end_min)
-		json_data.append(new_item)
-		print(new_item["Task"] + " begins at " + new_item["Start"] + " and ends at " + new_item["End"])
-		start[0] = item_end_hour
-		start[1] = item_end_min
-		if i != len(slots)-1 and (slots[i+1]["Task"] != "Lunch" and slots[i+1]["Task"] != "Dinner") and (slots[i]["Task"] != "Lunch" and slots[i]["Task"] != "Dinner"):
-			start[1] += 15
-			if start[1] >= 60:
-				temp = start[1]
-				start[1] = start[1] % 60
-				start[0] += (temp // 60)
-
-	return json_data
+		begins = _clock(hour, minute)
+		hour += item.length // 60
+		minute += item.length % 60
+		if minute >= 60:
+			hour += minute // 60
+			minute %= 60
+		new_item = {"Task": item.name, "Start": begins, "End": _clock(hour, minute)}
+		logger.debug("%s begins at %s and ends at %s", item.name, new_item["Start"], new_item["End"])
+		yield new_item
+		if i != len(slots) - 1 and slots[i + 1].name not in MEALS and item.name not in MEALS:
+			minute += 15
+			if minute >= 60:
+				hour += minute // 60
+				minute %= 60
@@ -3,6 +3,10 @@
 
 DROP TABLE IF EXISTS user;
 DROP TABLE IF EXISTS post;
+DROP TABLE IF EXISTS post_fts;
+DROP TABLE IF EXISTS post_keyterm;
+DROP TABLE IF EXISTS post_version;
+DROP TABLE IF EXISTS keyterm_memo;
 
 CREATE TABLE user (
   id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -16,5 +20,78 @@ CREATE TABLE post (
   created TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
   title TEXT NOT NULL,
   body TEXT NOT NULL,
+  -- the start of the body shown in post listings, kept up to date by
+  -- the triggers below
+  excerpt TEXT NOT NULL DEFAULT '',
   FOREIGN KEY (author_id) REFERENCES user (id)
 );
+
+-- post listings page through posts newest first
+CREATE INDEX post_created_id ON post (created DESC, id DESC);
+
+CREATE TRIGGER post_excerpt_insert AFTER INSERT ON post BEGIN
+  UPDATE post SET excerpt = CASE
+    WHEN length(NEW.body) > 280 THEN substr(NEW.body, 1, 280) || '...'
+    ELSE NEW.body
+  END WHERE id = NEW.id;
+END;
+
+CREATE TRIGGER post_excerpt_update AFTER UPDATE OF body ON post BEGIN
+  UPDATE post SET excerpt = CASE
+    WHEN length(NEW.body) > 280 THEN substr(NEW.body, 1, 280) || '...'
+    ELSE NEW.body
+  END WHERE id = NEW.id;
+END;
+
+-- Full-text index of the posts' titles and bodies. It reads the text
+-- from the post table and the triggers below keep it in sync.
+CREATE VIRTUAL TABLE post_fts USING fts5(
+  title, body, content='post', content_rowid='id'
+);
+
+CREATE TRIGGER post_fts_insert AFTER INSERT ON post BEGIN
+  INSERT INTO post_fts (rowid, title, body) VALUES (NEW.id, NEW.title, NEW.body);
+END;
+
+CREATE TRIGGER post_fts_delete AFTER DELETE ON post BEGIN
+  INSERT INTO post_fts (post_fts, rowid, title, body)
+  VALUES ('delete', OLD.id, OLD.title, OLD.body);
+END;
+
+CREATE TRIGGER post_fts_update AFTER UPDATE OF title, body ON post BEGIN
+  INSERT INTO post_fts (post_fts, rowid, title, body)
+  VALUES ('delete', OLD.id, OLD.title, OLD.body);
+  INSERT INTO post_fts (rowid, title, body) VALUES (NEW.id, NEW.title, NEW.body);
+END;
+
+-- Key terms extracted from each post, tagged with a fingerprint of the
+-- extraction parameters that produced them.
+CREATE TABLE post_keyterm (
+  post_id INTEGER NOT NULL,
+  term TEXT NOT NULL,
+  score REAL NOT NULL,
+  fingerprint TEXT NOT NULL,
+  FOREIGN KEY (post_id) REFERENCES post (id)
+);
+
+CREATE INDEX post_keyterm_post_id ON post_keyterm (post_id);
+CREATE INDEX post_keyterm_fingerprint_term ON post_keyterm (fingerprint, term);
+
+-- Key terms extracted from a text, keyed by a hash of the normalized
+-- text and the extraction parameters.
+CREATE TABLE keyterm_memo (
+  hash TEXT PRIMARY KEY,
+  terms TEXT NOT NULL,
+  used REAL NOT NULL DEFAULT (julianday('now'))
+);
+
+CREATE INDEX keyterm_memo_used ON keyterm_memo (used);
+
+-- A counter bumped on every write to the post table, used to key
+-- cached results computed from the posts, and the time of that write.
+CREATE TABLE post_version (
+  version INTEGER NOT NULL,
+  modified TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+INSERT INTO post_version (version) VALUES (0);
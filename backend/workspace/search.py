@@ -0,0 +1,109 @@
+"""
+Full-text search over the posts with SQLite's FTS5. The ``post_fts``
+table indexes every post's title and body and is kept in sync by
+triggers in ``schema.sql``. Results are ranked by BM25.
+"""
+import click
+from flask import Blueprint
+from flask import current_app
+from flask import render_template
+from flask import request
+from flask.cli import with_appcontext
+from markupsafe import Markup
+from markupsafe import escape
+from werkzeug.exceptions import abort
+
+from coolspace.db import get_db
+
+bp = Blueprint("search", __name__)
+
+# FTS5 wraps matches in these; they are swapped for HTML tags once the
+# rest of the text has been escaped
+_MATCH_START = "\x02"
+_MATCH_END = "\x03"
+
+# deepest page of results that is served; OFFSET grows with it
+MAX_PAGE = 1000
+
+
+def match_query(text):
+    """Turn what a user typed into an FTS5 query matching posts that
+    contain every word. Each word is quoted, so FTS5 operators and
+    punctuation in the text are searched for rather than interpreted.
+    """
+    return " ".join('"{0}"'.format(word.replace('"', '""')) for word in text.split())
+
+
+def highlight(text):
+    """Escape a title or snippet from FTS5 and mark up its matches."""
+    html = str(escape(text))
+    return Markup(html.replace(_MATCH_START, "<mark>").replace(_MATCH_END, "</mark>"))
+
+
+def search_posts(db, text, limit, offset=0):
+    """Find the posts matching ``text``, best first.
+
+    :param text: words that must all appear in a post's title or body
+    :return: rows with the post's id, author and creation time, its
+        highlighted ``title`` and a highlighted ``snippet`` of its body
+    """
+    rows = db.execute(
+        "SELECT p.id, p.created, p.author_id, u.username,"
+        " highlight(post_fts, 0, ?, ?) AS title,"
+        " snippet(post_fts, 1, ?, ?, '...', 24) AS snippet"
+        " FROM post_fts"
+        " JOIN post p ON p.id = post_fts.rowid"
+        " JOIN user u ON u.id = p.author_id"
+        " WHERE post_fts MATCH ?"
+        " ORDER BY bm25(post_fts), p.id"
+        " LIMIT ? OFFSET ?",
+        (_MATCH_START, _MATCH_END) * 2 + (match_query(text), limit, offset),
+    ).fetchall()
+    return [
+        dict(row, title=highlight(row["title"]), snippet=highlight(row["snippet"]))
+        for row in rows
+    ]
+
+
+@bp.route("/search")
+def search():
+    """Show a page of the posts matching the ``q`` argument."""
+    text = request.args.get("q", "").strip()
+    page = max(request.args.get("page", 1, type=int), 1)
+
+    if page > MAX_PAGE:
+        abort(404, "Results are only shown up to page {0}.".format(MAX_PAGE))
+
+    per_page = current_app.config["POSTS_PER_PAGE"]
+    results = []
+    has_next = False
+
+    if text:
+        # one extra row tells whether there is a next page
+        results = search_posts(get_db(readonly=True), text, per_page + 1, (page - 1) * per_page)
+        has_next = len(results) > per_page
+        results = results[:per_page]
+
+    return render_template(
+        "search.html", q=text, results=results, page=page, has_next=has_next
+    )
+
+
+def rebuild_search_index(db):
+    """Rebuild the full-text index from the post table."""
+    db.execute("INSERT INTO post_fts (post_fts) VALUES ('rebuild')")
+    db.execute("INSERT INTO post_fts (post_fts) VALUES ('optimize')")
+    db.commit()
+
+
+@click.command("rebuild-search")
+@with_appcontext
+def rebuild_search_command():
+    """Rebuild the full-text search index."""
+    rebuild_search_index(get_db())
+    click.echo("Rebuilt the search index.")
+
+
+def init_app(app):
+    """Register the search index command with the Flask app."""
+    app.cli.add_command(rebuild_search_command)
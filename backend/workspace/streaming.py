@@ -0,0 +1,72 @@
+"""
+Rendering templates as a stream, so a large page starts reaching the
+browser while the rest is still being rendered, and a worker never
+holds the whole page in memory. Output is sent in chunks of about
+``STREAM_CHUNK_SIZE`` characters.
+
+Streaming is switched per view: views that render with :func:`render`
+stream if their endpoint is listed in ``STREAM_VIEWS``.
+"""
+from flask import current_app
+from flask import get_flashed_messages
+from flask import render_template
+from flask import request
+from flask import stream_with_context
+
+
+def _chunks(pieces, size):
+    """Join small pieces of output into chunks of at least ``size``
+    characters."""
+    buffer = []
+    length = 0
+
+    for piece in pieces:
+        buffer.append(piece)
+        length += len(piece)
+
+        if length >= size:
+            yield "".join(buffer)
+            buffer = []
+            length = 0
+
+    if buffer:
+        yield "".join(buffer)
+
+
+def generate_template(template_name, **context):
+    """Render a template piece by piece, with the same context as
+    ``render_template``.
+
+    :return: a generator of output strings
+    """
+    app = current_app._get_current_object()
+    app.update_template_context(context)
+    # flashed messages leave the session when they are first read, which
+    # must happen before the response saves it, not while it streams;
+    # later reads in the template get them from the request
+    get_flashed_messages()
+    return app.jinja_env.get_template(template_name).generate(context)
+
+
+def stream_template(template_name, **context):
+    """Return a response that renders a template as it is sent. The
+    request stays available to the template until it is done."""
+    chunks = _chunks(
+        generate_template(template_name, **context),
+        current_app.config["STREAM_CHUNK_SIZE"],
+    )
+    return current_app.response_class(stream_with_context(chunks), mimetype="text/html")
+
+
+def streaming():
+    """Whether the current view streams its templates."""
+    return request.endpoint in current_app.config["STREAM_VIEWS"]
+
+
+def render(template_name, **context):
+    """Render a template for the current view, streamed if the view is
+    listed in ``STREAM_VIEWS``."""
+    if streaming():
+        return stream_template(template_name, **context)
+
+    return render_template(template_name, **context)
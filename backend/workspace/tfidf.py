@@ -0,0 +1,224 @@
+"""
+A fast keyword extractor that needs no parser. Texts are split with a
+regular expression, their n-grams counted into one sparse term-document
+matrix, and every post's key terms picked by TF-IDF in a single
+vectorized pass. It trades linguistic precision for latency, so it suits
+interactive dashboards while sgrank stays the choice for offline runs.
+
+NumPy and SciPy are optional dependencies installed with the ``fast``
+extra and only imported when this extractor runs.
+"""
+import math
+import re
+
+from coolspace.nlp import NLPUnavailableError
+
+_token_re = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+# n-grams starting or ending with one of these are not key terms
+STOP_WORDS = frozenset(
+    """
+    a about above after again against all am an and any are as at be
+    because been before being below between both but by can could did do
+    does doing down during each few for from further had has have having
+    he her here hers herself him himself his how i if in into is it its
+    itself just me more most my myself no nor not now of off on once only
+    or other our ours ourselves out over own same she should so some such
+    than that the their theirs them themselves then there these they this
+    those through to too under until up very was we were what when where
+    which while who whom why will with would you your yours yourself
+    yourselves
+    """.split()
+)
+
+
+def _load_numpy():
+    """Import NumPy and SciPy's sparse matrices on first use."""
+    try:
+        import numpy
+        import scipy.sparse
+    except ImportError as e:
+        raise NLPUnavailableError(
+            "Fast keyword analysis requires NumPy and SciPy. Install them with"
+            " 'pip install coolspace[fast]'. ({0})".format(e)
+        )
+
+    return numpy, scipy.sparse
+
+
+def ngrams(text, sizes):
+    """Yield the candidate key terms of a text: its n-grams of the given
+    sizes that don't start or end with a stop word or a number."""
+    tokens = _token_re.findall(text.lower())
+
+    for n in sizes:
+        if n < 1:
+            raise ValueError("n-gram sizes must be positive, not {0}.".format(n))
+
+        for i in range(len(tokens) - n + 1):
+            first = tokens[i]
+            last = tokens[i + n - 1]
+
+            if first in STOP_WORDS or last in STOP_WORDS:
+                continue
+
+            if first.isdigit() or last.isdigit():
+                continue
+
+            yield " ".join(tokens[i : i + n])
+
+
+class _Terms(object):
+    """The text of candidate terms by column, joined only when asked for."""
+
+    def __init__(self, tokens, sizes, starts):
+        self.tokens = tokens
+        self.sizes = sizes
+        self.starts = starts
+
+    def __len__(self):
+        return len(self.starts)
+
+    def __getitem__(self, column):
+        start = self.starts[column]
+        return " ".join(self.tokens[start : start + self.sizes[column]])
+
+
+def _candidates(numpy, texts, sizes):
+    """Find the candidate n-grams of every text, the same ones
+    :func:`ngrams` yields, with array operations on token ids instead of
+    building every n-gram string.
+
+    :return: ``(rows, cols, terms)``, the text and term column of every
+        occurrence, with columns numbered in order of first appearance,
+        and the text of each column
+    """
+    # token -> id; each text is tokenized once and its n-grams are then
+    # runs of consecutive ids within the text
+    ids = {}
+    tokens = []
+    lengths = []
+
+    for text in texts:
+        found = _token_re.findall(text.lower())
+        tokens.extend(found)
+        lengths.append(len(found))
+
+    token_ids = numpy.fromiter(
+        (ids.setdefault(token, len(ids)) for token in tokens), numpy.int64, len(tokens)
+    )
+    doc_of = numpy.repeat(numpy.arange(len(lengths)), lengths)
+    # tokens that can't start or end a candidate
+    excluded = numpy.fromiter(
+        (token in STOP_WORDS or token.isdigit() for token in ids), bool, len(ids)
+    )
+    bad = excluded[token_ids]
+    n_tokens = len(tokens)
+    n_ids = max(len(ids), 1)
+    # id of the n-gram starting at every position, extended by one token
+    # at a time: an (n-1)-gram id and the next token identify an n-gram
+    prefix = token_ids
+    occurrences = []
+    grams = 0
+
+    for n in range(1, sizes[-1] + 1):
+        if n > 1:
+            pairs = prefix[:-1] * n_ids + token_ids[n - 1 :]
+            prefix = numpy.unique(pairs, return_inverse=True)[1].ravel()
+
+        if n not in sizes:
+            continue
+
+        starts = numpy.arange(len(prefix))
+        ends = starts + n - 1
+        starts = starts[(doc_of[starts] == doc_of[ends]) & ~bad[starts] & ~bad[ends]]
+
+        if not len(starts):
+            continue
+
+        # number the n-grams that occur, and find where each first does
+        occurs = numpy.zeros(len(prefix), dtype=bool)
+        occurs[prefix[starts]] = True
+        number = numpy.cumsum(occurs) - 1
+        gram = number[prefix[starts]]
+        first = numpy.full(number[-1] + 1, n_tokens)
+        numpy.minimum.at(first, gram, starts)
+        occurrences.append((doc_of[starts], gram + grams, numpy.full(len(first), n), first))
+        grams += len(first)
+
+    if not occurrences:
+        return [], [], _Terms(tokens, [], [])
+
+    rows, gram_of, gram_size, gram_start = (
+        numpy.concatenate(parts) for parts in zip(*occurrences)
+    )
+    # ngrams yields a text's n-grams by size, then position, so an
+    # n-gram's first appearance is its first text, its size and its
+    # first position
+    appearance = (doc_of[gram_start] * (sizes[-1] + 1) + gram_size) * n_tokens + gram_start
+    by_appearance = numpy.argsort(appearance)
+    column = numpy.empty(grams, dtype=numpy.int64)
+    column[by_appearance] = numpy.arange(grams)
+    terms = _Terms(tokens, gram_size[by_appearance], gram_start[by_appearance])
+    return rows, column[gram_of], terms
+
+
+def top_terms(texts, n_key_float=0.75, n_grams="1,2,3,4", cutoff=10):
+    """Return the ``cutoff`` terms that are key terms of the most texts.
+
+    Every text's key terms are its candidate n-grams with the highest
+    TF-IDF, keeping ``n_key_float`` of its distinct candidates if that
+    is a fraction or that many if it's 1 or more, like textrank and
+    sgrank do. Ties rank in order of first appearance.
+
+    :param texts: list of texts
+    :param n_grams: comma separated n-gram sizes to consider
+    :raise ValueError: if an n-gram size isn't a positive integer or
+        ``n_key_float`` isn't a positive number
+    :raise NLPUnavailableError: if NumPy or SciPy isn't installed
+    """
+    sizes = sorted({int(n) for n in n_grams.split(",")})
+
+    if sizes[0] < 1:
+        raise ValueError("n-gram sizes must be positive, not {0}.".format(sizes[0]))
+
+    if not (math.isfinite(n_key_float) and n_key_float > 0):
+        raise ValueError("n_key_float must be a positive number, not {0!r}.".format(n_key_float))
+
+    numpy, sparse = _load_numpy()
+    rows, cols, terms = _candidates(numpy, texts, sizes)
+
+    if not len(cols):
+        return []
+
+    n_docs = len(texts)
+    n_terms = len(terms)
+    # converting to CSR sums repeated (row, col) pairs into counts
+    counts = sparse.coo_matrix(
+        (numpy.ones(len(cols)), (rows, cols)), shape=(n_docs, n_terms)
+    ).tocsr()
+    counts.sort_indices()
+
+    distinct = numpy.diff(counts.indptr)
+    doc_of = numpy.repeat(numpy.arange(n_docs), distinct)
+    term_of = counts.indices
+    doc_length = numpy.asarray(counts.sum(axis=1)).ravel()
+    df = numpy.bincount(term_of, minlength=n_terms)
+    idf = numpy.log((1.0 + n_docs) / (1.0 + df)) + 1.0
+    scores = counts.data / doc_length[doc_of] * idf[term_of]
+
+    if 0.0 < n_key_float < 1.0:
+        budget = numpy.rint(distinct * n_key_float).astype(numpy.int64)
+    else:
+        budget = numpy.full(n_docs, int(n_key_float), dtype=numpy.int64)
+
+    # order every entry by document, then best score, then first seen;
+    # an entry's rank within its document is its offset from the start
+    order = numpy.lexsort((term_of, -scores, doc_of))
+    rank = numpy.arange(len(order)) - counts.indptr[doc_of[order]]
+    chosen = term_of[order][rank < budget[doc_of[order]]]
+
+    tally = numpy.bincount(chosen, minlength=n_terms)
+    ranked = numpy.lexsort((numpy.arange(n_terms), -tally))
+    ranked = ranked[tally[ranked] > 0][:cutoff]
+    return [terms[i] for i in ranked]
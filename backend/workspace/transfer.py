@@ -0,0 +1,224 @@
+"""
+Bulk export and import of posts as JSON lines or CSV. Both commands
+stream: files are read and written a row at a time and rows are
+inserted in batches with ``executemany``, one transaction per batch, so
+memory use doesn't grow with the size of the file.
+
+Every row has a post's ``title``, ``body``, ``author`` (the username)
+and ``created`` time.
+"""
+import contextlib
+import csv
+import io
+import json
+import sys
+import time
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from coolspace import iterutils
+from coolspace.db import bump_post_version
+from coolspace.db import get_db
+from coolspace.db import normalize_time
+
+FIELDS = ("title", "body", "author", "created")
+FORMATS = ("jsonl", "csv")
+
+
+def _guess_format(f, format):
+    if format is not None:
+        return format
+
+    return "csv" if getattr(f, "name", "").endswith(".csv") else "jsonl"
+
+
+@contextlib.contextmanager
+def _text(f):
+    """Use binary file ``f`` as UTF-8 text without translating line
+    endings, as the csv module needs, so line breaks inside a body come
+    back as they were written. ``f`` is left open."""
+    text = io.TextIOWrapper(f, encoding="utf-8", newline="")
+
+    try:
+        yield text
+    finally:
+        text.detach()
+
+
+def iter_posts(db, batch_size):
+    """Yield every post as a row dict in id order, reading the table a
+    batch at a time."""
+    last_id = 0
+
+    while True:
+        posts = db.execute(
+            "SELECT p.id, title, body, username, created"
+            " FROM post p JOIN user u ON p.author_id = u.id"
+            " WHERE p.id > ? ORDER BY p.id LIMIT ?",
+            (last_id, batch_size),
+        ).fetchall()
+
+        if not posts:
+            return
+
+        for post in posts:
+            yield {
+                "title": post["title"],
+                "body": post["body"],
+                "author": post["username"],
+                "created": post["created"].isoformat(" "),
+            }
+
+        last_id = posts[-1]["id"]
+
+
+def write_posts(f, format, rows):
+    """Write row dicts to a file, one line at a time.
+
+    :return: the number of rows written
+    """
+    count = 0
+
+    if format == "csv":
+        writer = csv.DictWriter(f, FIELDS)
+        writer.writeheader()
+
+        for count, row in enumerate(rows, 1):
+            writer.writerow(row)
+    else:
+        for count, row in enumerate(rows, 1):
+            f.write(json.dumps(row))
+            f.write("\n")
+
+    return count
+
+
+def read_posts(f, format):
+    """Yield row dicts from a file, one line at a time.
+
+    :raise click.ClickException: if a JSON line is malformed
+    """
+    if format == "csv":
+        # post bodies can be longer than the default field limit
+        csv.field_size_limit(sys.maxsize)
+
+        for row in csv.DictReader(f):
+            yield row
+
+        return
+
+    for number, line in enumerate(f, 1):
+        if not line.strip():
+            continue
+
+        try:
+            yield json.loads(line)
+        except ValueError as e:
+            raise click.ClickException(
+                "Line {0} isn't valid JSON: {1}".format(number, e)
+            )
+
+
+def _report(verb, count, start):
+    """Print how many rows were processed and how fast."""
+    rate = count / max(time.perf_counter() - start, 1e-9)
+    click.echo("{0} {1} posts ({2:.0f} rows/s)".format(verb, count, rate), err=True)
+
+
+@click.command("export-posts")
+@click.argument("output", type=click.File("wb"), default="-")
+@click.option("--format", type=click.Choice(FORMATS), default=None,
+    help="File format. [default: csv for .csv files, else jsonl]")
+@click.option("--batch-size", type=int, default=None,
+    help="Posts read per query. [default: TRANSFER_BATCH_SIZE]")
+@with_appcontext
+def export_posts_command(output, format, batch_size):
+    """Write every post to OUTPUT, or to standard output."""
+    batch_size = batch_size or current_app.config["TRANSFER_BATCH_SIZE"]
+    start = time.perf_counter()
+
+    def reported(rows):
+        for count, row in enumerate(rows, 1):
+            yield row
+
+            if count % batch_size == 0:
+                _report("Exported", count, start)
+
+    rows = iter_posts(get_db(readonly=True), batch_size)
+
+    with _text(output) as f:
+        count = write_posts(f, _guess_format(f, format), reported(rows))
+
+    _report("Exported", count, start)
+
+
+@click.command("import-posts")
+@click.argument("input", type=click.File("rb"), default="-")
+@click.option("--format", type=click.Choice(FORMATS), default=None,
+    help="File format. [default: csv for .csv files, else jsonl]")
+@click.option("--batch-size", type=int, default=None,
+    help="Posts inserted per transaction. [default: TRANSFER_BATCH_SIZE]")
+@with_appcontext
+def import_posts_command(input, format, batch_size):
+    """Add the posts in INPUT, or standard input, to the database.
+    Authors are matched by username; posts by unknown authors, or with
+    a created time that can't be read, are skipped.
+    """
+    batch_size = batch_size or current_app.config["TRANSFER_BATCH_SIZE"]
+    db = get_db()
+    # username -> id, read once instead of looked up for every row
+    users = db.execute("SELECT id, username FROM user")
+    authors = {row["username"]: row["id"] for row in users}
+    start = time.perf_counter()
+    count = 0
+    skipped = 0
+
+    with _text(input) as f:
+        rows = read_posts(f, _guess_format(f, format))
+
+        for batch in iterutils.batches(rows, batch_size):
+            values = []
+
+            for row in batch:
+                author_id = authors.get(row.get("author"))
+
+                if author_id is None or not row.get("title"):
+                    skipped += 1
+                    continue
+
+                created = row.get("created") or None
+
+                if created is not None:
+                    try:
+                        created = normalize_time(created)
+                    except ValueError:
+                        skipped += 1
+                        continue
+
+                values.append((row["title"], row.get("body") or "", author_id, created))
+
+            db.executemany(
+                "INSERT INTO post (title, body, author_id, created)"
+                " VALUES (?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP))",
+                values,
+            )
+            bump_post_version(db)
+            db.commit()
+            count += len(values)
+            _report("Imported", count, start)
+
+    if skipped:
+        click.echo(
+            "Skipped {0} posts without a title, a known author or a valid time.".format(skipped),
+            err=True,
+        )
+
+    click.echo("Run 'flask index-keyterms' to index the new posts.", err=True)
+
+
+def init_app(app):
+    """Register the import and export commands with the Flask app."""
+    app.cli.add_command(export_posts_command)
+    app.cli.add_command(import_posts_command)
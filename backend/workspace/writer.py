@@ -0,0 +1,179 @@
+"""
+Database writes from views. By default a write runs on the request's
+own connection and commits on its own. With ``DATABASE_GROUP_COMMIT``
+on, writes are queued to a single writer thread instead, which commits
+them in small batches: concurrent requests then share one transaction
+and one fsync, instead of each taking the write lock in turn.
+"""
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from flask import current_app
+
+from coolspace.db import get_db
+
+
+class GroupCommitWriter(object):
+    """Run writes on one thread and commit them in batches.
+
+    Each write runs in its own savepoint, so a write that fails is
+    rolled back alone and the rest of its batch still commits.
+
+    :param app: the app whose database is written
+    :param max_batch: most writes committed together
+    :param max_delay: seconds the first write of a batch may wait for
+        others to join it
+    """
+
+    def __init__(self, app, max_batch=32, max_delay=0.002):
+        self.app = app
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._closed = False
+
+    def submit(self, func, *args):
+        """Queue ``func(db, *args)`` to run in the next batch.
+
+        :return: a :class:`~concurrent.futures.Future` set to what
+            ``func`` returns once its batch is committed, or to the
+            error that ``func`` or the commit raised
+        """
+        future = Future()
+
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("The database writer is closed.")
+
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._run, name="coolspace-writer", daemon=True
+                )
+                self._thread.start()
+
+            self._queue.put((func, args, future))
+
+        return future
+
+    def _next_batch(self):
+        """Wait for a write, then gather the writes that arrive until the
+        batch is full or its delay runs out. ``None`` marks shutdown."""
+        first = self._queue.get()
+
+        if first is None:
+            return None
+
+        batch = [first]
+        deadline = time.monotonic() + self.max_delay
+
+        while len(batch) < self.max_batch:
+            timeout = deadline - time.monotonic()
+
+            if timeout <= 0:
+                break
+
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+
+            if item is None:
+                # stop after committing this batch
+                self._queue.put(None)
+                break
+
+            batch.append(item)
+
+        return batch
+
+    def _run(self):
+        with self.app.app_context():
+            try:
+                while True:
+                    batch = self._next_batch()
+
+                    if batch is None:
+                        return
+
+                    self._commit(batch)
+            finally:
+                self.app.extensions["coolspace.db"].close_thread()
+
+    def _commit(self, batch):
+        db = self.app.extensions["coolspace.db"].connection()
+        outcomes = []
+
+        try:
+            db.execute("BEGIN IMMEDIATE")
+
+            for func, args, future in batch:
+                db.execute("SAVEPOINT write")
+
+                try:
+                    outcomes.append((future, func(db, *args), None))
+                    db.execute("RELEASE write")
+                except Exception as e:
+                    db.execute("ROLLBACK TO write")
+                    db.execute("RELEASE write")
+                    outcomes.append((future, None, e))
+
+            db.commit()
+        except Exception as e:
+            if db.in_transaction:
+                db.rollback()
+
+            for func, args, future in batch:
+                future.set_exception(e)
+
+            return
+
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+
+    def close(self):
+        """Commit the queued writes and stop the writer thread."""
+        with self._lock:
+            self._closed = True
+            thread = self._thread
+
+        if thread is not None:
+            self._queue.put(None)
+            thread.join()
+
+
+def run_write(func, *args):
+    """Run ``func(db, *args)`` in a transaction and commit it, either on
+    this request's connection or batched with other requests' writes.
+    ``func`` must not commit.
+
+    :return: what ``func`` returned
+    :raise: whatever ``func`` or the commit raised
+    """
+    writer = current_app.extensions.get("coolspace.writer")
+
+    if writer is None:
+        db = get_db()
+        result = func(db, *args)
+        db.commit()
+        return result
+
+    return writer.submit(func, *args).result()
+
+
+def init_app(app):
+    """Set up group commit if it is enabled. This is called by the
+    application factory.
+    """
+    if app.config["DATABASE_GROUP_COMMIT"]:
+        app.extensions["coolspace.writer"] = GroupCommitWriter(
+            app,
+            max_batch=app.config["DATABASE_GROUP_COMMIT_SIZE"],
+            max_delay=app.config["DATABASE_GROUP_COMMIT_DELAY"],
+        )